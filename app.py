@@ -1,10 +1,16 @@
 import streamlit as st
-import pandas as pd
-from rapidfuzz import process, fuzz, utils
 import urllib.parse
-import requests
+import os
 import re
 import html
+import hmac
+import threading
+import time
+from page_assets import APP_CSS, BANNER_AD_HTML, FONTS_HTML, LOADING_HTML, METRIC_CSS, PDF_ICON_SVG, TITLE_HTML
+
+# Build the permalink index only when a page needs it and replay the warm-up
+# on a background thread, instead of before a new replica's first paint
+LAZY_STARTUP = os.environ.get("LAZY_STARTUP", "1") != "0"
 
 
 def sanitize_filename(raw_name: str) -> str:
@@ -43,252 +49,43 @@ st.set_page_config(
 
 def get_pdf_icon_svg():
     """Return PDF icon SVG"""
-    return """
-    <svg width="60" height="60" viewBox="0 0 60 60" fill="none" xmlns="http://www.w3.org/2000/svg">
-        <rect width="60" height="60" rx="8" fill="#db463b"/>
-        <path d="M18 15h14l8 8v22H18V15z" fill="white"/>
-        <path d="M32 15v8h8" stroke="#db463b" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"/>
-        <path d="M22 28h16M22 35h12M22 42h16" stroke="#09262e" stroke-width="2" stroke-linecap="round"/>
-    </svg>
-    """
+    return PDF_ICON_SVG
 
 
 # Custom CSS
-st.markdown("""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Barlow+Condensed:wght@400;500;600;700&family=Poppins:wght@300;400;500;600&display=swap');
-    
-    .main {
-        background-color: #09262e;
-        padding: 2rem;
-        font-family: 'Poppins', sans-serif;
-    }
-    
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    
-    .stTextInput>div>div>input {
-        background-color: #ffffff;
-        color: #09262e;
-        border-radius: 8px;
-        border: 2px solid #db463b;
-        font-family: 'Poppins', sans-serif;
-        font-size: 16px;
-        padding: 12px;
-    }
-    
-    .stTextInput>div>div>input:focus {
-        border-color: #db463b;
-        box-shadow: 0 0 0 3px rgba(219, 70, 59, 0.1);
-    }
-    
-    .stButton>button {
-        background-color: #db463b;
-        color: white;
-        border: none;
-        border-radius: 8px;
-        font-family: 'Barlow Condensed', sans-serif;
-        font-weight: 600;
-        font-size: 16px;
-        padding: 12px 24px;
-        transition: all 0.3s;
-    }
-    
-    .stButton>button:hover {
-        background-color: #c03a2b;
-        transform: translateY(-2px);
-        box-shadow: 0 4px 12px rgba(219, 70, 59, 0.3);
-    }
-    
-    .stDownloadButton>button {
-        background-color: #28a745;
-        color: white;
-    }
-    
-    .stDownloadButton>button:hover {
-        background-color: #218838;
-    }
-    
-    .pdf-tile {
-        background: rgba(255,255,255,0.02);
-        border-radius: 12px;
-        padding: 18px;
-        margin: 10px 0;
-        transition: all 0.18s;
-        border: 1px solid rgba(255,255,255,0.03);
-    }
+st.markdown(FONTS_HTML + APP_CSS, unsafe_allow_html=True)
 
-    .pdf-tile:hover {
-        transform: translateY(-4px);
-        box-shadow: 0 8px 24px rgba(0, 0, 0, 0.6);
-        border-color: rgba(219, 70, 59, 0.25);
-    }
+# Show the loading screen before the heavy imports below, which a new
+# replica pays for during its first session
+if 'data_loaded' not in st.session_state:
+    st.session_state.data_loaded = False
+loading_placeholder = st.empty()
+if not st.session_state.data_loaded:
+    with loading_placeholder.container():
+        st.markdown(LOADING_HTML, unsafe_allow_html=True)
 
-    .pdf-icon {
-        width: 60px;
-        height: 60px;
-        margin: 0 auto 12px;
-        display: block;
-        text-align: center;
-    }
+import pandas as pd
+import streamlit.components.v1 as components
+from telegram_download import default_downloader, get_telegram_file_content
+from pdf_cache import PDF_CACHE_PIN_TOP
+from search import normalize_text, fuzzy_search, build_filename_index, build_file_terms, canonical_query, visible_rows
+from taxonomy import TAXONOMY
+from content_index import load_content_index
+from trigram_index import TrigramIndex
+from sharded_search import SHARDED_SEARCH_MIN_FILES, ShardedSearchEngine
+from shared_index import SharedIndex
+from mirror import MirrorStore
+from event_log import REPLAY_DOWNLOADS, REPLAY_SEARCHES, EventLog, read_recent, top_downloads, top_searches
+from profiling import RequestProfiler, list_profiles, summarize
+from facets import FACETS, FACET_LABELS, FacetIndex, parse_year_range
+from thumbnails import thumbnail_url
+from permalinks import PermalinkIndex, permalink_key
+from sources import SourceRouter, parse_sources
+from memory_governor import MemoryGovernor
+from compact_catalog import compact_frame
+from bulk_download import (BUNDLE_DIR, BUNDLE_MAX_BYTES, BUNDLE_URL_PREFIX, bundle_name, bundle_parts, cleanup_bundles,
+                           iter_completed_downloads, touch_bundle, write_bundle)
 
-    .pdf-name {
-        font-family: 'Poppins', sans-serif;
-        font-weight: 500;
-        font-size: 15px;
-        color: #ffffff;
-        text-align: center;
-        margin-bottom: 8px;
-        line-height: 1.3;
-        min-height: 40px;
-        word-wrap: break-word;
-        overflow-wrap: break-word;
-    }
-    
-    h1 {
-        font-family: 'Barlow Condensed', sans-serif;
-        font-weight: 700;
-        color: #ffffff;
-        text-align: center;
-        margin-bottom: 2rem;
-        font-size: 3rem;
-        letter-spacing: 2px;
-    }
-    
-    @media (max-width: 768px) {
-        .main {
-            padding: 0.3rem;
-        }
-        h1 {
-            font-size: 1.8rem;
-        }
-        .pdf-tile {
-            margin: 4px 0;
-            padding: 10px;
-        }
-        /* Mobile title - bigger font */
-        .vault-title {
-            font-size: 2rem !important;
-            letter-spacing: 1px !important;
-            margin-bottom: 0.1rem !important;
-            margin-top: 0 !important;
-        }
-        .vault-subtitle {
-            font-size: 0.75rem !important;
-            margin-bottom: 0 !important;
-        }
-        .title-container {
-            margin-bottom: 0.4rem !important;
-            margin-top: 0 !important;
-            padding-top: 0 !important;
-        }
-        /* Smaller PDF icon on mobile */
-        .pdf-icon {
-        .pdf-icon {
-            width: 40px;
-            height: 40px;
-            margin-bottom: 8px;
-        }
-        .pdf-icon svg {
-            width: 40px;
-            height: 40px;
-        }
-        /* Smaller filename text on mobile */
-        .pdf-name {
-            font-size: 12px;
-            min-height: 30px;
-            margin-bottom: 4px;
-        }
-        /* Welcome text smaller on mobile */
-        .welcome-text {
-            padding: 1rem 0.5rem !important;
-        }
-        .welcome-text h2 {
-            font-size: 1.3rem !important;
-        }
-        .welcome-text p {
-            font-size: 0.9rem !important;
-            margin-bottom: 1rem !important;
-        }
-        /* No results text smaller */
-        .no-results {
-            padding: 1rem 0.5rem !important;
-        }
-        .no-results h2 {
-            font-size: 1.3rem !important;
-        }
-        .no-results p {
-            font-size: 0.9rem !important;
-        }
-        /* Reduce button font size */
-        .stButton>button {
-            font-size: 13px;
-            padding: 8px 12px;
-        }
-        /* Search input smaller */
-        .stTextInput>div>div>input {
-            font-size: 14px;
-            padding: 8px;
-        }
-        /* Reduce column gaps */
-        .stColumns {
-            gap: 0.3rem !important;
-        }
-        /* Match score badge smaller */
-        .match-badge {
-            font-size: 10px !important;
-            padding: 2px 6px !important;
-        }
-    }
-    
-    /* Space for fixed social bar at bottom */
-    .main .block-container {
-        padding-bottom: 70px !important;
-    }
-    
-    /* Reduce top padding on mobile */
-    @media (max-width: 768px) {
-        .main .block-container {
-            padding-top: 1rem !important;
-        }
-        .main {
-            padding-top: 0 !important;
-        }
-        /* Remove Streamlit default header */
-        .stApp > header,
-        [data-testid="stHeader"] {
-            display: none !important;
-        }
-        .stApp {
-            padding-top: 0 !important;
-        }
-        [data-testid="stAppViewContainer"] {
-            padding-top: 0 !important;
-        }
-        section.main {
-            padding-top: 0 !important;
-        }
-        .block-container {
-            padding-top: 1rem !important;
-        }
-    }
-    </style>
-    
-    <!-- Social Bar Ad - Fixed at bottom of viewport -->
-    <script>
-    (function() {
-        if (document.getElementById('fixed-social-bar-container')) return;
-        var container = document.createElement('div');
-        container.id = 'fixed-social-bar-container';
-        container.style.cssText = 'position: fixed; bottom: 0; left: 0; width: 100%; z-index: 999999; text-align: center; background: rgba(9, 38, 46, 0.95); padding: 5px 0; box-shadow: 0 -2px 10px rgba(0,0,0,0.3);';
-        var script = document.createElement('script');
-        script.src = 'https://levitydinerdowny.com/f3/2b/9c/f32b9c36b68689794113c5a42fa355c8.js';
-        container.appendChild(script);
-        document.body.appendChild(container);
-    })();
-    </script>
-    """, unsafe_allow_html=True)
 
 
 @st.cache_data(ttl=3600)
@@ -305,7 +102,7 @@ def load_master_index():
             col_lower = col.lower().strip()
             if 'file' in col_lower and 'name' in col_lower:
                 column_mapping[col] = 'File Name'
-            elif 'file' in col_lower and 'id' in col_lower:
+            elif 'file' in col_lower and 'id' in col_lower and 'unique' not in col_lower:
                 column_mapping[col] = 'File ID'
         
         if column_mapping:
@@ -317,7 +114,8 @@ def load_master_index():
         if 'File ID' not in df.columns and len(df.columns) >= 2:
             df = df.rename(columns={df.columns[1]: 'File ID'})
         
-        return df
+        # Hide papers whose File ID health_check.py found dead; flat buffers for large catalogs
+        return compact_frame(visible_rows(df))
     except FileNotFoundError:
         st.error("❌ master_index.csv file not found!")
         return pd.DataFrame()
@@ -326,239 +124,432 @@ def load_master_index():
         return pd.DataFrame()
 
 
-def normalize_text(text):
-    """Normalize text for better matching."""
-    if not text:
-        return ""
-    text = str(text).lower()
-    # Normalize exam levels
-    text = re.sub(r'\ba/l\b', 'al', text, flags=re.IGNORECASE)
-    text = re.sub(r'\ba\s*l\b', 'al', text, flags=re.IGNORECASE)
-    text = re.sub(r'\badvanced?\s+level\b', 'al', text, flags=re.IGNORECASE)
-    text = re.sub(r'\bo/l\b', 'ol', text, flags=re.IGNORECASE)
-    text = re.sub(r'\bo\s*l\b', 'ol', text, flags=re.IGNORECASE)
-    text = re.sub(r'\bordinary\s+level\b', 'ol', text, flags=re.IGNORECASE)
-    # Replace separators with spaces
-    text = re.sub(r'[_\-\.,;:()\[\]{}]', ' ', text)
-    # Normalize multiple spaces
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
-
-
-def fuzzy_search(query, df, limit=50):
-    """Perform intelligent hierarchical search with strict subject filtering.
-    
-    Query Pattern: {year} {exam type} {Subject} {pastpaper/marking} {medium}
-    
-    Search Strategy:
-    1. FILTER by subject (MANDATORY - if no match, return empty for "content uploading" message)
-    2. SORT by year (exact match first, then by proximity)
-    3. SORT by document type (marking/paper based on query)
-    4. SORT by medium (exact match first)
+@st.cache_resource
+def get_shared_index():
+    """Process-wide handle on the index published by shared_index.py."""
+    return SharedIndex()
+
+
+@st.cache_resource
+def get_content_index():
+    """Load the full-text index built by content_index.py (None if not built yet)."""
+    return load_content_index()
+
+
+@st.cache_resource(ttl=3600)
+def get_facet_index(_df, index_version):
+    """Build facet bitmaps once per index version (``_df`` is not hashed)."""
+    return FacetIndex.build(_df['File Name'].astype(str).tolist())
+
+
+@st.cache_resource(ttl=3600)
+def get_filename_index(_df, index_version):
+    """Build the BM25 filename matrix once per index version (``_df`` is not hashed)."""
+    snapshot = get_shared_index().current()
+    if snapshot is not None and snapshot.version == index_version:
+        return snapshot.filename_index  # Already built by the publisher, mapped zero-copy
+    return build_filename_index(_df)
+
+
+@st.cache_resource(ttl=3600)
+def get_permalinks(_df, index_version):
+    """Short ID -> row map for ?id= links, once per index version (``_df`` is not hashed)."""
+    return PermalinkIndex.build(_df)
+
+
+@st.cache_resource(ttl=3600)
+def get_trigram_index(_df, index_version):
+    """Build the filename trigram index once per index version (``_df`` is not hashed)."""
+    return TrigramIndex.build(_df.index.tolist(), _df['File Name'].astype(str).tolist())
+
+
+@st.cache_resource(ttl=3600)
+def get_file_terms(_df, index_version):
+    """Canonical subject/medium/level ids per file, once per index version (``_df`` is not hashed)."""
+    return build_file_terms(_df)
+
+
+@st.cache_resource(ttl=3600)
+def get_search_engine(_df, index_version):
+    """Worker-process search pool for large catalogs, None for small ones (``_df`` is not hashed)."""
+    if len(_df) < SHARDED_SEARCH_MIN_FILES:
+        return None
+    return ShardedSearchEngine(
+        _df,
+        filename_index=get_filename_index(_df, index_version),
+        content_index=get_content_index()
+    )
+
+
+@st.cache_data(ttl=3600, max_entries=256)
+def cached_search(query_key, filter_key, index_version, _df, _search_df):
+    """Search results keyed by the canonical query, so "chem 2024" and "2024 chemistry" share an entry."""
+    engine = get_search_engine(_df, index_version)
+    if engine is not None:
+        return engine.search(query_key, limit=30, labels=_search_df.index if filter_key else None)
+    return fuzzy_search(
+        query_key,
+        _search_df,
+        limit=30,
+        content_index=get_content_index(),
+        filename_index=get_filename_index(_df, index_version),
+        trigram_index=get_trigram_index(_df, index_version),
+        file_terms=get_file_terms(_df, index_version)
+    )
+
+
+@st.cache_resource
+def get_event_log():
+    """Process-wide search/download log, flushed by a background thread."""
+    return EventLog()
+
+
+def search_filter_key(filters):
+    return tuple((facet, tuple(selected)) for facet, selected in sorted(filters.items()))
+
+
+@st.cache_resource(ttl=3600)
+def warm_caches(_df, _facet_index, index_version, _fetch_file):
+    """Replay the most frequent recent searches and downloads once per index version.
+
+    Searches fill cached_search before the first visitor asks; downloads run on
+    a background thread and land in the on-disk PDF cache, whose popularity
+    sketch is seeded from the same log on the process's first warm-up (and
+    the hottest papers pinned if PDF_CACHE_PIN_TOP is set). ``_fetch_file``
+    must not count requests (record=False), or every replay would add to
+    the counts just seeded.
     """
-    if df.empty or query.strip() == "":
-        return pd.DataFrame()
-    
-    # Find the file name column
-    file_name_col = None
-    for col in df.columns:
-        if 'file' in col.lower() and 'name' in col.lower():
-            file_name_col = col
-            break
-    
-    if file_name_col is None:
-        file_name_col = df.columns[0]
-    
-    query_lower = normalize_text(query)
-    query_words = set(query_lower.split())
-    
-    # Extract year patterns from query
-    query_years = set(re.findall(r'\b(19\d{2}|20\d{2})\b', query))
-    
-    # Define categories with priority weights
-    # Include common abbreviations and full names
-    subjects = [
-        'physics', 'chemistry', 'chem', 'biology', 'bio', 'mathematics', 'maths', 'math',
-        'combined', 'commerce', 'history', 'geography', 'geo', 'economics', 'econ',
-        'accounting', 'accounts', 'science', 'ict', 'technology', 'buddhism', 'hinduism',
-        'islam', 'christianity', 'art', 'music', 'drama', 'dancing', 'agriculture', 'agri',
-        'business', 'botany', 'zoology', 'logic', 'statistics', 'stats', 'political',
-        'sft', 'git', 'egt', 'bst', 'est',  # Common subject codes
-        'general', 'knowledge', 'gk'  # General knowledge
-    ]
-    mediums = ['sinhala', 'tamil', 'english']
-    levels = ['al', 'ol', 'grade', 'a/l', 'o/l']
-    doc_types = ['marking', 'scheme', 'paper', 'pastpaper', 'past', 'mcq', 'essay']
-    
-    # Extract query components
-    query_subjects = set([word for word in query_words if word in subjects])
-    query_mediums = set([word for word in query_words if word in mediums])
-    query_levels = set([word for word in query_words if word in levels])
-    query_doc_types = set([word for word in query_words if word in doc_types])
-    
-    # STEP 1: STRICT SUBJECT FILTERING
-    # If query has a subject, ONLY keep files that CONTAIN that exact subject
-    # FALLBACK: If no subject matches found, show files matching exam level (A/L, O/L)
-    filtered_results = []
-    fallback_results = []
-    
-    for idx, row in df.iterrows():
-        filename = str(row[file_name_col])
-        filename_lower = normalize_text(filename)
-        filename_words = set(filename_lower.split())
-        
-        # Extract components from filename
-        file_years = set(re.findall(r'\b(19\d{2}|20\d{2})\b', filename_lower))
-        file_subjects = set([word for word in filename_words if word in subjects])
-        file_mediums = set([word for word in filename_words if word in mediums])
-        file_doc_types = set([word for word in filename_words if word in doc_types])
-        file_levels = set([word for word in filename_words if word in levels])
-        
-        # MANDATORY SUBJECT CHECK - STRICT MODE
-        if query_subjects:
-            # Check if file contains the queried subject
-            has_matching_subject = bool(query_subjects & file_subjects)
-            
-            if has_matching_subject:
-                pass  # Will add to filtered_results below
-            else:
-                # NOT matching subject - add to fallback only if level matches
-                if query_levels and file_levels and (query_levels & file_levels):
-                    fallback_results.append({
-                        'index': idx,
-                        'filename': filename,
-                        'year_match': 9999,
-                        'doc_type_match': 1,
-                        'medium_match': 1,
-                        'word_match': 0
-                    })
-                continue  # Skip to next file - DO NOT add to filtered_results
-        
-        # Calculate sorting keys for hierarchical sort
-        
-        # Sort Key 1: Year Match (0 = perfect, higher = worse)
-        year_match_score = 9999  # Default: no year
-        if query_years and file_years:
-            query_year = int(list(query_years)[0])
-            closest_file_year = min(file_years, key=lambda y: abs(int(y) - query_year))
-            year_match_score = abs(int(closest_file_year) - query_year)
-        elif query_years and not file_years:
-            year_match_score = 9998  # Has query year but file doesn't - lower priority
-        elif not query_years and file_years:
-            year_match_score = 100  # No query year but file has year - decent priority
-        
-        # Sort Key 2: Document Type Match (0 = perfect match, 1 = no match)
-        doc_type_match = 1 if query_doc_types else 0
-        if query_doc_types and file_doc_types:
-            doc_type_match = 0 if (query_doc_types & file_doc_types) else 1
-        
-        # Sort Key 3: Medium Match (0 = perfect match, 1 = no match)
-        medium_match = 1 if query_mediums else 0
-        if query_mediums and file_mediums:
-            medium_match = 0 if (query_mediums & file_mediums) else 1
-        
-        # Sort Key 4: Overall relevance (word matches)
-        common_words = query_words & filename_words
-        word_match_count = -len(common_words)  # Negative for descending sort
-        
-        result_entry = {
-            'index': idx,
-            'filename': filename,
-            'year_match': year_match_score,
-            'doc_type_match': doc_type_match,
-            'medium_match': medium_match,
-            'word_match': word_match_count
-        }
-        
-        # Add to filtered_results (only reaches here if subject matched or no subject in query)
-        filtered_results.append(result_entry)
-    
-    # Use fallback only if no subject matches found
-    if not filtered_results and fallback_results:
-        filtered_results = fallback_results
-    
-    # STEP 2: HIERARCHICAL SORT
-    # Sort by: Year (ascending) → Doc Type (ascending) → Medium (ascending) → Word matches (descending)
-    filtered_results.sort(key=lambda x: (x['year_match'], x['doc_type_match'], x['medium_match'], x['word_match']))
-    
-    # Limit results
-    top_results = filtered_results[:limit]
-    
-    if not top_results:
-        return pd.DataFrame()
-    
-    # Get corresponding rows
-    top_indices = [r['index'] for r in top_results]
-    results = df.loc[top_indices].copy()
-    
-    # Calculate match percentage for display
-    match_scores = []
-    for r in top_results:
-        # Perfect match = 100%, decreases with year diff, doc type, medium mismatch
-        score = 100.0
-        
-        # Year penalty: -5% per year difference
-        if r['year_match'] < 9990:
-            score -= min(r['year_match'] * 5, 50)
-        
-        # Doc type penalty: -10% if mismatch
-        if r['doc_type_match'] == 1:
-            score -= 10
-        
-        # Medium penalty: -15% if mismatch
-        if r['medium_match'] == 1:
-            score -= 15
-        
-        match_scores.append(max(score, 10.0))  # Minimum 10%
-    
-    results['Match Score'] = match_scores
-    
-    # Preserve the sort order (already sorted hierarchically)
-    results = results.reset_index(drop=True)
-    
-    return results
+    events = read_recent()
+    for query_key, filters, _ in top_searches(events, REPLAY_SEARCHES):
+        filters = {facet: selected for facet, selected in filters.items() if facet in FACETS}
+        search_df = _df.iloc[_facet_index.rows(_facet_index.select(filters))] if filters else _df
+        cached_search(query_key, search_filter_key(filters), index_version, _df, search_df)
+
+    downloads = top_downloads(events, None)
+    default_downloader.cache.seed(downloads)  # First warm-up of the process only
+    if PDF_CACHE_PIN_TOP:
+        default_downloader.cache.pin(file_id for file_id, _ in downloads[:PDF_CACHE_PIN_TOP])
+    file_ids = [file_id for file_id, _ in downloads[:REPLAY_DOWNLOADS]]
+    if file_ids:
+        def fetch_all():
+            for _ in iter_completed_downloads([(fid, fid) for fid in file_ids], _fetch_file, max_workers=4):
+                pass
+        threading.Thread(target=fetch_all, name="download-warmup", daemon=True).start()
+    return len(file_ids)
+
+
+@st.cache_resource(ttl=3600)
+def start_warm_up(_df, index_version, _fetch_file):
+    """Run warm_caches on a background thread as soon as the process has its index (LAZY_STARTUP).
+
+    The replay still starts before most traffic arrives, but no visitor's
+    script run waits for it.
+    """
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+    thread = threading.Thread(
+        target=lambda: warm_caches(_df, get_facet_index(_df, index_version), index_version, _fetch_file),
+        name="cache-warmup", daemon=True)
+    add_script_run_ctx(thread, get_script_run_ctx())  # Cached functions expect a script context
+    thread.start()
+    return thread
+
+
+def read_facet_params(facet_index):
+    """Parse facet filters from URL query params (?subject=chemistry&year=2019-2023)."""
+    filters = {}
+    for facet in FACETS:
+        raw = st.query_params.get(facet, "")
+        if not raw:
+            continue
+        if facet == 'year':
+            year_range = parse_year_range(raw)
+            if year_range:
+                filters['year'] = year_range
+            continue
+        values = [v.strip().lower() for v in raw.split(',') if v.strip()]
+        if facet in TAXONOMY:
+            values = [TAXONOMY[facet].get(v, v) for v in values]  # ?subject=chem -> chemistry
+        if facet == 'grade':
+            values = [int(v) for v in values if v.isdigit()]
+        values = [v for v in values if v in facet_index.bitmaps[facet]]
+        if values:
+            filters[facet] = values
+    return filters
+
+
+def render_facet_filters(facet_index):
+    """Facet filter panel with live counts, kept in sync with the URL query params."""
+    year_bounds = facet_index.year_bounds()
+
+    # Seed widget state from the URL on first load
+    if 'facets_initialized' not in st.session_state:
+        url_filters = read_facet_params(facet_index)
+        for facet, selected in url_filters.items():
+            if facet != 'year':
+                st.session_state[f"facet_{facet}"] = selected
+        year_initial = url_filters.get('year')
+        if year_initial and year_bounds:
+            year_initial = (max(year_initial[0], year_bounds[0]), min(year_initial[1], year_bounds[1]))
+            if year_initial[0] > year_initial[1]:
+                year_initial = None
+        st.session_state.facet_year_initial = year_initial
+        st.session_state.facets_initialized = True
+    year_initial = st.session_state.facet_year_initial or year_bounds
+
+    filters = {}
+    for facet in FACETS:
+        if facet == 'year':
+            selected = st.session_state.get("facet_year", year_initial)
+            # Full range selected = no year filter
+            if selected and tuple(selected) != year_bounds:
+                filters['year'] = tuple(selected)
+        elif st.session_state.get(f"facet_{facet}"):
+            filters[facet] = st.session_state[f"facet_{facet}"]
+
+    counts = facet_index.counts(filters)
+
+    with st.expander("🎛️ Filters", expanded=bool(filters)):
+        filter_cols = st.columns(3)
+        list_facets = [facet for facet in FACETS if facet != 'year']
+        for i, facet in enumerate(list_facets):
+            options = facet_index.values(facet)
+            if not options:
+                continue
+            with filter_cols[i % 3]:
+                st.multiselect(
+                    FACET_LABELS[facet],
+                    options=options,
+                    format_func=lambda v, facet=facet: f"{v} ({counts[facet].get(v, 0)})",
+                    key=f"facet_{facet}"
+                )
+        if year_bounds and year_bounds[0] < year_bounds[1]:
+            st.select_slider(
+                FACET_LABELS['year'],
+                options=list(range(year_bounds[0], year_bounds[1] + 1)),
+                value=year_initial,
+                key="facet_year"
+            )
+
+    # Mirror the active filters into the URL so filtered views can be shared
+    for facet in FACETS:
+        if facet == 'year':
+            value = f"{filters['year'][0]}-{filters['year'][1]}" if 'year' in filters else None
+        else:
+            value = ",".join(str(v) for v in filters.get(facet, [])) or None
+        if value:
+            st.query_params[facet] = value
+        elif facet in st.query_params:
+            del st.query_params[facet]
+
+    return filters
+
+
+@st.cache_resource
+def get_mirror():
+    """Local PDF mirror built by mirror.py (empty until the job has run)."""
+    return MirrorStore()
 
 
-def get_telegram_file_content(file_id, bot_token):
-    """Download file content from Telegram and return bytes."""
+def serve_from_mirror():
+    """True when downloads must never go to Telegram (SERVE_FROM_MIRROR secret or env var)."""
+    value = os.environ.get("SERVE_FROM_MIRROR")
+    if value is None:
+        try:
+            value = st.secrets.get("SERVE_FROM_MIRROR", False)
+        except Exception:
+            value = False
+    return str(value).strip().lower() in ("1", "true", "yes")
+
+
+@st.cache_resource(ttl=3600)
+def get_source_router(_df, index_version, bot_token):
+    """Which channel's bot downloads each paper, once per index version (``_df`` is not hashed)."""
     try:
-        # Validate inputs
-        if not bot_token:
-            return None, "❌ Telegram Bot Token not configured."
-        
-        file_id_str = str(file_id).strip()
-        if not file_id_str:
-            return None, "❌ Invalid file ID: File ID is empty."
-        
-        # Get file path from Telegram
-        api_url = f"https://api.telegram.org/bot{bot_token}/getFile"
-        params = {"file_id": file_id_str}
-        
-        response = requests.get(api_url, params=params, timeout=10)
-        result = response.json()
-        
-        if not result.get("ok"):
-            error_description = result.get("description", "Unknown error")
-            error_code = result.get("error_code", "N/A")
-            return None, f"❌ Telegram API error ({error_code}): {error_description}"
-        
-        file_path = result["result"]["file_path"]
-        
-        # Download the file content
-        download_url = f"https://api.telegram.org/file/bot{bot_token}/{file_path}"
-        file_response = requests.get(download_url, timeout=30)
-        file_response.raise_for_status()
-        
-        return file_response.content, None
-    
-    except requests.exceptions.Timeout:
-        return None, "❌ Request timed out. Please try again."
-    except requests.exceptions.RequestException as e:
-        return None, f"❌ Network error: {str(e)}"
-    except KeyError as e:
-        return None, f"❌ Unexpected API response format: {str(e)}"
-    except Exception as e:
-        return None, f"❌ Error downloading file: {str(e)}"
+        registry = st.secrets.get("sources", {})
+    except Exception:
+        registry = {}
+    sources = parse_sources(registry, bot_token, get_mtproto_config())
+    return SourceRouter(sources, _df, default_bot_token=bot_token)
+
+
+def get_file_fetcher(bot_token, mtproto_config, router=None, record=True):
+    """``fetch(file_id) -> (content, error)``: local mirror first, then Telegram unless mirror-only.
+
+    ``router`` sends papers from partner channels through their own bot.
+    ``record=False`` leaves the PDF cache's popularity counts alone (replays).
+    """
+    mirror = get_mirror()
+    if serve_from_mirror():
+        return lambda file_id: mirror.fetch(file_id)
+    return lambda file_id: mirror.fetch(
+        file_id, lambda fid: get_telegram_file_content(
+            fid, bot_token, mtproto_config, source=router.source_for(fid) if router is not None else None,
+            record=record))
+
+
+def get_mtproto_config():
+    """Read the optional MTProto credentials used for files over 20 MB."""
+    try:
+        api_id = st.secrets.get("TELEGRAM_API_ID")
+        api_hash = st.secrets.get("TELEGRAM_API_HASH")
+    except Exception:
+        return None
+    if not api_id or not api_hash:
+        return None
+    return {
+        "api_id": api_id,
+        "api_hash": api_hash,
+        "session": st.secrets.get("TELEGRAM_BOT_SESSION", "bot_session"),
+        "workers": int(st.secrets.get("TELEGRAM_DOWNLOAD_WORKERS", 4))
+    }
+
+
+def render_bulk_download(results, file_name_col, file_id_col, fetch_file):
+    """Offer the whole result set as one ZIP, fetched concurrently and streamed to disk."""
+    entries = []
+    for _, row in results.iterrows():
+        cleaned = sanitize_filename(str(row[file_name_col]))
+        filename = cleaned if cleaned.lower().endswith('.pdf') else f"{cleaned}.pdf"
+        entries.append((str(row[file_id_col]), filename))
+
+    name = bundle_name(st.session_state.search_query, [file_id for file_id, _ in entries])
+    bundle_path = os.path.join(BUNDLE_DIR, name)
+    slug = re.sub(r'[^a-z0-9]+', '_', st.session_state.search_query.lower()).strip('_') or 'papers'
+
+    def show_links():
+        # A shown link keeps its bundle from being cleaned up while someone may still click it
+        touch_bundle(bundle_path)
+        parts = bundle_parts(bundle_path)
+        if len(parts) > 1:
+            st.info(f"📦 These papers are over {BUNDLE_MAX_BYTES // 2 ** 20} MB together, so they come in {len(parts)} ZIPs.")
+        links = []
+        for number, part in enumerate(parts, 1):
+            label = f"⬇️ Download ZIP ({len(entries)} papers)" if len(parts) == 1 else f"⬇️ ZIP {number} of {len(parts)}"
+            download = f"{slug}.zip" if len(parts) == 1 else f"{slug}_{number}.zip"
+            links.append(f"""<a href="{BUNDLE_URL_PREFIX}/{os.path.basename(part)}" download="{html.escape(download)}" style="background-color: #db463b; color: #ffffff; padding: 0.6rem 1.4rem; border-radius: 8px; font-family: 'Poppins', sans-serif; font-weight: 600; text-decoration: none; display: inline-block; margin: 0.25rem;">{label}</a>""")
+        links_html = "".join(links)
+        st.markdown(f"""
+    <div style="text-align: center; margin: 0.5rem 0 1rem 0;">
+        {links_html}
+    </div>
+    """, unsafe_allow_html=True)
+
+    # Snapshot the session cache: worker threads cannot touch st.session_state
+    session_cache = dict(st.session_state.download_cache)
+
+    def fetch(file_id):
+        cached = session_cache.get(f"file_content_{file_id}")
+        if cached and cached[0] is not None:
+            return cached
+        return fetch_file(file_id)
+
+    if os.path.exists(bundle_path):
+        show_links()
+        return
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        if st.button(f"📦 Download all {len(entries)} results (ZIP)", key="bulk_zip_btn", use_container_width=True):
+            cleanup_bundles()
+            progress_bar = st.progress(0.0, text="📦 Collecting your papers...")
+            failed = write_bundle(
+                entries,
+                fetch,
+                bundle_path,
+                progress=lambda done, total: progress_bar.progress(done / total, text=f"📦 {done}/{total} papers ready")
+            )
+            progress_bar.empty()
+            if failed:
+                st.warning(f"⚠️ {len(failed)} papers could not be downloaded; they are listed in MISSING.txt inside the ZIP.")
+            show_links()
+
+
+def streamlit_media_contents():
+    """Content of every file in Streamlit's in-memory media storage (download buttons)."""
+    from streamlit import runtime
+
+    if not runtime.exists():
+        return []
+    storage = runtime.get_instance().media_file_mgr._storage
+    return [media_file.content for media_file in list(getattr(storage, '_files_by_id', {}).values())]
+
+
+@st.cache_resource
+def get_memory_governor():
+    """Process-wide budget for the PDFs held in every session's download cache."""
+    return MemoryGovernor(media_contents=streamlit_media_contents)
+
+
+def render_download(file_id, cleaned, fetch_file, event_log, key, autostart=False):
+    """Prepare/Download buttons for one paper, backed by the session's download cache.
+
+    With ``autostart`` the paper is fetched right away instead of waiting for a click.
+    """
+    cache_key = f"file_content_{file_id}"
+
+    def prepare():
+        with st.spinner("⏳ Preparing your download... Please wait"):
+            start = time.perf_counter()
+            file_content, error = fetch_file(file_id)
+            event_log.record("download", file_id=file_id, ok=error is None,
+                             ms=round((time.perf_counter() - start) * 1000))
+            st.session_state.download_cache[cache_key] = (file_content, error)
+
+    if autostart and cache_key not in st.session_state.download_cache:
+        prepare()
+
+    # May have been evicted by the memory governor since the last rerun
+    cached = st.session_state.download_cache.get(cache_key)
+    if cached is not None:
+        # File already downloaded, show download button
+        file_content, error = cached
+        if error:
+            st.error(error)
+        else:
+            filename = cleaned if cleaned.lower().endswith('.pdf') else f"{cleaned}.pdf"
+            st.download_button(
+                label="⬇️ Download PDF",
+                data=file_content,
+                file_name=filename,
+                mime="application/pdf",
+                use_container_width=True,
+                key=f"download_{key}"
+            )
+    else:
+        # Prepare download button
+        if st.button("📥 Prepare Download", key=f"prepare_{key}", use_container_width=True):
+            prepare()
+            st.rerun()
+
+
+def tile_icon_html(file_id):
+    """First-page thumbnail once thumbnails.py has made one, else the PDF icon."""
+    thumb = thumbnail_url(file_id)
+    if thumb:
+        return f'<div class="pdf-icon pdf-thumb"><img src="{thumb}" loading="lazy" decoding="async" alt=""></div>'
+    return f'<div class="pdf-icon">{get_pdf_icon_svg()}</div>'
+
+
+def render_paper(row, short_id, fetch_file, event_log, autostart=False):
+    """Single-paper view for a ?id= permalink."""
+    file_id = str(row['File ID'])
+    cleaned = sanitize_filename(str(row['File Name']))
+    display_name = html.escape(cleaned.replace('_', ' ').replace('-', ' '))
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        st.markdown(f"""
+        <div class="pdf-tile">
+            {tile_icon_html(file_id)}
+            <div class="pdf-name">{display_name}</div>
+        </div>
+        """, unsafe_allow_html=True)
+        render_download(file_id, cleaned, fetch_file, event_log, key=f"paper_{short_id}", autostart=autostart)
+        st.markdown("""
+        <div style="text-align: center; margin-top: 1rem;">
+            <a href="?" target="_self" style="color: #db463b; font-family: 'Poppins', sans-serif; text-decoration: none;">🔍 Search all past papers</a>
+        </div>
+        """, unsafe_allow_html=True)
 
 
 def main():
@@ -566,120 +557,33 @@ def main():
     if 'search_query' not in st.session_state:
         st.session_state.search_query = ""
     if 'download_cache' not in st.session_state:
-        st.session_state.download_cache = {}
-    if 'data_loaded' not in st.session_state:
-        st.session_state.data_loaded = False
-    
-    # Show loading screen while data loads
-    loading_placeholder = st.empty()
-    
-    if not st.session_state.data_loaded:
-        with loading_placeholder.container():
-            st.markdown("""
-            <style>
-            .loading-container {
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-                justify-content: center;
-                min-height: 60vh;
-                text-align: center;
-            }
-            .loading-icon {
-                font-size: 4rem;
-                animation: bounce 1s ease-in-out infinite;
-            }
-            .loading-text {
-                font-family: 'Barlow Condensed', sans-serif;
-                font-size: 1.8rem;
-                color: #ffffff;
-                margin-top: 1rem;
-                letter-spacing: 2px;
-            }
-            .loading-subtext {
-                font-family: 'Poppins', sans-serif;
-                font-size: 1rem;
-                color: #db463b;
-                margin-top: 0.5rem;
-                opacity: 0.9;
-            }
-            .loading-dots {
-                display: inline-block;
-            }
-            .loading-dots::after {
-                content: '';
-                animation: dots 1.5s steps(4, end) infinite;
-            }
-            @keyframes bounce {
-                0%, 100% { transform: translateY(0); }
-                50% { transform: translateY(-15px); }
-            }
-            @keyframes dots {
-                0% { content: ''; }
-                25% { content: '.'; }
-                50% { content: '..'; }
-                75% { content: '...'; }
-                100% { content: ''; }
-            }
-            .loading-spinner {
-                width: 50px;
-                height: 50px;
-                border: 4px solid rgba(219, 70, 59, 0.3);
-                border-top: 4px solid #db463b;
-                border-radius: 50%;
-                animation: spin 1s linear infinite;
-                margin: 1.5rem auto;
-            }
-            @keyframes spin {
-                0% { transform: rotate(0deg); }
-                100% { transform: rotate(360deg); }
-            }
-            </style>
-            <div class="loading-container">
-                <div class="loading-icon">📚</div>
-                <div class="loading-text">Loading Your PDFs<span class="loading-dots"></span></div>
-                <div class="loading-spinner"></div>
-                <div class="loading-subtext">Preparing thousands of past papers for you</div>
-            </div>
-            """, unsafe_allow_html=True)
+        st.session_state.download_cache = get_memory_governor().new_cache()
     
     # Title
-    st.markdown("""
-    <div class="title-container" style="text-align: center; margin-bottom: 0.8rem;">
-        <h1 class="vault-title" style="font-family: 'Barlow Condensed', sans-serif; font-weight: 700; color: #ffffff; font-size: 3rem; letter-spacing: 3px; margin-bottom: 0.3rem;">📚 PAST PAPER VAULT</h1>
-        <p class="vault-subtitle" style="font-family: 'Poppins', sans-serif; color: #db463b; font-size: 0.85rem; font-weight: 400; letter-spacing: 1px; margin-top: 0;">powered by <strong>Examlanka.lk</strong></p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(TITLE_HTML, unsafe_allow_html=True)
     
     # Native Banner Ad
-    import streamlit.components.v1 as components
-    components.html("""
-    <div style="text-align: center; margin: 0.3rem auto; max-width: 100%;">
-        <script>
-          atOptions = {
-            'key' : '8147f01382ece9e1740ef1187319a8b7',
-            'format' : 'iframe',
-            'height' : 90,
-            'width' : 728,
-            'params' : {}
-          };
-        </script>
-        <script src="https://levitydinerdowny.com/8147f01382ece9e1740ef1187319a8b7/invoke.js"></script>
-    </div>
-    """, height=95)
+    components.html(BANNER_AD_HTML, height=95)
     
-    # Check for bot token
+    # Check for bot token (not needed when serving only from the local mirror)
+    mirror_only = serve_from_mirror()
     try:
         bot_token = st.secrets.get("TELEGRAM_BOT_TOKEN")
-        if not bot_token:
+        if not bot_token and not mirror_only:
             st.error("❌ Telegram Bot Token not configured. Please add it to .streamlit/secrets.toml")
             st.stop()
     except Exception as e:
-        st.error(f"❌ Error accessing secrets: {str(e)}")
-        st.stop()
+        if not mirror_only:
+            st.error(f"❌ Error accessing secrets: {str(e)}")
+            st.stop()
+        bot_token = None
+    mtproto_config = get_mtproto_config()
     
-    # Load data
-    df = load_master_index()
+    # Load data: the shared memory-mapped index if one is published, else the CSV
+    snapshot = get_shared_index().current()
+    if snapshot is not None and snapshot.is_stale('master_index.csv'):
+        snapshot = None  # CSV edited since the last publish
+    df = snapshot.df if snapshot is not None else load_master_index()
     
     # Clear loading screen once data is loaded
     if not st.session_state.data_loaded:
@@ -690,8 +594,31 @@ def main():
         st.warning("⚠️ No data available. Please ensure master_index.csv is present.")
         return
     
+    index_version = snapshot.version if snapshot is not None else os.path.getmtime('master_index.csv')
+    event_log = get_event_log()
+    router = get_source_router(df, index_version, bot_token)
+    fetch_file = get_file_fetcher(bot_token, mtproto_config, router)
+    # Replayed downloads were counted when the popularity sketch was seeded
+    replay_fetch = get_file_fetcher(bot_token, mtproto_config, router, record=False)
+    if LAZY_STARTUP:
+        start_warm_up(df, index_version, replay_fetch)
+    else:
+        get_permalinks(df, index_version)
+        warm_caches(df, get_facet_index(df, index_version), index_version, replay_fetch)
+
     # Get query parameter from URL
     query_params = st.query_params
+
+    # ?id=<short-id> opens one paper directly, without searching
+    paper_id = query_params.get("id", "")
+    if paper_id:
+        position = get_permalinks(df, index_version).resolve(paper_id)
+        if position is not None:
+            render_paper(df.iloc[position], paper_id, fetch_file, event_log,
+                         autostart=query_params.get("download") == "1")
+            return
+        st.warning("⚠️ This paper link is no longer valid. Please search for the paper instead.")
+
     url_query = query_params.get("q", "")
     if url_query:
         url_query = urllib.parse.unquote_plus(url_query)
@@ -720,12 +647,31 @@ def main():
     # Handle search
     if search_button or search_query != st.session_state.search_query:
         st.session_state.search_query = search_query
-        st.session_state.download_cache = {}  # Clear download cache on new search
+        st.session_state.download_cache.clear()  # Clear download cache on new search
+    
+    # Facet filters narrow the catalog before searching
+    facet_index = get_facet_index(df, index_version)
+    filters = render_facet_filters(facet_index)
+    search_df = df.iloc[facet_index.rows(facet_index.select(filters))] if filters else df
     
     # Display results
-    if st.session_state.search_query:
+    if st.session_state.search_query or filters:
         with st.spinner('🔍 Searching for your past papers... Please wait'):
-            results = fuzzy_search(st.session_state.search_query, df, limit=30)
+            if st.session_state.search_query:
+                query_key = canonical_query(st.session_state.search_query)
+                filter_key = search_filter_key(filters)
+                results = cached_search(query_key, filter_key, index_version, df, search_df)
+                # Log each search once per session, not on every rerun
+                if st.session_state.get('logged_search') != (query_key, filter_key):
+                    st.session_state.logged_search = (query_key, filter_key)
+                    event_log.record("search", query=st.session_state.search_query, key=query_key,
+                                     filters={facet: list(selected) for facet, selected in filters.items()},
+                                     results=len(results))
+            else:
+                # Filters only: list the matching papers
+                results = search_df.head(30).copy()
+                results['Match Score'] = 100.0
+                results = results.reset_index(drop=True)
 
         if not results.empty:
             file_name_col = [col for col in results.columns if 'file' in col.lower() and 'name' in col.lower()]
@@ -734,6 +680,9 @@ def main():
             file_name_col = file_name_col[0] if file_name_col else results.columns[0]
             file_id_col = file_id_col[0] if file_id_col else results.columns[1]
 
+            render_bulk_download(results, file_name_col, file_id_col, fetch_file)
+            permalinks = get_permalinks(df, index_version)
+
             num_cols = 3
             cols = st.columns(num_cols)
 
@@ -749,44 +698,23 @@ def main():
                 
                 col_idx = idx % num_cols
 
+                short_id = permalinks.link_for(permalink_key(row))
+                link_html = (f" <a href='?id={short_id}' target='_self' title='Link to this paper' "
+                             f"style='text-decoration: none; font-size: 12px;'>🔗</a>") if short_id else ""
+
                 with cols[col_idx]:
                     # Render tile
                     tile_html = f"""
                     <div class="pdf-tile">
-                        <div class="pdf-icon">{get_pdf_icon_svg()}</div>
+                        {tile_icon_html(file_id)}
                         <div class="pdf-name">{display_name}</div>
                         <div style='text-align:center; margin-top:4px;'>
-                            <span class="match-badge" style='background-color: rgba(219, 70, 59, 0.2); color: #db463b; padding: 2px 8px; border-radius: 4px; font-size: 11px; font-weight: 600;'>Match: {match_score:.1f}%</span>
+                            <span class="match-badge" style='background-color: rgba(219, 70, 59, 0.2); color: #db463b; padding: 2px 8px; border-radius: 4px; font-size: 11px; font-weight: 600;'>Match: {match_score:.1f}%</span>{link_html}
                         </div>
                     </div>
                     """
                     st.markdown(tile_html, unsafe_allow_html=True)
-                    
-                    # Download button with caching
-                    cache_key = f"file_content_{file_id}"
-                    
-                    if cache_key in st.session_state.download_cache:
-                        # File already downloaded, show download button
-                        file_content, error = st.session_state.download_cache[cache_key]
-                        if error:
-                            st.error(error)
-                        else:
-                            filename = cleaned if cleaned.lower().endswith('.pdf') else f"{cleaned}.pdf"
-                            st.download_button(
-                                label="⬇️ Download PDF",
-                                data=file_content,
-                                file_name=filename,
-                                mime="application/pdf",
-                                use_container_width=True,
-                                key=f"download_{file_id}_{idx}"
-                            )
-                    else:
-                        # Prepare download button
-                        if st.button("📥 Prepare Download", key=f"prepare_{file_id}_{idx}", use_container_width=True):
-                            with st.spinner("⏳ Preparing your download... Please wait"):
-                                file_content, error = get_telegram_file_content(file_id, bot_token)
-                                st.session_state.download_cache[cache_key] = (file_content, error)
-                                st.rerun()
+                    render_download(file_id, cleaned, fetch_file, event_log, key=f"{file_id}_{idx}")
         else:
             st.markdown("""
             <div class="no-results" style="text-align: center; padding: 2rem 1rem; color: #ffffff;">
@@ -804,27 +732,7 @@ def main():
         """, unsafe_allow_html=True)
         
         # Statistics
-        st.markdown("""
-        <style>
-        .stMetric {
-            background-color: rgba(255, 255, 255, 0.1);
-            padding: 1rem;
-            border-radius: 8px;
-            border: 1px solid rgba(219, 70, 59, 0.3);
-        }
-        .stMetric label {
-            color: #ffffff;
-            font-family: 'Poppins', sans-serif;
-            font-size: 14px;
-        }
-        .stMetric [data-testid="stMetricValue"] {
-            color: #db463b;
-            font-family: 'Barlow Condensed', sans-serif;
-            font-weight: 700;
-            font-size: 2rem;
-        }
-        </style>
-        """, unsafe_allow_html=True)
+        st.markdown(METRIC_CSS, unsafe_allow_html=True)
         
         col1, col2, col3 = st.columns(3)
         with col1:
@@ -839,5 +747,54 @@ def main():
             st.metric("Status", "🟢 Active")
 
 
+@st.cache_resource
+def get_profiler():
+    """Process-wide rate-limited request profiler."""
+    return RequestProfiler()
+
+
+def is_profiling_admin():
+    """True when ?profile= matches the PROFILE_TOKEN secret or env var."""
+    token = os.environ.get("PROFILE_TOKEN")
+    if token is None:
+        try:
+            token = st.secrets.get("PROFILE_TOKEN")
+        except Exception:
+            token = None
+    given = st.query_params.get("profile", "")
+    return bool(token and given) and hmac.compare_digest(str(token), given)
+
+
+def render_profiles():
+    """Admin-only list of recent profiles with the top functions of one of them."""
+    profiles = list_profiles()
+    with st.expander(f"🔬 Recent profiles ({len(profiles)})"):
+        if not profiles:
+            st.write("No profiles saved yet.")
+            return
+        names = [os.path.basename(path) for path, _ in profiles[:50]]
+        choice = st.selectbox("Profile", names, key="profile_choice")
+        total, table = summarize(profiles[names.index(choice)][0], top=30)
+        st.write(f"Total: {total:.3f}s")
+        st.code(table)
+
+
+def render_memory_usage():
+    """Admin-only summary of the memory governor's accounting."""
+    usage = get_memory_governor().usage()
+    mb = 1024 ** 2
+    st.caption(f"🧠 Download memory: {usage['total'] / mb:.0f} / {usage['budget'] / mb:.0f} MB "
+               f"({usage['cached'] / mb:.0f} MB cached in {usage['sessions']} sessions, "
+               f"{usage['media'] / mb:.0f} MB media); {usage['evictions']} papers evicted")
+
+
 if __name__ == "__main__":
-    main()
+    profiling_admin = is_profiling_admin()
+    if profiling_admin or os.environ.get("PROFILE_REQUESTS"):
+        with get_profiler().profile(st.query_params.get("q", "")):
+            main()
+    else:
+        main()
+    if profiling_admin:
+        render_profiles()
+        render_memory_usage()
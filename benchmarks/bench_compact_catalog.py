@@ -0,0 +1,103 @@
+"""
+Benchmark catalog memory: plain pandas frames vs compact_catalog.CompactCatalog.
+
+Builds synthetic catalogs (the names of bench_filename_bm25.py, Bot API-style
+File IDs, a sparse Health column and a Source column) and compares:
+
+  object   File Name / File ID as Python str objects (what pandas 2 read_csv gives)
+  string   pandas' default string dtype on this install (Arrow-backed on pandas 3)
+  compact  CompactCatalog.frame(): raw File ID bytes, one name buffer, categoricals
+
+Reports memory (memory_usage(deep=True); CompactCatalog.nbytes plus the
+index for compact), the time to build each layout, a 30-row result take as
+search.results_frame does per query (and the old .loc[...].copy()), and a
+pickle round trip, which st.cache_data pays on every rerun.
+Run with: python benchmarks/bench_compact_catalog.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import base64
+import os
+import pickle
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_filename_bm25 import synthetic_catalog
+from compact_catalog import CompactCatalog
+
+SIZES = [10_000, 100_000, 1_000_000]
+# Bot API document file_ids share their first bytes (type, DC, flags); the rest varies
+ID_PREFIX = base64.urlsafe_b64decode("BQACAgUAAyEGAASpjFBFAAM5")
+
+
+def synthetic_file_ids(size, seed=7):
+    rng = random.Random(seed)
+    return [base64.urlsafe_b64encode(ID_PREFIX + rng.randbytes(41 + rng.randint(0, 3))).rstrip(b"=").decode("ascii")
+            for _ in range(size)]
+
+
+def synthetic_frame(size):
+    df = synthetic_catalog(size)
+    df["File ID"] = synthetic_file_ids(size)
+    rng = np.random.default_rng(7)
+    df["Health"] = np.where(rng.random(size) < 0.02, "dead", None)
+    df["Source"] = rng.choice(["examlanka", "pastpapers_lk", "al_archive"], size=size)
+    return df
+
+
+def timed(fn, repeats=1):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeats
+
+
+def layouts(df):
+    """``{name: (frame, build seconds, bytes)}``."""
+    out = {}
+    frame, seconds = timed(lambda: df.astype({"File Name": object, "File ID": object, "Health": object,
+                                              "Source": object}))
+    out["object"] = (frame, seconds, int(frame.memory_usage(deep=True).sum()))
+    frame, seconds = timed(lambda: df.astype({"File Name": "str", "File ID": "str", "Health": "str",
+                                              "Source": "str"}))
+    out["string"] = (frame, seconds, int(frame.memory_usage(deep=True).sum()))
+    catalog, seconds = timed(lambda: CompactCatalog.from_frame(out["object"][0]))
+    frame = catalog.frame()
+    out["compact"] = (frame, seconds, catalog.nbytes + int(frame.index.memory_usage(deep=True)))
+    return out
+
+
+def run(sizes, repeats=50):
+    print("=" * 96)
+    print("Catalog memory: plain pandas vs CompactCatalog")
+    print("=" * 96)
+    print(f"{'rows':>9} {'layout':<8} {'memory':>10} {'per row':>9} {'build':>8} "
+          f"{'take 30':>9} {'loc+copy':>9} {'pickle rt':>10}")
+    for size in sizes:
+        df = synthetic_frame(size)
+        rng = np.random.default_rng(size)
+        labels = rng.choice(size, size=30, replace=False)
+        for name, (frame, build, nbytes) in layouts(df).items():
+            positions = frame.index.get_indexer(labels)
+            _, take_seconds = timed(lambda: frame.take(positions), repeats)
+            _, loc_seconds = timed(lambda: frame.loc[labels].copy(), repeats)
+            _, pickle_seconds = timed(lambda: pickle.loads(pickle.dumps(frame, protocol=pickle.HIGHEST_PROTOCOL)))
+            print(f"{size:>9,} {name:<8} {nbytes / 2 ** 20:8.1f}MB {nbytes / size:7.0f} B {build:7.2f}s "
+                  f"{take_seconds * 1e6:7.0f}µs {loc_seconds * 1e6:7.0f}µs {pickle_seconds:9.3f}s")
+        # The compact layout must read back exactly what it was given
+        compact = CompactCatalog.from_frame(df.head(1000)).frame()
+        assert compact["File ID"].tolist() == df["File ID"].head(1000).tolist()
+        assert compact["File Name"].tolist() == df["File Name"].head(1000).tolist()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory of plain vs compact catalog layouts.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="catalog sizes in rows")
+    parser.add_argument("--repeats", type=int, default=50, help="repeats for the per-query timings")
+    args = parser.parse_args()
+    run(args.sizes, args.repeats)
@@ -0,0 +1,101 @@
+"""
+Benchmark BM25 filename scoring (one sparse mat-vec per query) and the
+whole search it feeds.
+
+Builds the filename matrix over synthetic catalogs shaped like
+master_index.csv and times query scoring plus top-k selection, then
+search.fuzzy_search end to end (subject filter, sort keys, ranking and the
+result frame) with the per-catalog indexes the app caches.
+Run with: python benchmarks/bench_filename_bm25.py
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from search import build_file_terms, build_filename_index, fuzzy_search, tokenize
+from trigram_index import TrigramIndex
+
+CATALOG_SIZES = [10_000, 100_000]
+QUERIES = [
+    "chemistry 2023", "physics past paper 2019", "combined maths marking scheme",
+    "kingswood chemistry", "ol science tamil medium", "biology mcq 2024",
+    "mechanical technology", "grade 11 geography 1st term test",
+]
+SUBJECTS = ["Physics", "Chemistry", "Biology", "Combined Maths", "ICT", "Economics",
+            "Geography", "History", "Science", "Mechanical Technology", "Accounting"]
+SCHOOLS = ["Kingswood", "Dharmaraja", "Mahamaya", "Royal", "Ananda", "Nalanda",
+           "Visakha", "Trinity", "Richmond", "Kandy High School"]
+SUFFIXES = ["Past Paper", "Marking Scheme", "MCQ", "Essay", "1st Term Test", "Model Paper"]
+
+
+def synthetic_catalog(size, seed=7):
+    rng = random.Random(seed)
+    names = []
+    for i in range(size):
+        parts = [
+            str(rng.randint(1995, 2025)),
+            rng.choice(["AL", "OL", f"Grade {rng.randint(6, 13)}"]),
+            rng.choice(SUBJECTS),
+            rng.choice(["Sinhala Medium", "English Medium", "Tamil Medium", ""]),
+            rng.choice(SUFFIXES),
+        ]
+        if rng.random() < 0.3:
+            parts.append(rng.choice(SCHOOLS))
+        rng.shuffle(parts)
+        names.append("_".join(p for p in parts if p) + f"_{i:x}.pdf")
+    return pd.DataFrame({"File Name": names, "File ID": [f"id{i}" for i in range(size)]})
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return statistics.median(timings), timings[int(0.95 * len(timings)) - 1], timings[-1]
+
+
+def run(top_k=30, repeats=20):
+    print("=" * 60)
+    print("BM25 filename scoring benchmark")
+    print("=" * 60)
+    for size in CATALOG_SIZES:
+        df = synthetic_catalog(size)
+        start = time.perf_counter()
+        index = build_filename_index(df)
+        build_s = time.perf_counter() - start
+
+        timings = []
+        for _ in range(repeats):
+            for query in QUERIES:
+                start = time.perf_counter()
+                scores = index.score(tokenize(query))
+                top = np.argpartition(-scores, top_k)[:top_k]
+                top[np.argsort(-scores[top])]
+                timings.append((time.perf_counter() - start) * 1000)
+
+        p50, p95, worst = percentiles(timings)
+        print(f"{size:>8,} files  build {build_s:5.2f}s  postings {len(index.doc_ids):>9,}  "
+              f"query p50 {p50:.2f} ms  p95 {p95:.2f} ms  max {worst:.2f} ms")
+
+        start = time.perf_counter()
+        file_terms = build_file_terms(df)
+        trigram_index = TrigramIndex.build(df.index.tolist(), df["File Name"].tolist())
+        build_s = time.perf_counter() - start
+        timings = []
+        for _ in range(max(1, repeats // 4)):
+            for query in QUERIES:
+                start = time.perf_counter()
+                fuzzy_search(query, df, top_k, filename_index=index, trigram_index=trigram_index,
+                             file_terms=file_terms)
+                timings.append((time.perf_counter() - start) * 1000)
+        p50, p95, worst = percentiles(timings)
+        print(f"{'':>8}  fuzzy_search end to end (terms + trigrams {build_s:5.2f}s)  "
+              f"p50 {p50:.2f} ms  p95 {p95:.2f} ms  max {worst:.2f} ms")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,246 @@
+"""
+Load test: many concurrent sessions against one app instance.
+
+Starts the real app with `streamlit run` in a scratch directory (a copy of
+master_index.csv, a throwaway bot token, its own PDF cache, mirror and event
+log) and points its Telegram traffic at a local FakeBotAPI with configurable
+latency, error rate, 429s and file sizes. Then N headless clients speak the
+browser's websocket protocol to it, each one like a student:
+
+  search    open the app with ?q=<query> and wait for the results
+  prepare   click "Prepare Download" on a random result (the app fetches the PDF)
+  download  GET the file behind the download button from Streamlit's media server
+
+Reports throughput, latency percentiles per step, the outcome mix and the
+server's memory: RSS growth per open session (sessions stay connected until
+the end, like students with the tab still open) next to the PDF bytes each
+session holds in its download cache. Linux only (/proc/<pid>/status).
+Run with: python benchmarks/bench_load.py [--sessions 50] [--concurrency 10]
+          [--latency 0.3] [--error-rate 0.02] [--rate-limit-rate 0.01] [--file-size 200000-2000000]
+"""
+import argparse
+import contextlib
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import requests
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.sync.client import connect
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_bot_api import FakeBotAPI, parse_size
+
+QUERIES = [
+    "physics 2024", "combined maths", "chemistry al", "biology 2019", "chemistry 2019 english",
+    "ict", "economics 2020", "accounting", "agriculture 2005", "sft 2022", "physics marking scheme",
+    "kingswood chemistry", "geography 2018 sinhala", "history", "business studies 2021",
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid):
+    with open(f'/proc/{pid}/status', 'r') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+class AppServer:
+    """`streamlit run app.py` in a scratch directory, talking to the fake Bot API."""
+
+    def __init__(self, workdir, api_base, csv_path, extra_env=None):
+        os.makedirs(os.path.join(workdir, ".streamlit"), exist_ok=True)
+        with open(os.path.join(workdir, ".streamlit", "secrets.toml"), "w", encoding="utf-8") as f:
+            f.write('TELEGRAM_BOT_TOKEN = "load-test"\n')
+        shutil.copy(csv_path, os.path.join(workdir, "master_index.csv"))
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        env = dict(os.environ, TELEGRAM_API_BASE=api_base)
+        for name in ["PDF_CACHE_DIR", "MIRROR_DIR", "SHARED_INDEX_DIR", "EVENT_LOG_FILE"]:
+            env.pop(name, None)  # Use the scratch directory's defaults
+        env.update(extra_env or {})
+        self.started = time.perf_counter()
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", os.path.join(ROOT, "app.py"),
+             "--server.port", str(self.port), "--server.headless", "true",
+             "--browser.gatherUsageStats", "false"],
+            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def wait_ready(self, timeout=60):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                if requests.get(f"{self.base_url}/_stcore/health", timeout=1).ok:
+                    return
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(0.5)
+        raise RuntimeError("app did not start")
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+class Session:
+    """One headless browser tab: the websocket protocol the Streamlit frontend speaks."""
+
+    def __init__(self, server, ws, timeout):
+        self.server = server
+        self.ws = ws
+        self.timeout = timeout
+        self.query_string = ""
+
+    @staticmethod
+    def connect(server):
+        return connect(f"ws://127.0.0.1:{server.port}/_stcore/stream", subprotocols=["streamlit"], max_size=None)
+
+    def rerun(self, widget_states=()):
+        """Run the script once (following st.rerun); returns the elements it rendered."""
+        message = BackMsg()
+        message.rerun_script.query_string = self.query_string
+        message.rerun_script.widget_states.widgets.extend(widget_states)
+        self.ws.send(message.SerializeToString())
+        elements = []
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(self.ws.recv(timeout=self.timeout))
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                elements.append((element.WhichOneof("type"), element))
+            elif kind == "script_finished" and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return elements
+
+    def run(self, query, rng):
+        """search -> prepare -> download; returns (timings, outcome, downloaded bytes)."""
+        timings = {}
+        self.query_string = urlencode({"q": query})
+
+        start = time.perf_counter()
+        elements = self.rerun()
+        timings["search"] = time.perf_counter() - start
+        prepare = [element.button for kind, element in elements
+                   if kind == "button" and element.button.label.startswith("📥 Prepare")]
+        if not prepare:
+            return timings, "no results", 0
+
+        start = time.perf_counter()
+        elements = self.rerun([WidgetState(id=rng.choice(prepare).id, trigger_value=True)])
+        timings["prepare"] = time.perf_counter() - start
+        buttons = [element.download_button for kind, element in elements if kind == "download_button"]
+        if not buttons:
+            alerts = [element.alert.body for kind, element in elements if kind == "alert"]
+            exceptions = [element.exception.message for kind, element in elements if kind == "exception"]
+            return timings, (exceptions or alerts or ["no download button"])[0][:60], 0
+
+        start = time.perf_counter()
+        response = requests.get(self.server.base_url + buttons[0].url, timeout=self.timeout)
+        timings["download"] = time.perf_counter() - start
+        if not response.ok:
+            return timings, f"media HTTP {response.status_code}", 0
+        return timings, "ok", len(response.content)
+
+
+def run(server, fake, sessions, concurrency, seed=0, timeout=120):
+    print("=" * 72)
+    print(f"Load test: {sessions} sessions, {concurrency} concurrent; fake Bot API latency {fake.latency}s, "
+          f"errors {fake.error_rate:.0%}, 429s {fake.rate_limit_rate:.0%}, file size {fake.file_size}")
+    print("=" * 72)
+
+    # The first session pays for loading the catalog and building the indexes
+    start = time.perf_counter()
+    with Session.connect(server) as ws:
+        _, outcome, _ = Session(server, ws, timeout).run(QUERIES[0], random.Random(seed))
+    print(f"warm-up session {time.perf_counter() - start:6.2f}s ({outcome}), server RSS {rss_mb(server.process.pid):.0f} MB")
+
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    open_sessions = contextlib.ExitStack()
+
+    def one(_):
+        with lock:
+            query = rng.choice(QUERIES)
+            session_rng = random.Random(rng.random())
+        try:
+            ws = Session.connect(server)
+            with lock:
+                open_sessions.enter_context(ws)  # Stay connected until the end
+            return Session(server, ws, timeout).run(query, session_rng)
+        except Exception as e:
+            return {}, f"client error: {type(e).__name__}", 0
+
+    rss_before = rss_mb(server.process.pid)
+    fake_requests = fake.request_count
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(sessions)))
+    elapsed = time.perf_counter() - start
+    rss_after = rss_mb(server.process.pid)
+    open_sessions.close()
+
+    outcomes = {}
+    for _, outcome, _ in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    print(f"\nthroughput      {sessions / elapsed:6.2f} sessions/s  ({elapsed:.1f}s total, "
+          f"{(fake.request_count - fake_requests) / elapsed:.1f} Bot API requests/s)")
+    for step in ["search", "prepare", "download"]:
+        values = [timings[step] for timings, _, _ in results if step in timings]
+        print(f"{step:<15} p50 {percentile(values, 0.5):6.2f}s  p90 {percentile(values, 0.9):6.2f}s  "
+              f"p99 {percentile(values, 0.99):6.2f}s  max {max(values, default=0):6.2f}s  (n={len(values)})")
+    print("outcomes        " + ", ".join(f"{outcome}: {count}" for outcome, count in
+                                         sorted(outcomes.items(), key=lambda item: -item[1])))
+    downloaded = sum(size for _, _, size in results)
+    print(f"memory          server RSS +{(rss_after - rss_before) / sessions:.2f} MB per open session "
+          f"({rss_before:.0f} -> {rss_after:.0f} MB), {downloaded / sessions / 2**20:.2f} MB of PDFs "
+          f"in each session's download cache")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent-session load test against a fake Bot API.")
+    parser.add_argument("--sessions", type=int, default=50, help="simulated sessions in total")
+    parser.add_argument("--concurrency", type=int, default=10, help="sessions running at the same time")
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds added to every Bot API request")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="fraction of Bot API requests answered 502")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.01, help="fraction answered 429")
+    parser.add_argument("--file-size", type=parse_size, default=(200_000, 2_000_000),
+                        help="bytes per PDF, or a MIN-MAX range")
+    parser.add_argument("--csv", default=os.path.join(ROOT, "master_index.csv"), help="catalog to serve")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for queries, clicks and faults")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir, \
+            FakeBotAPI(latency=args.latency, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                       seed=args.seed, file_size=args.file_size) as fake:
+        server = AppServer(workdir, fake.base_url, args.csv)
+        try:
+            server.wait_ready()
+            run(server, fake, args.sessions, args.concurrency, seed=args.seed)
+        finally:
+            server.stop()
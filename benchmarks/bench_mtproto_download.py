@@ -0,0 +1,61 @@
+"""
+Benchmark the striped MTProto download against a local fake file server.
+
+The fake serves GetFile-style chunk requests with a fixed round-trip latency
+and a per-request transfer rate, which is how a single Telegram DC behaves
+for one in-flight request. Run with: python benchmarks/bench_mtproto_download.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mtproto_download import CHUNK_SIZE, download_striped
+
+FILE_SIZES_MB = [25, 60]
+WORKER_COUNTS = [1, 2, 4, 8]
+ROUND_TRIP_S = 0.08          # latency per GetFile request
+REQUEST_MB_PER_S = 8.0       # transfer rate of a single request
+
+
+def make_fake_stripe_fetcher(payload):
+    """Return a fetch_stripe callable serving ``payload`` like iter_download."""
+    async def fetch_stripe(offset, stride):
+        while True:
+            chunk = payload[offset:offset + CHUNK_SIZE]
+            await asyncio.sleep(ROUND_TRIP_S + len(chunk) / (REQUEST_MB_PER_S * 1024 * 1024))
+            yield chunk
+            if len(chunk) < CHUNK_SIZE:
+                return
+            offset += stride
+    return fetch_stripe
+
+
+def run():
+    print("=" * 60)
+    print("MTProto striped download benchmark (local fake)")
+    print(f"chunk={CHUNK_SIZE // 1024} KB, rtt={ROUND_TRIP_S * 1000:.0f} ms, "
+          f"per-request rate={REQUEST_MB_PER_S:.0f} MB/s")
+    print("=" * 60)
+
+    for size_mb in FILE_SIZES_MB:
+        # Odd tail so the last chunk is short
+        payload = os.urandom(size_mb * 1024 * 1024 + 12345)
+        fetcher = make_fake_stripe_fetcher(payload)
+        baseline = None
+        for workers in WORKER_COUNTS:
+            start = time.perf_counter()
+            content = asyncio.run(download_striped(fetcher, workers=workers))
+            elapsed = time.perf_counter() - start
+            assert content == payload, "reassembled file does not match"
+            throughput = len(payload) / elapsed / (1024 * 1024)
+            baseline = baseline or throughput
+            print(f"{size_mb:>4} MB  workers={workers:<2} {elapsed:6.2f}s  "
+                  f"{throughput:6.1f} MB/s  ({throughput / baseline:.1f}x)")
+        print()
+
+
+if __name__ == "__main__":
+    run()
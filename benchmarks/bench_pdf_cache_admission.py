@@ -0,0 +1,92 @@
+"""
+Benchmark PDF cache hit ratio: plain LRU vs LRU with TinyLFU admission.
+
+Replays a download trace through two byte-bounded caches of the same size
+(pdf_cache.CacheIndex, bookkeeping only, no disk I/O):
+
+  lru       admit every download, evict the least recently used papers
+  tinylfu   admit a new paper only if it was requested more often than the
+            papers it would evict (popularity.TinyLFU)
+
+The default trace is synthetic exam-season traffic: most downloads follow a
+Zipf distribution over a set of popular papers, mixed with one-off requests
+for random obscure papers. --events replays the downloads recorded in the
+app's event log instead.
+Run with: python benchmarks/bench_pdf_cache_admission.py [--requests 200000] [--cache-fraction 0.05]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_log import read_recent
+from pdf_cache import CacheIndex
+from popularity import TinyLFU
+
+
+def synthetic_trace(requests, papers, popular, one_off_fraction, seed=0):
+    """(trace of paper ids, size per paper id)."""
+    rng = np.random.default_rng(seed)
+    sizes = np.clip(rng.lognormal(np.log(1.2e6), 0.8, papers), 50_000, 20_000_000).astype(np.int64)
+    ranks = np.arange(1, popular + 1)
+    weights = 1.0 / ranks
+    hot = rng.choice(popular, size=requests, p=weights / weights.sum())
+    cold = rng.integers(popular, papers, size=requests)
+    trace = np.where(rng.random(requests) < one_off_fraction, cold, hot)
+    return trace.tolist(), sizes
+
+
+def event_trace(path):
+    events = [e for e in read_recent(path, max_bytes=os.path.getsize(path))
+              if e.get("kind") == "download" and e.get("file_id")]
+    ids = {}
+    trace = [ids.setdefault(e["file_id"], len(ids)) for e in events]
+    rng = np.random.default_rng(0)
+    sizes = np.clip(rng.lognormal(np.log(1.2e6), 0.8, len(ids)), 50_000, 20_000_000).astype(np.int64)
+    return trace, sizes
+
+
+def replay(index, trace, sizes):
+    hit_bytes = total_bytes = 0
+    for paper in trace:
+        size = int(sizes[paper])
+        total_bytes += size
+        if index.lookup(paper):
+            hit_bytes += size
+        else:
+            index.admit(paper, size)
+    return index.hit_ratio(), hit_bytes / total_bytes
+
+
+def run(trace, sizes, cache_fraction):
+    capacity = int(sizes.sum() * cache_fraction)
+    print("=" * 60)
+    print(f"PDF cache admission benchmark: {len(trace):,} downloads, {len(set(trace)):,} distinct papers, "
+          f"cache {capacity / 2**20:,.0f} MB ({cache_fraction:.0%} of the catalog)")
+    print("=" * 60)
+    width = 1 << max(10, int(np.ceil(np.log2(len(sizes)))))
+    for name, index in [("lru", CacheIndex(capacity)),
+                        ("tinylfu", CacheIndex(capacity, TinyLFU(width=width)))]:
+        hit_ratio, byte_hit_ratio = replay(index, trace, sizes)
+        print(f"{name:>8}: hit ratio {hit_ratio:6.1%}   byte hit ratio {byte_hit_ratio:6.1%}   "
+              f"rejected {index.rejected:,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PDF cache admission benchmark.")
+    parser.add_argument("--requests", type=int, default=200_000, help="synthetic downloads")
+    parser.add_argument("--papers", type=int, default=50_000, help="papers in the synthetic catalog")
+    parser.add_argument("--popular", type=int, default=5_000, help="papers that get Zipf traffic")
+    parser.add_argument("--one-off", type=float, default=0.3, help="fraction of one-off obscure downloads")
+    parser.add_argument("--cache-fraction", type=float, default=0.05, help="cache size as a fraction of catalog bytes")
+    parser.add_argument("--events", default=None, help="replay downloads from this event log instead")
+    args = parser.parse_args()
+
+    if args.events:
+        trace, sizes = event_trace(args.events)
+    else:
+        trace, sizes = synthetic_trace(args.requests, args.papers, args.popular, args.one_off)
+    run(trace, sizes, args.cache_fraction)
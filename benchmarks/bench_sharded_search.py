@@ -0,0 +1,70 @@
+"""
+Benchmark sharded search throughput against single-process fuzzy_search.
+
+Builds a synthetic catalog (see bench_filename_bm25.py), runs the same queries
+through fuzzy_search on one thread and through ShardedSearchEngine with 1, 2,
+4, ... shards up to the CPU count, checks the results are identical, and
+prints queries per second. Throughput should grow close to linearly with the
+number of shards until the machine runs out of cores.
+Run with: python benchmarks/bench_sharded_search.py [--size 100000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_filename_bm25 import QUERIES, synthetic_catalog
+from search import build_file_terms, build_filename_index, fuzzy_search
+from sharded_search import ShardedSearchEngine
+from trigram_index import TrigramIndex
+
+
+def shard_counts(cpus):
+    counts = [1]
+    while counts[-1] * 2 <= cpus:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cpus:
+        counts.append(cpus)
+    return counts
+
+
+def run(size, queries, limit=30):
+    cpus = os.cpu_count() or 1
+    print("=" * 60)
+    print(f"Sharded search benchmark: {size:,} files, {len(queries)} queries, {cpus} CPUs")
+    print("=" * 60)
+
+    df = synthetic_catalog(size)
+    filename_index = build_filename_index(df)
+    trigram_index = TrigramIndex.build(df.index.tolist(), df['File Name'].tolist())
+    file_terms = build_file_terms(df)
+
+    start = time.perf_counter()
+    expected = [fuzzy_search(q, df, limit, filename_index=filename_index, trigram_index=trigram_index,
+                             file_terms=file_terms) for q in queries]
+    baseline = len(queries) / (time.perf_counter() - start)
+    print(f"single process   {baseline:7.2f} queries/s")
+
+    for shards in shard_counts(cpus):
+        start = time.perf_counter()
+        engine = ShardedSearchEngine(df, shards=shards, filename_index=filename_index)
+        startup = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = [engine.search(q, limit) for q in queries]
+        throughput = len(queries) / (time.perf_counter() - start)
+        engine.close()
+
+        same = all(a.equals(b) for a, b in zip(expected, results))
+        print(f"{shards:>3} shard(s)     {throughput:7.2f} queries/s  x{throughput / baseline:4.2f}  "
+              f"(startup {startup:.1f}s, identical results: {'yes' if same else 'NO'})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded search throughput benchmark.")
+    parser.add_argument("--size", type=int, default=100_000, help="synthetic catalog size")
+    parser.add_argument("--queries", type=int, default=len(QUERIES), help="number of benchmark queries")
+    args = parser.parse_args()
+    run(args.size, QUERIES[:args.queries])
@@ -0,0 +1,93 @@
+"""
+Benchmark per-process memory: private CSV copies vs the shared mapped index.
+
+Starts N reader processes side by side, the way several Streamlit workers
+run behind a load balancer, and measures each one's memory growth after
+loading the catalog:
+
+  csv     read master_index.csv + build the BM25 filename matrix (per process)
+  shared  attach to the index published by shared_index.py (mapped zero-copy)
+
+Every reader then does the same work (string lengths over all names plus a
+BM25 query) so the mapped pages are actually touched. RSS counts shared pages
+in full in every process; PSS splits them between the processes sharing them
+and is the fairer per-process number. Linux only (/proc/self/smaps_rollup).
+Run with: python benchmarks/bench_shared_index.py [--size 100000] [--procs 4]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_filename_bm25 import synthetic_catalog
+from search import build_filename_index, tokenize
+from shared_index import SharedIndex, publish, read_catalog_csv
+
+
+def memory_kb():
+    """(rss, pss, private) of this process in kB."""
+    fields = {}
+    with open('/proc/self/smaps_rollup', 'r') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if value.strip().endswith('kB'):
+                fields[key] = int(value.split()[0])
+    return fields['Rss'], fields['Pss'], fields['Private_Clean'] + fields['Private_Dirty']
+
+
+def reader(mode, csv_path, store_dir, loaded, results):
+    before = memory_kb()
+    if mode == 'csv':
+        df = read_catalog_csv(csv_path)
+        filename_index = build_filename_index(df)
+    else:
+        snapshot = SharedIndex(store_dir).current()
+        df, filename_index = snapshot.df, snapshot.filename_index
+    df['File Name'].str.len().sum()
+    df['File ID'].str.len().sum()
+    filename_index.score(tokenize("kingswood chemistry 2023"))
+
+    loaded.wait()  # Measure while every reader is alive, so PSS splits shared pages
+    after = memory_kb()
+    results.put(tuple(a - b for a, b in zip(after, before)))
+    loaded.wait()
+
+
+def measure(context, mode, procs, csv_path, store_dir):
+    loaded = context.Barrier(procs)
+    results = context.Queue()
+    workers = [context.Process(target=reader, args=(mode, csv_path, store_dir, loaded, results))
+               for _ in range(procs)]
+    for worker in workers:
+        worker.start()
+    deltas = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    return [sum(values) / len(values) / 1024 for values in zip(*deltas)]
+
+
+def run(size, procs):
+    print("=" * 60)
+    print(f"Shared index memory benchmark: {size:,} files, {procs} reader processes")
+    print("=" * 60)
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'master_index.csv')
+        synthetic_catalog(size).to_csv(csv_path, index=False)
+        store_dir = os.path.join(tmp, 'index')
+        publish(csv_path, store_dir)
+
+        for mode in ['csv', 'shared']:
+            rss, pss, private = measure(context, mode, procs, csv_path, store_dir)
+            print(f"{mode:>7}: per process  RSS +{rss:7.1f} MB   PSS +{pss:7.1f} MB   private +{private:7.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared index memory benchmark.")
+    parser.add_argument("--size", type=int, default=100_000, help="synthetic catalog size")
+    parser.add_argument("--procs", type=int, default=4, help="reader processes")
+    args = parser.parse_args()
+    run(args.size, args.procs)
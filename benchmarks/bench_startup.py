@@ -0,0 +1,199 @@
+"""
+Cold-start benchmark: how long a new replica takes to show its first page.
+
+When the app autoscales (exam result days) every new replica pays for its
+imports, the catalog load and the index builds on its first session. This
+measures both halves:
+
+  imports      `python -X importtime -c "import app"` in a fresh interpreter:
+               the total, and the modules that cost the most (cumulative,
+               attributed to the app module that imported them first)
+  first paint  starts `streamlit run app.py` in a scratch directory (as in
+               bench_load.py) and opens one session as soon as the server
+               answers its health check, timing from process start:
+                 ready        /_stcore/health answers
+                 first paint  the first element reaches the browser
+                 content      the statistics (welcome page) or the first result tile
+                 complete     the script finished
+               for the welcome page and a ?q= search, with LAZY_STARTUP on
+               (warm-up replay and permalinks deferred) and off. The scratch
+               directory gets an event log of popular searches so the warm-up
+               replay has work to do, as it would on a real replica.
+
+Each run uses a new server process; the median of --runs is reported.
+Run with: python benchmarks/bench_startup.py [--runs 3] [--top 15] [--query "physics 2024"] [--size 100000]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlencode
+
+import requests
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_filename_bm25 import synthetic_catalog
+from bench_load import QUERIES, AppServer, Session, rss_mb
+from search import canonical_query
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+
+def parse_importtime(stderr):
+    """``-X importtime`` output -> [(module, self µs, cumulative µs, depth)] in import order."""
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return modules
+
+
+def measure_imports(statement="import app"):
+    """Run ``statement`` in a fresh interpreter with -X importtime; returns (modules, wall seconds)."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT,
+                            capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    return parse_importtime(result.stderr), elapsed
+
+
+def direct_imports(modules, parent="app"):
+    """Modules imported directly by ``parent`` (depth one below it), with their cumulative cost."""
+    children = []
+    depth = None
+    for name, self_us, cumulative_us, level in reversed(modules):
+        if name == parent and depth is None:
+            depth = level
+            continue
+        if depth is None:
+            continue
+        if level <= depth:
+            break  # Left the parent's subtree
+        if level == depth + 1:
+            children.append((name, cumulative_us))
+    return children
+
+
+def wait_health(server, timeout=60):
+    """Poll the health endpoint closely; returns seconds since the process started."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{server.base_url}/_stcore/health", timeout=1).ok:
+                return time.perf_counter() - server.started
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.02)
+    raise RuntimeError("app did not start")
+
+
+def is_content(element):
+    kind = element.WhichOneof("type")
+    return kind == "metric" or (kind == "markdown" and 'class="pdf-tile"' in element.markdown.body)
+
+
+def seed_event_log(workdir, repeats=5):
+    """Popular searches in the scratch app's event log, for the warm-up replay."""
+    os.makedirs(os.path.join(workdir, ".cache"), exist_ok=True)
+    now = time.time()
+    with open(os.path.join(workdir, ".cache", "events.jsonl"), "w", encoding="utf-8") as f:
+        for query in QUERIES * repeats:
+            f.write(json.dumps({"ts": now, "kind": "search", "query": query, "key": canonical_query(query),
+                                "filters": {}, "results": 30}) + "\n")
+
+
+def first_session(server, query_string, timeout=120):
+    """Run the first session's script; returns (first paint, content, complete) in seconds since process start."""
+    first_paint = content = None
+    with Session.connect(server) as ws:
+        message = BackMsg()
+        message.rerun_script.query_string = query_string
+        ws.send(message.SerializeToString())
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(ws.recv(timeout=timeout))
+            kind = forward.WhichOneof("type")
+            now = time.perf_counter() - server.started
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                if first_paint is None:
+                    first_paint = now
+                if content is None and is_content(forward.delta.new_element):
+                    content = now
+            elif kind == "script_finished" and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return first_paint, content, now
+
+
+def measure_first_paint(csv_path, query, lazy, runs):
+    timings = {"ready": [], "first paint": [], "content": [], "complete": []}
+    rss = []
+    query_string = urlencode({"q": query}) if query else ""
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as workdir:
+            seed_event_log(workdir)
+            # No Bot API is contacted: the first page never downloads a paper
+            server = AppServer(workdir, "http://127.0.0.1:9", csv_path,
+                               extra_env={"LAZY_STARTUP": "1" if lazy else "0"})
+            try:
+                timings["ready"].append(wait_health(server))
+                first_paint, content, complete = first_session(server, query_string)
+                timings["first paint"].append(first_paint)
+                timings["content"].append(content if content is not None else complete)
+                timings["complete"].append(complete)
+                rss.append(rss_mb(server.process.pid))
+            finally:
+                server.stop()
+    return {step: statistics.median(values) for step, values in timings.items()}, statistics.median(rss)
+
+
+def run(csv_path, runs, top, query):
+    print("=" * 72)
+    print("Cold start: imports and time to first paint of a new replica")
+    print("=" * 72)
+
+    walls = []
+    for _ in range(runs):
+        modules, wall = measure_imports()
+        walls.append(wall)
+    total_us = next(cumulative for name, _, cumulative, _ in reversed(modules) if name == "app")
+    print(f"\nimport app      {total_us / 1e6:6.3f}s by -X importtime ({len(modules)} modules), "
+          f"interpreter wall {statistics.median(walls):.3f}s")
+    for name, cumulative_us in sorted(direct_imports(modules), key=lambda item: -item[1])[:top]:
+        print(f"  {name:<32} {cumulative_us / 1e3:8.1f} ms")
+
+    print(f"\n{'page':<10} {'mode':<6} {'ready':>8} {'first paint':>12} {'content':>9} {'complete':>10} {'RSS':>8}")
+    for label, page_query in [("welcome", ""), ("search", query)]:
+        for lazy in [False, True]:
+            medians, rss = measure_first_paint(csv_path, page_query, lazy, runs)
+            print(f"{label:<10} {'lazy' if lazy else 'eager':<6} {medians['ready']:7.2f}s "
+                  f"{medians['first paint']:11.2f}s {medians['content']:8.2f}s {medians['complete']:9.2f}s {rss:6.0f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import time and time to first paint of a new app process.")
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per measurement (median reported)")
+    parser.add_argument("--top", type=int, default=15, help="how many of the app's imports to list")
+    parser.add_argument("--query", default="physics 2024", help="search for the ?q= page")
+    parser.add_argument("--csv", default=os.path.join(ROOT, "master_index.csv"), help="catalog to serve")
+    parser.add_argument("--size", type=int, default=None, help="serve a synthetic catalog of this many rows instead")
+    args = parser.parse_args()
+
+    if args.size:
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = os.path.join(tmp, "master_index.csv")
+            synthetic_catalog(args.size).to_csv(csv_path, index=False)
+            run(csv_path, args.runs, args.top, args.query)
+    else:
+        run(args.csv, args.runs, args.top, args.query)
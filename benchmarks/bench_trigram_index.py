@@ -0,0 +1,62 @@
+"""
+Benchmark trigram partial-name lookup against a linear substring scan.
+
+Uses the synthetic catalogs from bench_filename_bm25.py with school names
+glued onto the neighbouring token ("2019Kingswood_CHEMPAPER") the way real
+uploads often are, then times TrigramIndex.search for school names, typos
+and common words.
+Run with: python benchmarks/bench_trigram_index.py
+"""
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_filename_bm25 import CATALOG_SIZES, synthetic_catalog
+from search import normalize_text
+from trigram_index import TrigramIndex
+
+TERMS = ["kingswood", "dharmaraja", "mahamaya", "visakha", "kingswod", "nalanda", "paper", "chem"]
+
+
+def glue(name):
+    """Drop every other separator so words run together."""
+    parts = name.split("_")
+    return "".join(p if i % 2 else p + "_" for i, p in enumerate(parts)).rstrip("_")
+
+
+def run(repeats=20):
+    print("=" * 60)
+    print("Trigram partial-name lookup benchmark")
+    print("=" * 60)
+    for size in CATALOG_SIZES:
+        names = [glue(name) for name in synthetic_catalog(size)["File Name"]]
+        start = time.perf_counter()
+        index = TrigramIndex.build(range(size), names)
+        build_s = time.perf_counter() - start
+
+        timings, hits = [], {}
+        for _ in range(repeats):
+            for term in TERMS:
+                start = time.perf_counter()
+                hits[term] = len(index.search(term))
+                timings.append((time.perf_counter() - start) * 1000)
+
+        normalized = [normalize_text(name).replace(" ", "") for name in names]
+        start = time.perf_counter()
+        for term in TERMS:
+            sum(term in name for name in normalized)
+        scan_ms = (time.perf_counter() - start) * 1000 / len(TERMS)
+
+        timings.sort()
+        p95 = timings[int(0.95 * len(timings)) - 1]
+        print(f"{size:>8,} files  build {build_s:5.2f}s  trigrams {len(index.postings):>6,}  "
+              f"query p50 {statistics.median(timings):.2f} ms  p95 {p95:.2f} ms  "
+              f"(linear scan {scan_ms:.1f} ms)")
+        print("          hits: " + ", ".join(f"{term}={count}" for term, count in hits.items()))
+
+
+if __name__ == "__main__":
+    run()
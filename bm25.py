@@ -0,0 +1,131 @@
+"""
+Sparse BM25 index backed by NumPy arrays.
+
+The index is a documents x terms matrix stored column-wise (CSC): for every
+term, ``indptr`` points at the slice of ``doc_ids`` / ``weights`` holding the
+documents that contain it. Weights are the full BM25 contribution of the term
+to the document (idf x saturated tf), computed once at build time, so scoring
+a query is a single sparse matrix-vector product: gather the query's columns
+and add them up.
+
+Saved with ``np.savez_compressed`` it is a few bytes per posting on disk.
+"""
+from collections import Counter
+
+import numpy as np
+
+K1 = 1.2
+B = 0.75
+
+
+class BM25Index:
+    def __init__(self, keys, terms, indptr, doc_ids, weights):
+        self.keys = list(keys)
+        self.terms = list(terms)
+        self.vocab = {term: i for i, term in enumerate(self.terms)}
+        self.positions = {key: i for i, key in enumerate(self.keys)}
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, keys, documents, k1=K1, b=B):
+        """Build from parallel lists of document keys and token lists."""
+        keys = list(keys)
+        n_docs = len(keys)
+        vocab = {}
+        rows, cols, tfs = [], [], []
+        doc_lengths = np.zeros(n_docs, dtype=np.float32)
+
+        for doc, tokens in enumerate(documents):
+            doc_lengths[doc] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                rows.append(doc)
+                cols.append(vocab.setdefault(term, len(vocab)))
+                tfs.append(tf)
+
+        rows = np.asarray(rows, dtype=np.int32)
+        cols = np.asarray(cols, dtype=np.int32)
+        tfs = np.asarray(tfs, dtype=np.float32)
+
+        # Group postings by term (column-major)
+        order = np.argsort(cols, kind="stable")
+        rows, cols, tfs = rows[order], cols[order], tfs[order]
+        postings_per_term = np.bincount(cols, minlength=len(vocab))
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(postings_per_term, out=indptr[1:])
+        df = postings_per_term.astype(np.float32)
+
+        avgdl = float(doc_lengths.mean()) if n_docs and doc_lengths.mean() > 0 else 1.0
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        norm = k1 * (1 - b + b * doc_lengths[rows] / avgdl)
+        weights = (idf[cols] * tfs * (k1 + 1) / (tfs + norm)).astype(np.float32)
+
+        terms = [None] * len(vocab)
+        for term, i in vocab.items():
+            terms[i] = term
+        return cls(keys, terms, indptr, rows, weights)
+
+    def score(self, query_tokens):
+        """Return a float32 array of BM25 scores aligned with ``keys``."""
+        scores = np.zeros(len(self.keys), dtype=np.float32)
+        for term, count in Counter(query_tokens).items():
+            col = self.vocab.get(term)
+            if col is None:
+                continue
+            start, end = self.indptr[col], self.indptr[col + 1]
+            scores[self.doc_ids[start:end]] += count * self.weights[start:end]
+        return scores
+
+    def scores_by_key(self, query_tokens):
+        """Return ``{key: score}`` for every document with a non-zero score."""
+        scores = self.score(query_tokens)
+        hits = np.flatnonzero(scores)
+        return {self.keys[i]: float(scores[i]) for i in hits}
+
+    def subset(self, rows):
+        """Index over the documents at positions ``rows`` only.
+
+        Weights are kept as they are, so scores match the full index exactly
+        (idf and average length stay those of the whole corpus).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        remap = np.full(len(self.keys), -1, dtype=np.int64)
+        remap[rows] = np.arange(len(rows))
+        new_doc_ids = remap[self.doc_ids]
+        keep = new_doc_ids >= 0
+
+        term_of_posting = np.repeat(np.arange(len(self.terms)), np.diff(self.indptr))
+        indptr = np.zeros(len(self.terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_of_posting[keep], minlength=len(self.terms)), out=indptr[1:])
+        return BM25Index(
+            [self.keys[row] for row in rows],
+            self.terms,
+            indptr,
+            new_doc_ids[keep].astype(np.int32),
+            self.weights[keep]
+        )
+
+    def save(self, path):
+        np.savez_compressed(
+            path,
+            keys=np.asarray(self.keys, dtype=str),
+            terms=np.asarray(self.terms, dtype=str),
+            indptr=self.indptr,
+            doc_ids=self.doc_ids,
+            weights=self.weights
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["keys"].tolist(),
+                data["terms"].tolist(),
+                data["indptr"],
+                data["doc_ids"],
+                data["weights"]
+            )
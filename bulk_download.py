@@ -0,0 +1,269 @@
+"""
+Bulk "download all results" as a streamed ZIP.
+
+Files are fetched concurrently by a bounded thread pool and written to the
+archive in completion order, so at most ``max_workers`` PDFs are held in
+memory at any time no matter how many results there are. The ZIP bytes are
+produced incrementally by ``iter_zip_chunks`` and can be sent to any HTTP
+response as they are generated; the Streamlit app writes them through to a
+file under ``static/bundles`` that Streamlit's static file route serves
+straight from disk. That route refuses files over 200 MB, so a larger
+selection is split into several ZIPs of at most BUNDLE_MAX_BYTES each.
+"""
+import hashlib
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+BULK_MAX_WORKERS = 4
+BUNDLE_DIR = os.path.join("static", "bundles")
+BUNDLE_URL_PREFIX = "app/static/bundles"
+BUNDLE_MAX_AGE = 3600  # Seconds since a bundle's link was last shown before it is deleted
+# Streamlit's static route refuses files over 200 MB (MAX_APP_STATIC_FILE_SIZE)
+BUNDLE_MAX_BYTES = int(os.environ.get("BUNDLE_MAX_BYTES", 200 * 1024 * 1024))
+ZIP_ENTRY_OVERHEAD = 128  # Bytes per entry beyond twice its name: headers, data descriptor, central directory
+ZIP_RESERVE = 64 * 1024   # Room kept in every part for MISSING.txt and the end of the archive
+
+
+def iter_completed_downloads(entries, fetch, max_workers=BULK_MAX_WORKERS):
+    """Fetch ``(file_id, file_name)`` entries concurrently, yielding results as they finish.
+
+    ``fetch(file_id)`` returns ``(content, error)`` like get_telegram_file_content.
+    Only ``max_workers`` downloads are in flight at once, and finished results
+    are yielded before new ones are submitted, which bounds memory use.
+    Yields ``(file_name, content, error)``.
+    """
+    pending_entries = iter(entries)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bulk") as executor:
+        in_flight = {}
+
+        def submit_next():
+            for file_id, file_name in pending_entries:
+                in_flight[executor.submit(fetch, file_id)] = file_name
+                return True
+            return False
+
+        for _ in range(max_workers):
+            if not submit_next():
+                break
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                file_name = in_flight.pop(future)
+                try:
+                    content, error = future.result()
+                except Exception as e:
+                    content, error = None, f"❌ Error downloading file: {str(e)}"
+                yield file_name, content, error
+                submit_next()
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object that collects written bytes."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _unique_name(name, used):
+    """Avoid duplicate entry names inside the archive ("a.pdf" -> "a (2).pdf")."""
+    if name not in used:
+        used.add(name)
+        return name
+    stem, ext = os.path.splitext(name)
+    counter = 2
+    while f"{stem} ({counter}){ext}" in used:
+        counter += 1
+    unique = f"{stem} ({counter}){ext}"
+    used.add(unique)
+    return unique
+
+
+def iter_zip_chunks(results, failed=None):
+    """Turn ``(file_name, content, error)`` results into ZIP bytes, one entry at a time.
+
+    PDFs are already compressed, so entries are stored rather than deflated.
+    Failed downloads are appended to ``failed`` (if given) and listed in a
+    MISSING.txt entry at the end of the archive.
+    """
+    sink = _ChunkSink()
+    used_names = set()
+    missing = []
+    # A non-seekable sink makes zipfile write data descriptors instead of seeking back
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        for file_name, content, error in results:
+            if error or content is None:
+                missing.append(f"{file_name}: {error}")
+                continue
+            archive.writestr(_unique_name(file_name, used_names), content)
+            yield sink.drain()
+
+        if missing:
+            archive.writestr("MISSING.txt", "Could not download:\n" + "\n".join(missing) + "\n")
+    yield sink.drain()
+
+    if failed is not None:
+        failed.extend(missing)
+
+
+def bundle_name(query, file_ids):
+    """Deterministic bundle file name for a result set."""
+    digest = hashlib.sha1("\n".join([query] + list(file_ids)).encode("utf-8")).hexdigest()[:16]
+    return f"bundle_{digest}.zip"
+
+
+def bundle_parts(path):
+    """Paths of an existing bundle's ZIPs: ``path`` itself, then ``name-2.zip``, ``name-3.zip``, ..."""
+    parts = []
+    while os.path.exists(part_path(path, len(parts) + 1)):
+        parts.append(part_path(path, len(parts) + 1))
+    return parts
+
+
+def part_path(path, part):
+    if part == 1:
+        return path
+    stem, ext = os.path.splitext(path)
+    return f"{stem}-{part}{ext}"
+
+
+def bundle_missing(path):
+    """The failed files listed in the MISSING.txt of an existing bundle's parts ([] if there is none)."""
+    missing = []
+    for part in bundle_parts(path):
+        try:
+            with zipfile.ZipFile(part) as archive:
+                if "MISSING.txt" in archive.namelist():
+                    missing += archive.read("MISSING.txt").decode("utf-8").splitlines()[1:]
+        except (OSError, zipfile.BadZipFile):
+            pass
+    return missing
+
+
+def touch_bundle(path):
+    """Mark a bundle as in use (its link is on screen) so cleanup_bundles keeps it."""
+    for part in bundle_parts(path):
+        try:
+            os.utime(part)
+        except OSError:
+            pass
+
+
+def cleanup_bundles(bundle_dir=BUNDLE_DIR, max_age=BUNDLE_MAX_AGE):
+    """Delete bundles whose link has not been shown for ``max_age`` seconds."""
+    if not os.path.isdir(bundle_dir):
+        return
+    cutoff = time.time() - max_age
+    for name in os.listdir(bundle_dir):
+        path = os.path.join(bundle_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def split_results(results, max_bytes):
+    """Group ``(file_name, content, error)`` results into parts of ZIPs under ``max_bytes``.
+
+    Yields one generator per part, lazily, so files are still only held
+    while they are written; each part must be consumed before the next.
+    A file too large for any part is passed on as a failure.
+    """
+    budget = max_bytes - ZIP_RESERVE
+    results = iter(results)
+    carry = []
+
+    def part():
+        used = 0
+        while True:
+            result = carry.pop() if carry else next(results, None)
+            if result is None:
+                return
+            file_name, content, error = result
+            size = 0
+            if not error and content is not None:
+                size = len(content) + 2 * len(file_name.encode("utf-8")) + ZIP_ENTRY_OVERHEAD
+            if size > budget:
+                result = (file_name, None, f"❌ File is over the {max_bytes // 2 ** 20} MB ZIP limit")
+                size = 0
+            elif used and used + size > budget:
+                carry.append(result)
+                return
+            used += size
+            yield result
+
+    while True:
+        first = next(results, None)
+        if first is None:
+            return
+        carry.append(first)
+        yield part()
+
+
+def write_bundle(entries, fetch, path, max_workers=BULK_MAX_WORKERS, progress=None, max_bytes=BUNDLE_MAX_BYTES):
+    """Stream a ZIP of ``entries`` to ``path`` and return the list of failed files.
+
+    ``progress(done, total)`` is called after each file completes. A
+    selection over ``max_bytes`` is split into more ZIPs next to ``path``
+    (see bundle_parts). Sessions bundling the same results share ``path``:
+    each writes its own temporary files and renames them into place, and
+    an existing bundle is reused.
+    """
+    if os.path.exists(path):
+        return bundle_missing(path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    entries = list(entries)
+    failed = []
+    completed = 0
+
+    def tracked():
+        nonlocal completed
+        for result in iter_completed_downloads(entries, fetch, max_workers=max_workers):
+            completed += 1
+            if progress:
+                progress(completed, len(entries))
+            yield result
+
+    tmp_paths = []
+
+    def write_part(results):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".",
+                                        suffix=".part")
+        tmp_paths.append(tmp_path)
+        with os.fdopen(fd, "wb") as f:
+            for chunk in iter_zip_chunks(results, failed=failed):
+                f.write(chunk)
+
+    try:
+        for results in split_results(tracked(), max_bytes):
+            write_part(results)
+        if not tmp_paths:
+            write_part([])
+        # Later parts first, so once ``path`` exists every part does; then drop parts of an older bundle
+        for part in range(len(tmp_paths), 0, -1):
+            os.replace(tmp_paths[part - 1], part_path(path, part))
+        stale = len(tmp_paths) + 1
+        while os.path.exists(part_path(path, stale)):
+            os.remove(part_path(path, stale))
+            stale += 1
+    finally:
+        for tmp_path in tmp_paths:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return failed
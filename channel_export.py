@@ -0,0 +1,115 @@
+"""
+Resumable export of a channel's documents to CSV.
+
+Used by fix_index.py --export and by sources.py for every registered channel.
+Documents are requested oldest-first with a server-side document filter and
+appended to the CSV in batches; after each batch is flushed (and fsynced)
+the last message id is checkpointed. A resumed run drops any rows flushed
+after the checkpoint and continues from it with ``min_id``. On a FloodWait
+the current batch is committed, the wait is honoured, and the export
+continues from the checkpoint.
+"""
+import asyncio
+import csv
+import json
+import os
+
+import pandas as pd
+
+BATCH_SIZE = 200  # Rows buffered before each flush + checkpoint
+
+
+def load_checkpoint(path):
+    """Return the last exported message id (0 if there is no checkpoint)."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'r', encoding='utf-8') as f:
+        return int(json.load(f).get("last_message_id", 0))
+
+
+def save_checkpoint(path, last_message_id, rows_written):
+    """Atomically record export progress so a crash never leaves a torn file."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"last_message_id": last_message_id, "rows_written": rows_written}, f)
+    os.replace(tmp_path, path)
+
+
+def trim_export_to_checkpoint(csv_path, last_message_id):
+    """Drop rows written after the last checkpoint (flushed but not committed).
+
+    Rows are flushed before the checkpoint is saved, so an interruption in
+    between can leave a few rows that the resumed run will fetch again.
+    Returns the number of rows kept.
+    """
+    if not os.path.exists(csv_path):
+        return 0
+    existing = pd.read_csv(csv_path)
+    kept = existing[existing["Message ID"] <= last_message_id]
+    if len(kept) != len(existing):
+        kept.to_csv(csv_path, index=False)
+        print(f"↩️  {csv_path}: discarded {len(existing) - len(kept)} uncommitted rows after message {last_message_id}")
+    return len(kept)
+
+
+def flush_rows(csv_path, rows, columns):
+    """Append buffered rows to ``csv_path``, writing the header on first use."""
+    write_header = not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0
+    with open(csv_path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        if write_header:
+            writer.writeheader()
+        writer.writerows(rows)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+async def export_documents(client, entity, csv_path, checkpoint_path, columns, make_row,
+                           wait_time=None, label="export", progress=None, batch_size=BATCH_SIZE):
+    """Append the documents newer than the checkpoint to ``csv_path``.
+
+    ``make_row(message)`` returns the CSV row (with a "Message ID") for a
+    document message. ``wait_time`` spaces out history requests, and
+    ``progress(rows_written, last_message_id)`` is called after each commit.
+    Returns ``(rows written in total, rows added by this run, last message id)``.
+    """
+    from telethon.errors import FloodWaitError
+    from telethon.tl.types import InputMessagesFilterDocument
+
+    last_message_id = load_checkpoint(checkpoint_path)
+    rows_written = trim_export_to_checkpoint(csv_path, last_message_id)
+    if last_message_id:
+        print(f"⏩ {label}: resuming after message {last_message_id} ({rows_written} rows already exported)")
+    added = 0
+    batch = []
+
+    def commit():
+        nonlocal batch, rows_written, last_message_id, added
+        if batch:
+            flush_rows(csv_path, batch, columns)
+            rows_written += len(batch)
+            added += len(batch)
+            last_message_id = batch[-1]["Message ID"]
+            save_checkpoint(checkpoint_path, last_message_id, rows_written)
+            batch = []
+            if progress is not None:
+                progress(rows_written, last_message_id)
+
+    while True:
+        try:
+            async for message in client.iter_messages(entity, filter=InputMessagesFilterDocument,
+                                                      min_id=last_message_id, reverse=True,
+                                                      wait_time=wait_time):
+                if not message.document:
+                    continue
+                batch.append(make_row(message))
+                if len(batch) >= batch_size:
+                    commit()
+            break
+        except FloodWaitError as e:
+            # Commit what we have, honour the wait and continue from the checkpoint
+            commit()
+            print(f"\n⏳ {label}: flood wait, sleeping {e.seconds}s before resuming after message {last_message_id}")
+            await asyncio.sleep(e.seconds)
+    commit()
+    return rows_written, added, last_message_id
@@ -0,0 +1,246 @@
+"""
+Compact in-memory layout for large catalogs.
+
+read_csv gives every File Name and File ID its own string: a Python object
+each on pandas 2, one Arrow value with an 8-byte offset each on pandas 3. A
+Bot API file_id is ~79 base64url characters for only ~59 bytes of payload,
+and pandas copies rows around per query. CompactCatalog keeps the same rows
+in a few flat buffers:
+
+  File ID     base64url-decoded to raw bytes in one fixed-width uint8 matrix
+              with a per-row length. IDs that do not round-trip through
+              base64url (hand-edited or synthetic ones) are kept verbatim as
+              UTF-8 and flagged, so every ID reads back exactly as it was.
+  File Name   one UTF-8 buffer plus int64 offsets (shared_arrays.pack_strings)
+              seen by pandas as a zero-copy Arrow string column
+  the rest    text columns with few distinct values (Health, Source) as
+              categoricals, other text packed like File Name, integers in
+              the smallest dtype that holds them
+
+CompactCatalog.frame() is an ordinary DataFrame over those buffers, so the
+search, facet and permalink code runs on it unchanged. Its File ID column is
+a FileIdArray: slicing rows gives views of the matrix, taking rows copies
+only those rows, and a File ID string is decoded only when it is read.
+
+The app switches to this layout for catalogs of COMPACT_CATALOG_MIN_ROWS
+rows or more. benchmarks/bench_compact_catalog.py compares the memory.
+"""
+import base64
+import binascii
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import ExtensionArray, ExtensionDtype, register_extension_dtype
+
+import shared_arrays
+from shared_index import arrow_column
+
+COMPACT_CATALOG_MIN_ROWS = int(os.environ.get("COMPACT_CATALOG_MIN_ROWS", 50_000))
+CATEGORY_MAX_FRACTION = 0.5  # Text columns with fewer distinct values than this share of rows become categoricals
+
+DECODED, VERBATIM, MISSING = 0, 1, 2
+
+
+def encode_file_id(value):
+    """``(raw bytes, kind)`` for one File ID."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return b"", MISSING
+    text = str(value)
+    try:
+        raw = base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+        if base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii") == text:
+            return raw, DECODED
+    except (ValueError, binascii.Error):
+        pass
+    return text.encode("utf-8"), VERBATIM
+
+
+def decode_file_id(raw, kind):
+    if kind == DECODED:
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+    if kind == VERBATIM:
+        return raw.decode("utf-8")
+    return np.nan
+
+
+@register_extension_dtype
+class FileIdDtype(ExtensionDtype):
+    """Dtype of FileIdArray; values read back as ``str``."""
+
+    name = "file_id"
+    type = str
+    kind = "O"
+    na_value = np.nan
+
+    @classmethod
+    def construct_array_type(cls):
+        return FileIdArray
+
+
+class FileIdArray(ExtensionArray):
+    """File IDs as raw bytes in a fixed-width matrix (``ids``), with ``lengths`` and ``kinds`` per row."""
+
+    def __init__(self, ids, lengths, kinds):
+        self._ids = ids
+        self._lengths = lengths
+        self._kinds = kinds
+
+    @classmethod
+    def from_strings(cls, values):
+        raws, kinds = zip(*[encode_file_id(value) for value in values]) if len(values) else ((), ())
+        lengths = np.fromiter(map(len, raws), dtype=np.int64, count=len(raws))
+        width = int(lengths.max()) if len(raws) else 0
+        ids = np.zeros((len(raws), width), dtype=np.uint8)
+        # Row-major order of the mask matches the order of the joined bytes
+        ids[np.arange(width) < lengths[:, None]] = np.frombuffer(b"".join(raws), dtype=np.uint8)
+        return cls(ids, lengths.astype(np.uint16 if width < 2 ** 16 else np.uint32),
+                   np.asarray(kinds, dtype=np.uint8))
+
+    @classmethod
+    def _from_sequence(cls, scalars, *, dtype=None, copy=False):
+        return cls.from_strings(scalars)
+
+    @classmethod
+    def _from_factorized(cls, values, original):
+        return cls.from_strings(values)
+
+    @property
+    def dtype(self):
+        return FileIdDtype()
+
+    @property
+    def nbytes(self):
+        return self._ids.nbytes + self._lengths.nbytes + self._kinds.nbytes
+
+    def __len__(self):
+        return len(self._kinds)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return decode_file_id(self._ids[key, :self._lengths[key]].tobytes(), self._kinds[key])
+        if not isinstance(key, slice):
+            key = pd.api.indexers.check_array_indexer(self, key)
+        return type(self)(self._ids[key], self._lengths[key], self._kinds[key])
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def __array__(self, dtype=None, copy=None):
+        return np.array(list(self), dtype=dtype if dtype is not None else object)
+
+    def __eq__(self, other):
+        if isinstance(other, (pd.Series, pd.Index, pd.DataFrame)):
+            return NotImplemented
+        return np.asarray(self, dtype=object) == other
+
+    def isna(self):
+        return self._kinds == MISSING
+
+    def take(self, indices, allow_fill=False, fill_value=None):
+        indices = np.asarray(indices, dtype=np.intp)
+        if not allow_fill:
+            return type(self)(self._ids[indices], self._lengths[indices], self._kinds[indices])
+        if (indices < -1).any():
+            raise ValueError("indices must be >= -1 when allow_fill is True")
+        missing = indices == -1
+        if missing.all():
+            return type(self)(np.zeros((len(indices), self._ids.shape[1]), dtype=np.uint8),
+                              np.zeros(len(indices), dtype=self._lengths.dtype),
+                              np.full(len(indices), MISSING, dtype=np.uint8))
+        result = self.take(np.where(missing, 0, indices))
+        result._kinds[missing] = MISSING
+        return result
+
+    def copy(self):
+        return type(self)(self._ids.copy(), self._lengths.copy(), self._kinds.copy())
+
+    @classmethod
+    def _concat_same_type(cls, to_concat):
+        width = max((array._ids.shape[1] for array in to_concat), default=0)
+        ids = np.zeros((sum(len(array) for array in to_concat), width), dtype=np.uint8)
+        row = 0
+        for array in to_concat:
+            ids[row:row + len(array), :array._ids.shape[1]] = array._ids
+            row += len(array)
+        return cls(ids, np.concatenate([array._lengths for array in to_concat]),
+                   np.concatenate([array._kinds for array in to_concat]))
+
+
+def compact_column(series):
+    """Smallest exact representation of one non-ID column."""
+    if pd.api.types.is_bool_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype):
+        return series.array
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer").array
+    if pd.api.types.is_numeric_dtype(series):
+        return series.array
+    if series.nunique(dropna=True) <= CATEGORY_MAX_FRACTION * len(series):
+        return pd.Categorical(series)
+    data, offsets = shared_arrays.pack_strings(series.fillna("").astype(str).tolist())
+    return arrow_column(data, offsets)
+
+
+class CompactCatalog:
+    """One catalog in flat buffers; frame() and rows() are DataFrames over them."""
+
+    def __init__(self, file_ids, name_data, name_offsets, columns, order, index):
+        self.file_ids = file_ids          # FileIdArray
+        self.name_data = name_data        # UTF-8 bytes of every File Name, back to back
+        self.name_offsets = name_offsets  # int64, len(catalog) + 1
+        self.names = arrow_column(name_data, name_offsets)
+        self.columns = columns            # Other columns: name -> compact array
+        self.order = order                # Column order of the source DataFrame
+        self.index = index
+
+    @classmethod
+    def from_frame(cls, df):
+        """Compact a catalog DataFrame with 'File Name' and 'File ID' columns (values are kept exactly)."""
+        name_data, name_offsets = shared_arrays.pack_strings(df['File Name'].fillna('').astype(str).tolist())
+        file_ids = FileIdArray.from_strings(df['File ID'].tolist())
+        columns = {col: compact_column(df[col]) for col in df.columns if col not in ('File Name', 'File ID')}
+        return cls(file_ids, name_data, name_offsets, columns, list(df.columns), df.index)
+
+    def __len__(self):
+        return len(self.file_ids)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the buffers (the index excluded, as it is shared with the source frame)."""
+        return (self.file_ids.nbytes + self.name_data.nbytes + self.name_offsets.nbytes
+                + sum(column.nbytes for column in self.columns.values()))
+
+    def _column(self, col):
+        if col == 'File Name':
+            return self.names
+        if col == 'File ID':
+            return self.file_ids
+        return self.columns[col]
+
+    def frame(self):
+        """The whole catalog as a DataFrame whose columns are the buffers themselves (no copies)."""
+        return pd.DataFrame({col: self._column(col) for col in self.order}, index=self.index, copy=False)
+
+    def rows(self, positions):
+        """Rows by position: a slice gives views of the buffers, a list copies only those rows."""
+        if isinstance(positions, slice):
+            return pd.DataFrame({col: self._column(col)[positions] for col in self.order},
+                                index=self.index[positions], copy=False)
+        positions = np.asarray(positions, dtype=np.intp)
+        return pd.DataFrame({col: self._column(col).take(positions) for col in self.order},
+                            index=self.index.take(positions), copy=False)
+
+    def file_id(self, position):
+        return self.file_ids[position]
+
+    def name(self, position):
+        start, end = self.name_offsets[position], self.name_offsets[position + 1]
+        return self.name_data[start:end].tobytes().decode('utf-8')
+
+
+def compact_frame(df, min_rows=COMPACT_CATALOG_MIN_ROWS):
+    """``df`` in the compact layout if it has at least ``min_rows`` rows, else ``df`` itself."""
+    if len(df) < min_rows or 'File Name' not in df.columns or 'File ID' not in df.columns:
+        return df
+    return CompactCatalog.from_frame(df).frame()
@@ -0,0 +1,171 @@
+"""
+Full-text index over the first pages of every indexed PDF.
+
+Offline pipeline (python content_index.py):
+1. Reads master_index.csv and skips File IDs already in content_index/texts.jsonl
+2. Downloads each new PDF once on a thread pool (Telegram is I/O bound)
+3. Extracts the text of the first FIRST_PAGES pages in a process pool (CPU bound)
+4. Appends the text to texts.jsonl and rebuilds the BM25 index (index.npz)
+
+Re-running only processes File IDs that are new since the last run. The app
+loads index.npz and fuzzy_search blends content hits into its ranking, so a
+file named "1754129155_Grade12_1sttermtest_kandyhighschool.pdf" can still
+match "chemistry".
+
+Requires pypdf and TELEGRAM_BOT_TOKEN (env var or .streamlit/secrets.toml).
+"""
+import argparse
+import io
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from bm25 import BM25Index
+from bulk_download import iter_completed_downloads
+from search import tokenize
+from sources import SourceRouter, load_sources
+from telegram_download import get_telegram_file_content, load_bot_token
+
+CONTENT_INDEX_DIR = 'content_index'
+TEXTS_FILE = os.path.join(CONTENT_INDEX_DIR, 'texts.jsonl')
+INDEX_FILE = os.path.join(CONTENT_INDEX_DIR, 'index.npz')
+FIRST_PAGES = 3
+MAX_TEXT_CHARS = 20000  # Cap per document so one huge scan can't dominate the index
+DOWNLOAD_WORKERS = 8
+
+
+def extract_text(pdf_bytes, first_pages=FIRST_PAGES):
+    """Extract text from the first pages of a PDF.
+
+    Runs in a worker process. Returns ``(text, pages, cpu_seconds)``;
+    unreadable or image-only PDFs give an empty text.
+    """
+    start = time.process_time()
+    try:
+        from pypdf import PdfReader
+
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        pages = reader.pages[:first_pages]
+        text = "\n".join((page.extract_text() or "") for page in pages)
+        page_count = len(pages)
+    except Exception:
+        text, page_count = "", 0
+    return text[:MAX_TEXT_CHARS], page_count, time.process_time() - start
+
+
+def load_texts(path=TEXTS_FILE):
+    """Return ``{file_id: text}`` for every document processed so far."""
+    texts = {}
+    if not os.path.exists(path):
+        return texts
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn last line from an interrupted run
+            texts[record["file_id"]] = record.get("text", "")
+    return texts
+
+
+def build_index(texts):
+    """Build a BM25 index keyed by File ID."""
+    file_ids = list(texts)
+    return BM25Index.build(file_ids, [tokenize(texts[file_id]) for file_id in file_ids])
+
+
+def load_content_index(path=INDEX_FILE):
+    """Load the saved content index, or None if the pipeline has not run yet."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return BM25Index.load(path)
+    except Exception:
+        return None
+
+
+def run_pipeline(csv_path='master_index.csv', workers=None, first_pages=FIRST_PAGES, limit=None):
+    bot_token = load_bot_token()
+    if not bot_token:
+        print("❌ TELEGRAM_BOT_TOKEN not set (environment or .streamlit/secrets.toml)")
+        return
+
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(CONTENT_INDEX_DIR, exist_ok=True)
+
+    df = pd.read_csv(csv_path)
+    df.columns = df.columns.str.strip()
+    texts = load_texts()
+    new_ids = [fid for fid in dict.fromkeys(df['File ID'].astype(str).str.strip()) if fid and fid not in texts]
+    if limit:
+        new_ids = new_ids[:limit]
+
+    print(f"📚 {len(texts)} documents already indexed, {len(new_ids)} new")
+
+    extracted = failed = pages = 0
+    cpu_seconds = 0.0
+    start = time.perf_counter()
+
+    if new_ids:
+        router = SourceRouter(load_sources(), df, default_bot_token=bot_token)
+        fetch = lambda file_id: get_telegram_file_content(file_id, bot_token, source=router.source_for(file_id))
+        with ProcessPoolExecutor(max_workers=workers) as pool, open(TEXTS_FILE, 'a', encoding='utf-8') as out:
+            in_flight = {}
+
+            def collect(done):
+                nonlocal extracted, pages, cpu_seconds
+                for future in done:
+                    file_id = in_flight.pop(future)
+                    text, page_count, seconds = future.result()
+                    out.write(json.dumps({"file_id": file_id, "pages": page_count, "text": text}, ensure_ascii=False) + "\n")
+                    texts[file_id] = text
+                    extracted += 1
+                    pages += page_count
+                    cpu_seconds += seconds
+                out.flush()
+                print(f"📝 {extracted}/{len(new_ids)} extracted", end='\r')
+
+            # File IDs double as names so results can be matched back to their ID
+            for file_id, content, error in iter_completed_downloads(
+                    [(fid, fid) for fid in new_ids], fetch, max_workers=DOWNLOAD_WORKERS):
+                if error:
+                    failed += 1
+                    continue
+                in_flight[pool.submit(extract_text, content, first_pages)] = file_id
+                # Keep the number of PDFs waiting in memory bounded
+                if len(in_flight) >= workers * 2:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+
+    elapsed = time.perf_counter() - start
+    index = build_index(texts)
+    index.save(INDEX_FILE)
+
+    print(f"\n\n✅ Indexed {len(index)} documents ({len(index.terms)} terms) -> {INDEX_FILE}")
+    if extracted:
+        print(f"⏱️  {extracted} new documents, {pages} pages in {elapsed:.1f}s with {workers} workers")
+        print(f"   {extracted / elapsed:.2f} docs/s overall, {extracted / elapsed / workers:.2f} docs/s per core")
+        if cpu_seconds:
+            print(f"   {pages / cpu_seconds:.1f} pages per CPU-second of extraction")
+    if failed:
+        print(f"⚠️  {failed} downloads failed; they will be retried on the next run")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the full-text content index for the vault.")
+    parser.add_argument("--csv", default='master_index.csv', help="index CSV to read File IDs from")
+    parser.add_argument("--workers", type=int, default=None, help="extraction processes (default: CPU count)")
+    parser.add_argument("--pages", type=int, default=FIRST_PAGES, help="pages of text to extract per PDF")
+    parser.add_argument("--limit", type=int, default=None, help="only process this many new files")
+    args = parser.parse_args()
+    run_pipeline(args.csv, workers=args.workers, first_pages=args.pages, limit=args.limit)
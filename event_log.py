@@ -0,0 +1,154 @@
+"""
+Append-only log of searches and downloads, written behind the request path.
+
+EventLog.record() only appends a dict to an in-memory buffer under a lock; a
+background thread drains the buffer every FLUSH_INTERVAL seconds (or sooner
+once FLUSH_BATCH events are waiting) and writes the whole batch to
+EVENT_LOG_FILE as JSON lines with a single write. A slow disk therefore never
+delays a search. If the writer falls behind, the oldest buffered events are
+dropped (and counted) rather than growing without bound.
+
+    {"ts": 1760000000.1, "kind": "search", "query": "chem 2024", "key": "2024 chemistry",
+     "filters": {"medium": ["english"]}, "results": 12}
+    {"ts": 1760000003.4, "kind": "download", "file_id": "BQAC...", "ok": true, "ms": 840}
+
+The app replays the most frequent recent searches and downloads at startup
+(top_searches / top_downloads) so the first visitors after a restart hit warm
+caches. python event_log.py prints the same report, including the searches
+that found nothing.
+"""
+import argparse
+import atexit
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+
+EVENT_LOG_FILE = os.environ.get("EVENT_LOG_FILE", os.path.join(".cache", "events.jsonl"))
+FLUSH_INTERVAL = 2.0      # Seconds between background flushes
+FLUSH_BATCH = 500         # Flush early once this many events are buffered
+MAX_BUFFERED = 50_000     # Drop the oldest events beyond this
+RECENT_BYTES = 8 << 20    # How much of the log's tail counts as "recent"
+REPLAY_SEARCHES = 20      # Searches replayed into the result cache at startup
+REPLAY_DOWNLOADS = 20     # Files fetched into the PDF cache at startup
+
+
+class EventLog:
+    def __init__(self, path=EVENT_LOG_FILE, flush_interval=FLUSH_INTERVAL, flush_batch=FLUSH_BATCH,
+                 max_buffered=MAX_BUFFERED):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.dropped = 0
+        self._buffer = deque(maxlen=max_buffered)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, kind, **fields):
+        """Buffer one event; never touches the disk."""
+        event = {"ts": time.time(), "kind": kind, **fields}
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(event)
+            pending = len(self._buffer)
+        if pending >= self.flush_batch:
+            self._wake.set()
+
+    def flush(self):
+        """Write everything buffered so far (called by the writer thread and on exit)."""
+        with self._write_lock:
+            with self._lock:
+                events = list(self._buffer)
+                self._buffer.clear()
+            if not events:
+                return 0
+            data = "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events)
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(data)
+            except OSError as e:
+                print(f"⚠️ Could not write event log: {str(e)}")
+                with self._lock:
+                    self.dropped += len(events)
+                return 0
+            return len(events)
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        self.flush()
+
+
+def read_recent(path=EVENT_LOG_FILE, max_bytes=RECENT_BYTES):
+    """Events from the last ``max_bytes`` of the log, oldest first."""
+    try:
+        with open(path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - max_bytes))
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    lines = data.split(b"\n")
+    if size > max_bytes:
+        lines = lines[1:]  # Started mid-line
+    events = []
+    for line in lines:
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            continue  # Empty or torn line from an interrupted write
+    return events
+
+
+def top_searches(events, n, zero_results=False):
+    """Most frequent (canonical query, filters) pairs; only empty ones with ``zero_results``."""
+    counts = Counter()
+    for event in events:
+        if event.get("kind") != "search" or not event.get("key"):
+            continue
+        if zero_results != (event.get("results") == 0):
+            continue
+        counts[(event["key"], json.dumps(event.get("filters") or {}, sort_keys=True))] += 1
+    return [(key, json.loads(filters), count) for (key, filters), count in counts.most_common(n)]
+
+
+def top_downloads(events, n):
+    """Most frequently downloaded File IDs (successful downloads only; all of them if n is None)."""
+    counts = Counter(event["file_id"] for event in events
+                     if event.get("kind") == "download" and event.get("ok") and event.get("file_id"))
+    return counts.most_common(n)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize the search and download event log.")
+    parser.add_argument("--log", default=EVENT_LOG_FILE, help="event log file")
+    parser.add_argument("--top", type=int, default=20, help="rows per table")
+    args = parser.parse_args()
+
+    events = read_recent(args.log, max_bytes=os.path.getsize(args.log) if os.path.exists(args.log) else 0)
+    searches = sum(1 for event in events if event.get("kind") == "search")
+    downloads = sum(1 for event in events if event.get("kind") == "download")
+    print(f"📊 {len(events)} events: {searches} searches, {downloads} downloads")
+
+    for title, rows in [("Top searches", top_searches(events, args.top)),
+                        ("Searches with no results", top_searches(events, args.top, zero_results=True))]:
+        print(f"\n{title}:")
+        for key, filters, count in rows:
+            print(f"  {count:6d}  {key}" + (f"  {filters}" if filters else ""))
+    print("\nTop downloads:")
+    for file_id, count in top_downloads(events, args.top):
+        print(f"  {count:6d}  {file_id[:40]}...")
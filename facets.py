@@ -0,0 +1,159 @@
+"""
+Faceted filtering backed by bitmap indexes.
+
+Every facet value (subject "chemistry", medium "tamil", year 2021, ...) owns a
+bitset over the catalog rows, stored as a Python int with bit ``i`` set when
+row ``i`` has that value. Filtering is an OR of the selected values inside a
+facet and an AND across facets; facet counts are popcounts of
+``value_bitmap & selection`` -- big-int operations that run word-at-a-time in
+C instead of looping over rows.
+"""
+import re
+
+import numpy as np
+
+from search import DOC_TYPES, YEAR_PATTERN, normalize_text
+from taxonomy import classify
+
+FACETS = ['subject', 'level', 'medium', 'doc_type', 'year', 'grade', 'term']
+FACET_LABELS = {
+    'subject': 'Subject',
+    'level': 'Level',
+    'medium': 'Medium',
+    'doc_type': 'Document Type',
+    'year': 'Year',
+    'grade': 'Grade',
+    'term': 'Term',
+}
+
+DOC_TYPE_VALUES = {
+    'marking': 'marking scheme',
+    'scheme': 'marking scheme',
+    'paper': 'paper',
+    'pastpaper': 'paper',
+    'past': 'paper',
+    'mcq': 'mcq',
+    'essay': 'essay',
+}
+TERM_VALUES = {'1': '1st term', 'first': '1st term', '2': '2nd term', 'second': '2nd term',
+               '3': '3rd term', 'third': '3rd term'}
+
+GRADE_PATTERN = re.compile(r'\b(?:grade|gr|g)\s*(\d{1,2})(?!\d)')
+TERM_PATTERN = re.compile(r'\b(1|2|3|first|second|third)(?:st|nd|rd)?\s*term')
+
+if hasattr(int, 'bit_count'):
+    def popcount(bitmap):
+        return bitmap.bit_count()
+else:  # Python < 3.10
+    def popcount(bitmap):
+        return bin(bitmap).count('1')
+
+
+def rows_to_bitmap(rows, size):
+    """Pack a list of row positions into an int bitmap in one pass."""
+    bits = np.zeros(size, dtype=np.uint8)
+    bits[np.asarray(rows, dtype=np.int64)] = 1
+    return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+
+def extract_facets(filename):
+    """Return ``{facet: set(values)}`` parsed from a filename."""
+    text = normalize_text(filename)
+    words = set(text.split())
+    subjects, mediums, levels = classify(words)
+    grades = {int(g) for g in GRADE_PATTERN.findall(text) if 1 <= int(g) <= 13}
+    return {
+        'subject': subjects,
+        'level': levels - {'grade'},
+        'medium': mediums,
+        'doc_type': {DOC_TYPE_VALUES[w] for w in words if w in DOC_TYPES},
+        'year': {int(y) for y in YEAR_PATTERN.findall(text)},
+        'grade': grades,
+        'term': {TERM_VALUES[t] for t in TERM_PATTERN.findall(text)},
+    }
+
+
+def parse_year_range(value):
+    """Parse "2019-2023" or "2021" into an inclusive (start, end) tuple, or None."""
+    years = [int(y) for y in re.findall(r'\d{4}', str(value or ''))]
+    if not years:
+        return None
+    return min(years), max(years)
+
+
+class FacetIndex:
+    def __init__(self, size, bitmaps):
+        self.size = size
+        self.bitmaps = bitmaps
+        self.all_rows = (1 << size) - 1
+
+    @classmethod
+    def build(cls, filenames):
+        """Precompute one bitmap per facet value over ``filenames`` (row order)."""
+        postings = {facet: {} for facet in FACETS}
+        size = 0
+        for row, filename in enumerate(filenames):
+            size += 1
+            for facet, values in extract_facets(filename).items():
+                for value in values:
+                    postings[facet].setdefault(value, []).append(row)
+
+        bitmaps = {facet: {} for facet in FACETS}
+        for facet, values in postings.items():
+            for value, rows in values.items():
+                bitmaps[facet][value] = rows_to_bitmap(rows, size)
+        return cls(size, bitmaps)
+
+    def values(self, facet):
+        """Facet values sorted for display (years newest first)."""
+        return sorted(self.bitmaps[facet], reverse=(facet == 'year'))
+
+    def year_bounds(self):
+        years = self.bitmaps['year']
+        return (min(years), max(years)) if years else None
+
+    def facet_bitmap(self, facet, selected):
+        """OR of the selected values' bitmaps (a (start, end) tuple for years)."""
+        facet_bitmaps = self.bitmaps[facet]
+        bitmap = 0
+        if facet == 'year':
+            start, end = selected
+            for year, year_bitmap in facet_bitmaps.items():
+                if start <= year <= end:
+                    bitmap |= year_bitmap
+        else:
+            for value in selected:
+                bitmap |= facet_bitmaps.get(value, 0)
+        return bitmap
+
+    def select(self, filters, exclude=None):
+        """AND the active facets together; ``exclude`` leaves one facet out."""
+        bitmap = self.all_rows
+        for facet, selected in filters.items():
+            if facet == exclude or not selected:
+                continue
+            bitmap &= self.facet_bitmap(facet, selected)
+        return bitmap
+
+    def counts(self, filters):
+        """Live per-value counts for every facet.
+
+        Each facet is counted against the selection made by the *other*
+        facets, so picking "chemistry" still shows how many physics papers
+        the same year range would give.
+        """
+        result = {}
+        for facet in FACETS:
+            others = self.select(filters, exclude=facet)
+            result[facet] = {
+                value: popcount(value_bitmap & others)
+                for value, value_bitmap in self.bitmaps[facet].items()
+            }
+        return result
+
+    def rows(self, bitmap):
+        """Row positions whose bit is set, as a NumPy array."""
+        if not bitmap:
+            return np.empty(0, dtype=np.int64)
+        raw = np.frombuffer(bitmap.to_bytes((self.size + 7) // 8, 'little'), dtype=np.uint8)
+        return np.flatnonzero(np.unpackbits(raw, bitorder='little')[:self.size])
@@ -0,0 +1,209 @@
+"""
+Local stand-in for the Telegram Bot API with fault injection.
+
+Serves ``/bot<token>/getFile`` and ``/file/bot<token>/<path>`` from an
+in-memory dict of File ID -> bytes, and can be told to add latency, fail a
+fraction of requests with 5xx or 429, or make the next few getFile calls
+slow. Used by the tests; point TelegramDownloader(api_base=fake.base_url) at it.
+
+    with FakeBotAPI(files={"id1": b"%PDF-1.4 ..."}) as fake:
+        downloader = TelegramDownloader(api_base=fake.base_url)
+
+With ``file_size`` set, every other File ID is served as a synthetic PDF of
+that many bytes (or a size drawn per File ID from a (min, max) range), so the
+real catalog can be exercised without real files. Run it standalone to point
+the app or the load test at it:
+
+    python fake_bot_api.py --port 8081 --latency 0.2 --error-rate 0.02 --file-size 200000-2000000
+    TELEGRAM_API_BASE=http://127.0.0.1:8081 streamlit run app.py
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BOT_API_MAX_FILE_SIZE = 20 * 1024 * 1024
+
+
+class FakeBotAPI:
+    def __init__(self, files=None, latency=0.0, error_rate=0.0, rate_limit_rate=0.0, seed=None,
+                 file_size=None, port=0):
+        self.files = dict(files or {})
+        self.file_size = file_size
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.request_count = 0
+        self.getfile_count = 0
+        self._slow_getfile = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def slow_next_getfile(self, count, delay):
+        """Delay the next ``count`` getFile requests by ``delay`` seconds each."""
+        with self._lock:
+            self._slow_getfile.extend([delay] * count)
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                fake._handle(self)
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # Request handling
+
+    def _content(self, file_id):
+        """Registered bytes for a File ID, else a synthetic PDF if file_size is set."""
+        content = self.files.get(file_id)
+        if content is not None or not self.file_size or not file_id:
+            return content
+        size = self.file_size
+        if isinstance(size, tuple):
+            low, high = size
+            seed = int.from_bytes(hashlib.sha256(file_id.encode("utf-8")).digest()[:8], "little")
+            size = low + seed % (high - low + 1)
+        header = b"%PDF-1.4\n%" + file_id.encode("utf-8")[:64] + b"\n"
+        return (header + b"0" * size)[:size]
+
+    def _inject_fault(self, handler, is_getfile):
+        """Apply latency / error injection; return True if a fault response was sent."""
+        with self._lock:
+            self.request_count += 1
+            extra_delay = 0.0
+            if is_getfile:
+                self.getfile_count += 1
+                if self._slow_getfile:
+                    extra_delay = self._slow_getfile.pop(0)
+            roll = self._random.random()
+
+        time.sleep(self.latency + extra_delay)
+
+        if roll < self.error_rate:
+            self._send_json(handler, 502, {"ok": False, "error_code": 502, "description": "Bad Gateway"})
+            return True
+        if roll < self.error_rate + self.rate_limit_rate:
+            self._send_json(handler, 429, {
+                "ok": False,
+                "error_code": 429,
+                "description": "Too Many Requests: retry after 1",
+                "parameters": {"retry_after": 1}
+            })
+            return True
+        return False
+
+    def _handle(self, handler):
+        url = urlparse(handler.path)
+        parts = url.path.strip("/").split("/")
+
+        if len(parts) == 2 and parts[0].startswith("bot") and parts[1] == "getFile":
+            if self._inject_fault(handler, is_getfile=True):
+                return
+            file_id = parse_qs(url.query).get("file_id", [""])[0]
+            self._get_file(handler, file_id)
+        elif len(parts) >= 3 and parts[0] == "file" and parts[1].startswith("bot"):
+            if self._inject_fault(handler, is_getfile=False):
+                return
+            self._download(handler, "/".join(parts[2:]))
+        else:
+            self._send_json(handler, 404, {"ok": False, "error_code": 404, "description": "Not Found"})
+
+    def _get_file(self, handler, file_id):
+        content = self._content(file_id)
+        if content is None:
+            self._send_json(handler, 400, {
+                "ok": False,
+                "error_code": 400,
+                "description": "Bad Request: wrong file_id or the file is temporarily unavailable"
+            })
+        elif len(content) > BOT_API_MAX_FILE_SIZE:
+            self._send_json(handler, 400, {"ok": False, "error_code": 400, "description": "Bad Request: file is too big"})
+        else:
+            self._send_json(handler, 200, {"ok": True, "result": {
+                "file_id": file_id,
+                "file_unique_id": file_id[-16:],
+                "file_size": len(content),
+                "file_path": f"documents/{file_id}.pdf"
+            }})
+
+    def _download(self, handler, file_path):
+        file_id = file_path.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+        content = self._content(file_id)
+        if content is None:
+            handler.send_response(404)
+            handler.end_headers()
+            return
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/pdf")
+        handler.send_header("Content-Length", str(len(content)))
+        handler.end_headers()
+        handler.wfile.write(content)
+
+    @staticmethod
+    def _send_json(handler, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+def parse_size(value):
+    """"500000" -> 500000, "200000-2000000" -> (200000, 2000000)."""
+    low, _, high = str(value).partition("-")
+    return (int(low), int(high)) if high else int(low)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake Telegram Bot API with fault injection.")
+    parser.add_argument("--port", type=int, default=8081, help="port to listen on (127.0.0.1)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 502")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--file-size", type=parse_size, default=(100_000, 2_000_000),
+                        help="bytes per synthetic PDF, or a MIN-MAX range")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for fault injection")
+    args = parser.parse_args()
+
+    fake = FakeBotAPI(latency=args.latency, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                      seed=args.seed, file_size=args.file_size, port=args.port).start()
+    print(f"🤖 Fake Bot API listening on {fake.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
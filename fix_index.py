@@ -8,12 +8,21 @@ On first run, you'll be prompted to:
 1. Enter your phone number
 2. Enter the verification code sent to Telegram
 3. Enter your 2FA password (if enabled)
+
+Export mode (python fix_index.py --export):
+Asks Telegram for document messages only, streams rows to EXPORT_CSV in
+batches and checkpoints the last processed message id after every batch.
+Re-running the same command resumes from the checkpoint; pass --reset to
+start over. Add --takeout to run the export inside a takeout session, which
+Telegram rate-limits far less aggressively for bulk history reads.
 """
 import os
+import argparse
 import pandas as pd
-import asyncio
 from telethon import TelegramClient, utils
 
+import channel_export
+
 # --- CONFIGURATION ---
 API_ID = 38232860 
 API_HASH = '551f7b73f63908e8753aa13adc33559d'
@@ -25,10 +34,46 @@ CHANNEL = '@examlanka'  # Channel username (with @)
 INPUT_CSV = 'master_index.csv'
 OUTPUT_CSV = 'master_index_final.csv'
 
+# Export mode settings
+EXPORT_CSV = 'master_index_export.csv'
+CHECKPOINT_FILE = 'master_index_export.checkpoint.json'
+BATCH_SIZE = 200  # Rows buffered before each flush + checkpoint
+EXPORT_COLUMNS = ["File Name", "File ID", "Message ID"]
+
 # Use a different session name to avoid bot token session
 client = TelegramClient('user_session', API_ID, API_HASH)
 
-async def main():
+async def export_documents(source, entity, reset=False):
+    """Stream every document in the channel to EXPORT_CSV with resumable checkpoints.
+
+    Messages are requested oldest-first with a server-side document filter,
+    so Telegram only returns messages that carry a file and ``min_id`` lets a
+    resumed run skip everything that is already on disk.
+    """
+    if reset:
+        for path in (EXPORT_CSV, CHECKPOINT_FILE):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def row(message):
+        return {
+            "File Name": message.file.name if message.file.name else f"file_{message.id}.pdf",
+            "File ID": utils.pack_bot_file_id(message.document),
+            "Message ID": message.id,
+        }
+
+    def progress(rows_written, last_message_id):
+        print(f"💾 {rows_written} rows exported (checkpoint: message {last_message_id})", end='\r')
+
+    rows_written, _, last_message_id = await channel_export.export_documents(
+        source, entity, EXPORT_CSV, CHECKPOINT_FILE, EXPORT_COLUMNS, row, label="Export",
+        progress=progress, batch_size=BATCH_SIZE)
+
+    print(f"\n\n✅ Export complete: {rows_written} documents in '{EXPORT_CSV}'")
+    print(f"📍 Checkpoint at message {last_message_id} - re-run to pick up new uploads.")
+
+
+async def main(args):
     print("=" * 60)
     print("IMPORTANT: Enter your PHONE NUMBER, NOT the bot token!")
     print("Format: +1234567890 (with country code)")
@@ -90,6 +135,15 @@ async def main():
         print(f"\n   Current CHANNEL setting: {CHANNEL}")
         return
     
+    if args.export:
+        if args.takeout:
+            # Takeout sessions get much higher limits for bulk history export
+            async with client.takeout(finalize=True, channels=True) as takeout:
+                await export_documents(takeout, entity, reset=args.reset)
+        else:
+            await export_documents(client, entity, reset=args.reset)
+        return
+
     print("Fetching Bot-API compatible IDs from your channel...")
     print("This may take a while if the channel has many messages...\n")
     
@@ -131,5 +185,15 @@ async def main():
         print("   - The channel has messages with documents")
         print("   - Your bot has access to the channel")
 
-with client:
-    client.loop.run_until_complete(main())
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild master_index.csv with Bot API file IDs.")
+    parser.add_argument("--export", action="store_true",
+                        help="resumable, document-only export with batched writes and checkpoints")
+    parser.add_argument("--takeout", action="store_true",
+                        help="run the export inside a takeout session (higher rate limits)")
+    parser.add_argument("--reset", action="store_true",
+                        help="discard any previous export and checkpoint before starting")
+    args = parser.parse_args()
+
+    with client:
+        client.loop.run_until_complete(main(args))
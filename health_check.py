@@ -0,0 +1,185 @@
+"""
+File ID health checker.
+
+python health_check.py calls getFile for every File ID in master_index.csv,
+on a bounded thread pool behind a rate limiter, and records the outcome:
+
+    ok       Telegram resolved the ID (file size and file_path recorded)
+    large    the ID is valid but over the 20 MB Bot API limit (MTProto needed)
+    dead     Telegram answered 400 "wrong file_id" or "file reference expired"
+
+Each result is appended to HEALTH_FILE as it completes, so an interrupted run
+resumes with the IDs not checked yet. Any other failure (timeouts, 5xx, 429,
+unexpected replies) is retried a few times and then left unrecorded, so the
+ID keeps its previous health and is checked again on the next run. A 401 or
+403 means the bot token itself was rejected: the run stops without touching
+the CSV. Results older than --max-age days are checked again.
+
+When the run ends, the Health column of the CSV is rewritten. The app hides
+rows whose Health is "dead" (see search.visible_rows). Rows that were never
+checked have an empty Health and are treated as alive.
+"""
+import argparse
+import json
+import os
+import time
+
+import pandas as pd
+
+from bulk_download import iter_completed_downloads
+from resilience import RateLimiter
+from sources import SourceRouter, load_sources
+from telegram_download import TELEGRAM_API_BASE, TelegramDownloader, is_file_too_big, load_bot_token
+
+HEALTH_FILE = 'file_health.jsonl'
+HEALTH_COLUMN = 'Health'
+HEALTH_WORKERS = 16
+HEALTH_RATE = 25.0  # getFile calls per second across all workers
+MAX_AGE_DAYS = 30
+HEALTH_RETRIES = 3  # Attempts per ID for transient failures
+DEAD_DESCRIPTIONS = ("wrong file_id", "file reference expired")
+AUTH_ERROR_CODES = (401, 403)
+
+
+def load_health(path=HEALTH_FILE):
+    """Return ``{file_id: record}`` with the latest result per File ID."""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn last line from an interrupted run
+            results[record["file_id"]] = record
+    return results
+
+
+def classify(result):
+    """Map a getFile reply to a health record (without file_id / checked_at).
+
+    Returns None when the reply says nothing about the ID itself (rate
+    limits, server or token errors), so its previous health is kept.
+    """
+    if result.get("ok"):
+        info = result.get("result", {})
+        return {"status": "ok", "file_size": info.get("file_size"), "file_path": info.get("file_path")}
+    if is_file_too_big(result):
+        return {"status": "large", "file_size": None, "file_path": None}
+    description = str(result.get("description", ""))
+    if result.get("error_code") == 400 and any(text in description.lower() for text in DEAD_DESCRIPTIONS):
+        return {"status": "dead", "error_code": 400, "description": description}
+    return None
+
+
+def is_auth_error(result):
+    """True if getFile rejected the bot token rather than the File ID."""
+    return not result.get("ok") and result.get("error_code") in AUTH_ERROR_CODES
+
+
+def write_health_column(csv_path, results):
+    """Rewrite the CSV with a Health column taken from ``results`` (atomically)."""
+    df = pd.read_csv(csv_path)
+    df.columns = df.columns.str.strip()
+    id_col = next((col for col in df.columns if 'file' in col.lower() and 'id' in col.lower()), df.columns[1])
+    df[HEALTH_COLUMN] = [results.get(str(fid).strip(), {}).get("status", "")
+                         for fid in df[id_col]]
+    tmp_path = csv_path + '.tmp'
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, csv_path)
+    return df[HEALTH_COLUMN].value_counts().to_dict()
+
+
+def run_health_check(csv_path='master_index.csv', health_path=HEALTH_FILE, workers=HEALTH_WORKERS,
+                     rate=HEALTH_RATE, max_age_days=MAX_AGE_DAYS, limit=None, api_base=TELEGRAM_API_BASE):
+    """Check the IDs due for a check; returns False if the run could not finish."""
+    bot_token = load_bot_token()
+    if not bot_token:
+        print("❌ TELEGRAM_BOT_TOKEN not set (environment or .streamlit/secrets.toml)")
+        return False
+
+    df = pd.read_csv(csv_path)
+    df.columns = df.columns.str.strip()
+    id_col = next((col for col in df.columns if 'file' in col.lower() and 'id' in col.lower()), df.columns[1])
+    file_ids = [fid for fid in dict.fromkeys(df[id_col].astype(str).str.strip()) if fid and fid != 'nan']
+
+    results = load_health(health_path)
+    cutoff = time.time() - max_age_days * 86400
+    todo = [fid for fid in file_ids if fid not in results or results[fid]["checked_at"] < cutoff]
+    if limit:
+        todo = todo[:limit]
+    print(f"🩺 {len(file_ids)} File IDs, {len(file_ids) - len(todo)} checked recently, {len(todo)} to check")
+
+    downloader = TelegramDownloader(api_base=api_base, hedge=False)
+    limiter = RateLimiter(rate, burst=workers)
+    # Partner channels' papers are only visible to their own bot
+    router = SourceRouter(load_sources(), df, default_bot_token=bot_token)
+
+    auth_errors = []
+
+    def check(file_id):
+        error = None
+        for attempt in range(HEALTH_RETRIES):
+            if auth_errors:
+                return None, auth_errors[0]
+            if attempt:
+                time.sleep(2 ** attempt)
+            limiter.acquire()
+            result, error = downloader.get_file(file_id, router.bot_token(file_id, bot_token))
+            if error:
+                continue
+            if is_auth_error(result):
+                auth_errors.append(f"❌ Telegram rejected the bot token ({result.get('error_code')}): "
+                                   f"{result.get('description', 'Unknown error')}")
+                return None, auth_errors[0]
+            record = classify(result)
+            if record is not None:
+                return record, None
+            error = f"❌ Telegram API error ({result.get('error_code', 'N/A')}): {result.get('description', '')}"
+        return None, error
+
+    counts = {"ok": 0, "large": 0, "dead": 0, "retry": 0}
+    start = time.perf_counter()
+    with open(health_path, 'a', encoding='utf-8') as out:
+        for done, (file_id, record, error) in enumerate(
+                iter_completed_downloads([(fid, fid) for fid in todo], check, max_workers=workers), 1):
+            if auth_errors:
+                break
+            if error:
+                counts["retry"] += 1
+            else:
+                record = {"file_id": file_id, "checked_at": time.time(), **record}
+                results[file_id] = record
+                counts[record["status"]] += 1
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+            if done % 50 == 0 or done == len(todo):
+                elapsed = time.perf_counter() - start
+                print(f"🩺 {done}/{len(todo)}  ok {counts['ok']}  large {counts['large']}  dead {counts['dead']}  "
+                      f"retry {counts['retry']}  ({done / elapsed:.1f} IDs/s)", end='\r')
+
+    if auth_errors:
+        print(f"\n\n{auth_errors[0]}")
+        print(f"Stopped without changing {csv_path}; fix the token and run again.")
+        return False
+
+    health_counts = write_health_column(csv_path, results)
+    print(f"\n\n✅ Wrote {HEALTH_COLUMN} column to {csv_path}: "
+          + ", ".join(f"{status or 'unchecked'} {count}" for status, count in health_counts.items()))
+    if counts["retry"]:
+        print(f"⚠️  {counts['retry']} IDs hit transient errors; run again to retry them")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check every File ID in the index against Telegram.")
+    parser.add_argument("--csv", default='master_index.csv', help="index CSV to check and annotate")
+    parser.add_argument("--workers", type=int, default=HEALTH_WORKERS, help="concurrent getFile calls")
+    parser.add_argument("--rate", type=float, default=HEALTH_RATE, help="getFile calls per second")
+    parser.add_argument("--max-age", type=float, default=MAX_AGE_DAYS, help="re-check results older than this many days")
+    parser.add_argument("--limit", type=int, default=None, help="only check this many IDs")
+    args = parser.parse_args()
+    ok = run_health_check(args.csv, workers=args.workers, rate=args.rate, max_age_days=args.max_age,
+                          limit=args.limit)
+    exit(0 if ok else 1)
@@ -0,0 +1,187 @@
+"""
+Process-wide budget for the PDF bytes held in sessions' download caches.
+
+Every session keeps the papers it prepared in st.session_state.download_cache
+so the Download button can serve them, and Streamlit keeps an idle session's
+state (and the media files of its last run) around for a while. A burst of
+students each preparing a few large papers can therefore exhaust the
+process's memory.
+
+Each session's download_cache is a SessionCache handed out by one
+MemoryGovernor per process. The governor counts every cached PDF together
+with the bytes in Streamlit's media file storage that are not already one
+of those PDFs. When the total goes over MEMORY_BUDGET_BYTES it evicts cached
+papers from any session. The victim is the paper with the largest
+size x idle time, so big papers nobody has touched for a while go first and a
+paper that was just prepared is never evicted for its own sake. An evicted
+paper only costs its session a new "Prepare Download" (served from the
+on-disk PDF cache or mirror).
+
+Only papers the governor can actually free are candidates. A cached paper
+that is also the content of a download button stays in media storage until
+its session reruns, so evicting it frees nothing; such papers, like the
+media files themselves, count toward the total but are never evicted.
+"""
+import os
+import threading
+import time
+import weakref
+
+MEMORY_BUDGET_BYTES = int(os.environ.get("MEMORY_BUDGET_BYTES", 512 * 1024 ** 2))
+
+
+def cached_content(value):
+    """The PDF bytes of a download_cache value, ``(content, error)``, or None."""
+    content = value[0] if isinstance(value, tuple) and value else value
+    return content if isinstance(content, (bytes, bytearray)) else None
+
+
+def cached_size(value):
+    """Bytes held by a download_cache value, ``(content, error)``."""
+    content = cached_content(value)
+    return len(content) if content is not None else 0
+
+
+class SessionCache(dict):
+    """One session's download cache; every change is reported to the governor."""
+
+    def __init__(self, governor):
+        super().__init__()
+        self.governor = governor
+
+    def __setitem__(self, key, value):
+        with self.governor.lock:
+            if dict.__contains__(self, key):
+                self.governor.release(self, key)
+            dict.__setitem__(self, key, value)
+            self.governor.charge(self, key, value)
+
+    def __getitem__(self, key):
+        with self.governor.lock:
+            value = dict.__getitem__(self, key)
+            self.governor.touch(self, key)
+            return value
+
+    def get(self, key, default=None):
+        with self.governor.lock:
+            if not dict.__contains__(self, key):
+                return default
+            return self[key]
+
+    def __delitem__(self, key):
+        with self.governor.lock:
+            dict.__delitem__(self, key)
+            self.governor.release(self, key)
+
+    def pop(self, key, *default):
+        with self.governor.lock:
+            if dict.__contains__(self, key):
+                self.governor.release(self, key)
+            return dict.pop(self, key, *default)
+
+    def clear(self):
+        with self.governor.lock:
+            for key in list(self):
+                self.governor.release(self, key)
+            dict.clear(self)
+
+
+class MemoryGovernor:
+    """Accounts for every session's cached PDFs and evicts across sessions to stay under ``budget``.
+
+    ``media_contents()`` returns the content objects in Streamlit's media
+    storage. Those that are cached PDFs are counted once, and those PDFs are
+    not evicted while a download button still holds them.
+    """
+
+    def __init__(self, budget=MEMORY_BUDGET_BYTES, media_contents=None, clock=time.monotonic):
+        self.budget = budget
+        self.media_contents = media_contents
+        self.clock = clock
+        self.lock = threading.RLock()
+        self.entries = {}  # (cache id, key) -> [size, last used, weakref to the cache, id of the content]
+        self.cached_bytes = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    def new_cache(self):
+        cache = SessionCache(self)
+        cache_id = id(cache)
+        # Sessions Streamlit has dropped must not keep their bytes on the books
+        weakref.finalize(cache, self._forget, cache_id)
+        return cache
+
+    def _forget(self, cache_id):
+        with self.lock:
+            for entry_key in [entry_key for entry_key in self.entries if entry_key[0] == cache_id]:
+                self.cached_bytes -= self.entries.pop(entry_key)[0]
+
+    def charge(self, cache, key, value):
+        with self.lock:
+            size = cached_size(value)
+            self.entries[(id(cache), key)] = [size, self.clock(), weakref.ref(cache), id(cached_content(value))]
+            self.cached_bytes += size
+            self.enforce(protect=(id(cache), key))
+
+    def touch(self, cache, key):
+        entry = self.entries.get((id(cache), key))
+        if entry is not None:
+            entry[1] = self.clock()
+
+    def release(self, cache, key):
+        entry = self.entries.pop((id(cache), key), None)
+        if entry is not None:
+            self.cached_bytes -= entry[0]
+
+    def media(self):
+        """``(bytes in media storage not already cached, ids of cached PDFs still on a download button)``."""
+        if self.media_contents is None:
+            return 0, set()
+        try:
+            contents = {id(content): content for content in self.media_contents()}
+        except Exception:
+            return 0, set()
+        with self.lock:
+            cached_ids = {entry[3] for entry in self.entries.values()}
+        media = sum(len(content) for content_id, content in contents.items() if content_id not in cached_ids)
+        return media, cached_ids & contents.keys()
+
+    def enforce(self, protect=None):
+        """Evict cached papers until the total is within budget; returns the bytes freed."""
+        freed = 0
+        with self.lock:
+            media, on_buttons = self.media()
+            while self.cached_bytes + media > self.budget:
+                now = self.clock()
+                # A paper still on a download button stays in media storage: evicting it frees nothing
+                candidates = [(size * (now - last_used + 1.0), entry_key)
+                              for entry_key, (size, last_used, _, content_id) in self.entries.items()
+                              if entry_key != protect and size and content_id not in on_buttons]
+                if not candidates:
+                    break  # Nothing left that eviction would free: keep serving what is held
+                _, victim = max(candidates, key=lambda candidate: candidate[0])
+                size, _, cache_ref, _ = self.entries.pop(victim)
+                self.cached_bytes -= size
+                cache = cache_ref()
+                if cache is not None:
+                    dict.pop(cache, victim[1], None)
+                self.evictions += 1
+                self.evicted_bytes += size
+                freed += size
+        return freed
+
+    def usage(self):
+        """Current accounting, for the admin panel and tests."""
+        with self.lock:
+            media, _ = self.media()
+            sessions = len({cache_id for cache_id, _ in self.entries})
+            return {
+                "budget": self.budget,
+                "cached": self.cached_bytes,
+                "media": media,
+                "total": self.cached_bytes + media,
+                "papers": len(self.entries),
+                "sessions": sessions,
+                "evictions": self.evictions,
+                "evicted_bytes": self.evicted_bytes,
+            }
@@ -0,0 +1,317 @@
+"""
+Local mirror of every PDF in the catalog.
+
+python mirror.py walks master_index.csv and downloads each File ID into
+content-addressed storage:
+
+    mirror/objects/ab/ab12...ef.pdf   one file per distinct SHA-256
+    mirror/manifest.jsonl             File ID -> sha256, size, Telegram metadata
+
+Downloads run on a bounded thread pool behind a token-bucket rate limiter.
+Each file is checked against the size reported by getFile, hashed, written
+atomically and only then recorded in the manifest, one line per file as it
+completes. An interrupted run therefore resumes where it stopped. Later runs
+only fetch File IDs that are new. --refresh asks Telegram again for every
+mirrored entry and re-downloads the ones whose file_unique_id or size
+changed (files over the Bot API limit, fetched over MTProto, only when
+their stored object is missing or damaged). --verify re-hashes every
+stored object.
+
+The app serves papers from the mirror first (the smaller variant written by
+pdf_optimize.py when there is one). With SERVE_FROM_MIRROR set, it never
+calls Telegram at request time (see MirrorStore.fetch).
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from bulk_download import iter_completed_downloads
+from pdf_cache import read_preferring_optimized
+from resilience import RateLimiter
+from sources import SourceRouter, load_sources
+from telegram_download import (TELEGRAM_API_BASE, TelegramDownloader, download_via_mtproto,
+                               is_file_too_big, load_bot_token, load_mtproto_config)
+
+MIRROR_DIR = os.environ.get("MIRROR_DIR", "mirror")
+MANIFEST_FILE = "manifest.jsonl"
+MIRROR_WORKERS = 4
+MIRROR_RATE = 10.0  # Telegram calls per second across all workers
+
+
+def sha256_hex(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+class MirrorStore:
+    """Content-addressed PDF store plus its File ID manifest."""
+
+    def __init__(self, root=MIRROR_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_FILE)
+        self._entries = {}
+        self._manifest_mtime = None
+        self._lock = threading.Lock()
+
+    def object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.pdf")
+
+    def entries(self):
+        """``{file_id: record}``, re-read when the manifest changed on disk."""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return self._entries
+        if mtime != self._manifest_mtime:
+            with self._lock:
+                entries = {}
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue  # Torn last line from an interrupted run
+                        entries[record["file_id"]] = record
+                self._entries = entries
+                self._manifest_mtime = mtime
+        return self._entries
+
+    def get(self, file_id):
+        """Mirrored bytes for a File ID (the pdf_optimize.py variant if there is one), or None."""
+        record = self.entries().get(str(file_id).strip())
+        if record is None:
+            return None
+        path = self.object_path(record["sha256"])
+        try:
+            if os.path.getsize(path) != record["size"]:
+                return None
+            return read_preferring_optimized(path)
+        except FileNotFoundError:
+            return None
+
+    def fetch(self, file_id, fallback=None):
+        """Serve from the mirror; otherwise use ``fallback(file_id)`` if given.
+
+        Returns (content, error) like get_telegram_file_content.
+        """
+        content = self.get(file_id)
+        if content is not None:
+            return content, None
+        if fallback is None:
+            return None, "❌ This paper is not in the local mirror yet. Please try again later."
+        return fallback(file_id)
+
+    def has_valid_object(self, record, verify=False):
+        path = self.object_path(record["sha256"])
+        try:
+            if os.path.getsize(path) != record["size"]:
+                return False
+        except OSError:
+            return False
+        if not verify:
+            return True
+        with open(path, "rb") as f:
+            return sha256_hex(f.read()) == record["sha256"]
+
+    def put(self, file_id, content, info=None):
+        """Store content (deduplicated by hash) and append its manifest record."""
+        digest = sha256_hex(content)
+        path = self.object_path(digest)
+        if not (os.path.exists(path) and os.path.getsize(path) == len(content)):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(content)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+        info = info or {}
+        record = {
+            "file_id": str(file_id).strip(),
+            "sha256": digest,
+            "size": len(content),
+            "file_unique_id": info.get("file_unique_id"),
+            "telegram_size": info.get("file_size"),
+            "mirrored_at": time.time(),
+        }
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            with open(self.manifest_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+            self._entries[record["file_id"]] = record
+        return record
+
+    def compact(self):
+        """Rewrite the manifest with one line per File ID."""
+        entries = self.entries()
+        if not entries:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for record in entries.values():
+                f.write(json.dumps(record) + "\n")
+        with self._lock:
+            os.replace(tmp_path, self.manifest_path)
+            self._manifest_mtime = None
+
+
+class Mirrorer:
+    """Fetches one File ID into the store (called from the worker pool)."""
+
+    def __init__(self, store, downloader, bot_token, limiter, mtproto_config=None, router=None):
+        self.store = store
+        self.downloader = downloader
+        self.bot_token = bot_token
+        self.limiter = limiter
+        self.mtproto_config = mtproto_config
+        self.router = router
+
+    def credentials(self, file_id):
+        """(bot token, MTProto config) for the channel the paper came from."""
+        source = self.router.source_for(file_id) if self.router is not None else None
+        if source is None:
+            return self.bot_token, self.mtproto_config
+        return source.bot_token, source.mtproto_config(self.mtproto_config)
+
+    def mirror(self, file_id, existing=None):
+        """Returns (status, error); status is 'mirrored', 'unchanged' or None on failure."""
+        bot_token, mtproto_config = self.credentials(file_id)
+        self.limiter.acquire()
+        result, error = self.downloader.get_file(file_id, bot_token)
+        if error:
+            return None, error
+
+        if not result.get("ok"):
+            if is_file_too_big(result) and mtproto_config:
+                return self.mirror_large(file_id, bot_token, mtproto_config, existing)
+            return None, f"❌ Telegram API error ({result.get('error_code', 'N/A')}): {result.get('description', 'Unknown error')}"
+
+        info = result.get("result", {})
+        if (existing and existing.get("file_unique_id") == info.get("file_unique_id")
+                and existing.get("telegram_size") == info.get("file_size")
+                and self.store.has_valid_object(existing)):
+            return "unchanged", None
+
+        self.limiter.acquire()
+        content, error = self.downloader.download_path(info.get("file_path", ""), bot_token)
+        if error:
+            return None, error
+        if info.get("file_size") and len(content) != info["file_size"]:
+            return None, f"❌ Size mismatch: expected {info['file_size']} bytes, got {len(content)}"
+        self.store.put(file_id, content, info)
+        return "mirrored", None
+
+    def mirror_large(self, file_id, bot_token, mtproto_config, existing=None):
+        """Fetch a file over the Bot API limit over MTProto; skipped if its object is intact.
+
+        getFile reports neither file_unique_id nor size for these, so both are
+        taken from the File ID itself and the downloaded content. A File ID
+        always names the same document, so once Telegram confirms it still
+        exists, an intact stored object is all --refresh needs.
+        """
+        from mtproto_download import file_unique_id  # Imports Telethon; only needed for large files
+
+        unique_id = file_unique_id(file_id)
+        # Entries mirrored before file_unique_id was recorded here have none
+        if (existing and existing.get("file_unique_id") in (None, unique_id)
+                and self.store.has_valid_object(existing)):
+            return "unchanged", None
+
+        content, error = download_via_mtproto(file_id, bot_token, mtproto_config)
+        if error:
+            return None, error
+        self.store.put(file_id, content, {"file_unique_id": unique_id, "file_size": len(content)})
+        return "mirrored", None
+
+
+def run_mirror(csv_path='master_index.csv', root=MIRROR_DIR, workers=MIRROR_WORKERS, rate=MIRROR_RATE,
+               refresh=False, verify=False, limit=None, api_base=TELEGRAM_API_BASE):
+    bot_token = load_bot_token()
+    if not bot_token:
+        print("❌ TELEGRAM_BOT_TOKEN not set (environment or .streamlit/secrets.toml)")
+        return
+
+    store = MirrorStore(root)
+    entries = store.entries()
+    df = pd.read_csv(csv_path)
+    df.columns = df.columns.str.strip()
+    file_ids = [fid for fid in dict.fromkeys(df['File ID'].astype(str).str.strip()) if fid and fid != 'nan']
+
+    todo, corrupt = [], set()
+    for file_id in file_ids:
+        record = entries.get(file_id)
+        if record is None:
+            todo.append(file_id)
+        elif not store.has_valid_object(record, verify=verify):
+            corrupt.add(file_id)
+            todo.append(file_id)
+            # put() keeps an object of the right size, so drop one whose hash is wrong
+            try:
+                os.remove(store.object_path(record["sha256"]))
+            except OSError:
+                pass
+        elif refresh:
+            todo.append(file_id)
+    if limit:
+        todo = todo[:limit]
+
+    print(f"🪞 {len(entries)} files mirrored, {len(todo)} to check or fetch"
+          + (f" ({len(corrupt)} missing or corrupt)" if corrupt else ""))
+    if not todo:
+        return
+
+    downloader = TelegramDownloader(api_base=api_base, hedge=False)
+    mirrorer = Mirrorer(store, downloader, bot_token, RateLimiter(rate, burst=workers), load_mtproto_config(),
+                        router=SourceRouter(load_sources(), df, default_bot_token=bot_token))
+    counts = {"mirrored": 0, "unchanged": 0, "failed": 0}
+    failures = []
+    start = time.perf_counter()
+
+    def work(file_id):
+        # A stored object that failed validation above must be fetched again
+        existing = None if file_id in corrupt else entries.get(file_id)
+        return mirrorer.mirror(file_id, existing)
+
+    for done, (file_id, status, error) in enumerate(
+            iter_completed_downloads([(fid, fid) for fid in todo], work, max_workers=workers), 1):
+        if error:
+            counts["failed"] += 1
+            failures.append((file_id, error))
+        else:
+            counts[status] += 1
+        print(f"📥 {done}/{len(todo)}  mirrored {counts['mirrored']}  unchanged {counts['unchanged']}  "
+              f"failed {counts['failed']}", end="\r")
+
+    store.compact()
+    elapsed = time.perf_counter() - start
+    print(f"\n\n✅ Mirror run finished in {elapsed:.1f}s ({len(todo) / elapsed:.1f} files/s)")
+    if failures:
+        print(f"⚠️  {len(failures)} files failed; they will be retried on the next run:")
+        for file_id, error in failures[:10]:
+            print(f"   {file_id[:40]}...  {error}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mirror every PDF in the index to local storage.")
+    parser.add_argument("--csv", default='master_index.csv', help="index CSV to read File IDs from")
+    parser.add_argument("--dir", default=MIRROR_DIR, help="mirror directory")
+    parser.add_argument("--workers", type=int, default=MIRROR_WORKERS, help="concurrent downloads")
+    parser.add_argument("--rate", type=float, default=MIRROR_RATE, help="Telegram calls per second")
+    parser.add_argument("--refresh", action="store_true", help="re-check mirrored entries for changes")
+    parser.add_argument("--verify", action="store_true", help="re-hash every stored file")
+    parser.add_argument("--limit", type=int, default=None, help="only process this many files")
+    args = parser.parse_args()
+    run_mirror(args.csv, args.dir, workers=args.workers, rate=args.rate, refresh=args.refresh,
+               verify=args.verify, limit=args.limit)
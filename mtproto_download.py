@@ -0,0 +1,208 @@
+"""
+MTProto download backend for documents larger than the Bot API limit.
+
+The Bot API ``getFile`` method refuses anything over 20 MB, so big past-paper
+bundles are fetched straight from Telegram's file servers with Telethon
+instead. The file is split into fixed-size chunks and several workers request
+interleaved stripes of it at the same time; the chunks are then stitched back
+together in order.
+
+Requires TELEGRAM_API_ID / TELEGRAM_API_HASH (from https://my.telegram.org)
+in addition to the bot token. The bot logs in with its own session file, so no
+phone number is needed.
+"""
+import asyncio
+import base64
+import struct
+import threading
+
+from telethon import TelegramClient
+from telethon.tl.types import InputDocumentFileLocation
+
+# Telegram only accepts offsets/limits that divide evenly into 1 MB
+CHUNK_SIZE = 512 * 1024
+DEFAULT_WORKERS = 4
+DEFAULT_SESSION = 'bot_session'
+
+# TDLib file id layout constants
+_FILE_REFERENCE_FLAG = 1 << 25
+_WEB_LOCATION_FLAG = 1 << 24
+_PHOTO_TYPES = {0, 1, 2}  # thumbnail, profile photo, photo
+_DOCUMENT_UNIQUE_TYPE = 2
+
+# Telethon session files are SQLite databases; only one client may use one at a time
+_session_lock = threading.Lock()
+
+
+def _rle_decode(data):
+    """Expand TDLib's run-length encoding of zero bytes."""
+    out = bytearray()
+    zero = False
+    for byte in data:
+        if zero:
+            out.extend(b'\0' * byte)
+            zero = False
+        elif byte == 0:
+            zero = True
+        else:
+            out.append(byte)
+    return bytes(out)
+
+
+def _rle_encode(data):
+    """TDLib's run-length encoding of zero bytes (the inverse of _rle_decode)."""
+    out = bytearray()
+    zeros = 0
+    for byte in data:
+        if byte == 0:
+            zeros += 1
+            if zeros == 250:  # TDLib caps a run at 250
+                out.extend((0, zeros))
+                zeros = 0
+            continue
+        if zeros:
+            out.extend((0, zeros))
+            zeros = 0
+        out.append(byte)
+    if zeros:
+        out.extend((0, zeros))
+    return bytes(out)
+
+
+def _read_tl_bytes(data, pos):
+    """Read a TL-serialized byte string starting at ``pos``; return (value, new_pos)."""
+    length = data[pos]
+    if length < 254:
+        start = pos + 1
+    else:
+        length = int.from_bytes(data[pos + 1:pos + 4], 'little')
+        start = pos + 4
+    end = start + length
+    # TL strings are padded so the whole field is a multiple of 4 bytes
+    padded = end + (-(end - pos) % 4)
+    return data[start:end], padded
+
+
+def decode_document_file_id(file_id):
+    """Decode a Bot API document File ID into its MTProto location.
+
+    Returns ``(dc_id, InputDocumentFileLocation)``. Raises ``ValueError`` for
+    IDs that do not describe a document (photos, web files, malformed input).
+    Unlike ``telethon.utils.resolve_bot_file_id`` this understands the newer
+    IDs that embed a file reference, which is what every row in
+    master_index.csv uses.
+    """
+    raw = str(file_id).strip()
+    try:
+        data = _rle_decode(base64.urlsafe_b64decode(raw + '=' * (-len(raw) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"File ID is not valid base64: {e}") from e
+
+    if len(data) < 2 or data[-1] != 4:
+        raise ValueError("Unsupported File ID version")
+    data = data[:-2]  # strip sub-version + version
+
+    type_id, dc_id = struct.unpack_from('<ii', data, 0)
+    pos = 8
+    if type_id & _WEB_LOCATION_FLAG:
+        raise ValueError("Web files cannot be downloaded over MTProto")
+
+    file_reference = b''
+    if type_id & _FILE_REFERENCE_FLAG:
+        file_reference, pos = _read_tl_bytes(data, pos)
+
+    file_type = type_id & ~(_FILE_REFERENCE_FLAG | _WEB_LOCATION_FLAG)
+    if file_type in _PHOTO_TYPES:
+        raise ValueError("File ID points to a photo, not a document")
+    if len(data) < pos + 16:
+        raise ValueError("File ID is truncated")
+
+    media_id, access_hash = struct.unpack_from('<qq', data, pos)
+    location = InputDocumentFileLocation(
+        id=media_id,
+        access_hash=access_hash,
+        file_reference=file_reference,
+        thumb_size=''
+    )
+    return dc_id, location
+
+
+def document_unique_id(media_id):
+    """Bot API file_unique_id of a document, from its MTProto id (the same in every chat)."""
+    packed = _rle_encode(struct.pack('<iq', _DOCUMENT_UNIQUE_TYPE, media_id))
+    return base64.urlsafe_b64encode(packed).decode('ascii').rstrip('=')
+
+
+def file_unique_id(file_id):
+    """file_unique_id for a document File ID, or None if the ID is not a document.
+
+    Every bot and channel sees a different File ID for the same document but
+    the same file_unique_id, which makes it the key for cross-channel dedup.
+    """
+    try:
+        _, location = decode_document_file_id(file_id)
+    except (ValueError, struct.error):
+        return None
+    return document_unique_id(location.id)
+
+
+async def download_striped(fetch_stripe, workers=DEFAULT_WORKERS, chunk_size=CHUNK_SIZE):
+    """Download a file as interleaved stripes and reassemble it in order.
+
+    ``fetch_stripe(offset, stride)`` must return an async iterator yielding
+    ``chunk_size`` chunks at ``offset``, ``offset + stride``, ... and stop
+    after the first short (or empty) chunk. Worker ``k`` starts at chunk
+    ``k``, so ``workers`` requests are in flight at any moment.
+    """
+    stride = workers * chunk_size
+    parts = {}
+
+    async def worker(first_chunk):
+        offset = first_chunk * chunk_size
+        async for chunk in fetch_stripe(offset, stride):
+            parts[offset] = chunk
+            if len(chunk) < chunk_size:
+                break
+            offset += stride
+
+    await asyncio.gather(*(worker(k) for k in range(workers)))
+
+    ordered = []
+    offset = 0
+    while offset in parts:
+        chunk = parts.pop(offset)
+        ordered.append(chunk)
+        if len(chunk) < chunk_size:
+            break
+        offset += chunk_size
+    return b''.join(ordered)
+
+
+async def _download_document(file_id, api_id, api_hash, bot_token, session, workers):
+    dc_id, location = decode_document_file_id(file_id)
+
+    client = TelegramClient(session, int(api_id), api_hash)
+    await client.start(bot_token=bot_token)
+    try:
+        def fetch_stripe(offset, stride):
+            return client.iter_download(
+                location,
+                offset=offset,
+                stride=stride,
+                request_size=CHUNK_SIZE,
+                chunk_size=CHUNK_SIZE,
+                dc_id=dc_id
+            )
+
+        return await download_striped(fetch_stripe, workers=workers)
+    finally:
+        await client.disconnect()
+
+
+def download_large_file(file_id, bot_token, api_id, api_hash,
+                        session=DEFAULT_SESSION, workers=DEFAULT_WORKERS):
+    """Download a document of any size over MTProto and return its bytes."""
+    with _session_lock:
+        return asyncio.run(
+            _download_document(file_id, api_id, api_hash, bot_token, session, workers)
+        )
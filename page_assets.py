@@ -0,0 +1,393 @@
+"""
+Static CSS and HTML for the app's pages.
+
+Kept in an imported module rather than in app.py so the strings are built
+once per process instead of on every script rerun. The web fonts load
+through <link> tags instead of an @import inside the page CSS, so the
+styles apply straight away instead of waiting for Google Fonts to answer.
+"""
+
+FONTS_URL = ("https://fonts.googleapis.com/css2?family=Barlow+Condensed:wght@400;500;600;700"
+             "&family=Poppins:wght@300;400;500;600&display=swap")
+
+FONTS_HTML = f"""
+<link rel="preconnect" href="https://fonts.googleapis.com">
+<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>
+<link rel="stylesheet" href="{FONTS_URL}">
+"""
+
+# Theme for every page, plus the fixed social bar ad
+APP_CSS = """
+<style>
+.main {
+    background-color: #09262e;
+    padding: 2rem;
+    font-family: 'Poppins', sans-serif;
+}
+
+#MainMenu {visibility: hidden;}
+footer {visibility: hidden;}
+header {visibility: hidden;}
+
+.stTextInput>div>div>input {
+    background-color: #ffffff;
+    color: #09262e;
+    border-radius: 8px;
+    border: 2px solid #db463b;
+    font-family: 'Poppins', sans-serif;
+    font-size: 16px;
+    padding: 12px;
+}
+
+.stTextInput>div>div>input:focus {
+    border-color: #db463b;
+    box-shadow: 0 0 0 3px rgba(219, 70, 59, 0.1);
+}
+
+.stButton>button {
+    background-color: #db463b;
+    color: white;
+    border: none;
+    border-radius: 8px;
+    font-family: 'Barlow Condensed', sans-serif;
+    font-weight: 600;
+    font-size: 16px;
+    padding: 12px 24px;
+    transition: all 0.3s;
+}
+
+.stButton>button:hover {
+    background-color: #c03a2b;
+    transform: translateY(-2px);
+    box-shadow: 0 4px 12px rgba(219, 70, 59, 0.3);
+}
+
+.stDownloadButton>button {
+    background-color: #28a745;
+    color: white;
+}
+
+.stDownloadButton>button:hover {
+    background-color: #218838;
+}
+
+.pdf-tile {
+    background: rgba(255,255,255,0.02);
+    border-radius: 12px;
+    padding: 18px;
+    margin: 10px 0;
+    transition: all 0.18s;
+    border: 1px solid rgba(255,255,255,0.03);
+}
+
+.pdf-tile:hover {
+    transform: translateY(-4px);
+    box-shadow: 0 8px 24px rgba(0, 0, 0, 0.6);
+    border-color: rgba(219, 70, 59, 0.25);
+}
+
+.pdf-icon {
+    width: 60px;
+    height: 60px;
+    margin: 0 auto 12px;
+    display: block;
+    text-align: center;
+}
+
+.pdf-thumb {
+    width: auto;
+    height: 120px;
+}
+
+.pdf-thumb img {
+    height: 100%;
+    max-width: 100%;
+    object-fit: contain;
+    border-radius: 4px;
+}
+
+.pdf-name {
+    font-family: 'Poppins', sans-serif;
+    font-weight: 500;
+    font-size: 15px;
+    color: #ffffff;
+    text-align: center;
+    margin-bottom: 8px;
+    line-height: 1.3;
+    min-height: 40px;
+    word-wrap: break-word;
+    overflow-wrap: break-word;
+}
+
+h1 {
+    font-family: 'Barlow Condensed', sans-serif;
+    font-weight: 700;
+    color: #ffffff;
+    text-align: center;
+    margin-bottom: 2rem;
+    font-size: 3rem;
+    letter-spacing: 2px;
+}
+
+@media (max-width: 768px) {
+    .main {
+        padding: 0.3rem;
+    }
+    h1 {
+        font-size: 1.8rem;
+    }
+    .pdf-tile {
+        margin: 4px 0;
+        padding: 10px;
+    }
+    /* Mobile title - bigger font */
+    .vault-title {
+        font-size: 2rem !important;
+        letter-spacing: 1px !important;
+        margin-bottom: 0.1rem !important;
+        margin-top: 0 !important;
+    }
+    .vault-subtitle {
+        font-size: 0.75rem !important;
+        margin-bottom: 0 !important;
+    }
+    .title-container {
+        margin-bottom: 0.4rem !important;
+        margin-top: 0 !important;
+        padding-top: 0 !important;
+    }
+    /* Smaller PDF icon on mobile */
+    .pdf-icon {
+    .pdf-icon {
+        width: 40px;
+        height: 40px;
+        margin-bottom: 8px;
+    }
+    .pdf-icon svg {
+        width: 40px;
+        height: 40px;
+    }
+    .pdf-thumb {
+        width: auto;
+        height: 80px;
+    }
+    /* Smaller filename text on mobile */
+    .pdf-name {
+        font-size: 12px;
+        min-height: 30px;
+        margin-bottom: 4px;
+    }
+    /* Welcome text smaller on mobile */
+    .welcome-text {
+        padding: 1rem 0.5rem !important;
+    }
+    .welcome-text h2 {
+        font-size: 1.3rem !important;
+    }
+    .welcome-text p {
+        font-size: 0.9rem !important;
+        margin-bottom: 1rem !important;
+    }
+    /* No results text smaller */
+    .no-results {
+        padding: 1rem 0.5rem !important;
+    }
+    .no-results h2 {
+        font-size: 1.3rem !important;
+    }
+    .no-results p {
+        font-size: 0.9rem !important;
+    }
+    /* Reduce button font size */
+    .stButton>button {
+        font-size: 13px;
+        padding: 8px 12px;
+    }
+    /* Search input smaller */
+    .stTextInput>div>div>input {
+        font-size: 14px;
+        padding: 8px;
+    }
+    /* Reduce column gaps */
+    .stColumns {
+        gap: 0.3rem !important;
+    }
+    /* Match score badge smaller */
+    .match-badge {
+        font-size: 10px !important;
+        padding: 2px 6px !important;
+    }
+}
+
+/* Space for fixed social bar at bottom */
+.main .block-container {
+    padding-bottom: 70px !important;
+}
+
+/* Reduce top padding on mobile */
+@media (max-width: 768px) {
+    .main .block-container {
+        padding-top: 1rem !important;
+    }
+    .main {
+        padding-top: 0 !important;
+    }
+    /* Remove Streamlit default header */
+    .stApp > header,
+    [data-testid="stHeader"] {
+        display: none !important;
+    }
+    .stApp {
+        padding-top: 0 !important;
+    }
+    [data-testid="stAppViewContainer"] {
+        padding-top: 0 !important;
+    }
+    section.main {
+        padding-top: 0 !important;
+    }
+    .block-container {
+        padding-top: 1rem !important;
+    }
+}
+</style>
+
+<!-- Social Bar Ad - Fixed at bottom of viewport -->
+<script>
+(function() {
+    if (document.getElementById('fixed-social-bar-container')) return;
+    var container = document.createElement('div');
+    container.id = 'fixed-social-bar-container';
+    container.style.cssText = 'position: fixed; bottom: 0; left: 0; width: 100%; z-index: 999999; text-align: center; background: rgba(9, 38, 46, 0.95); padding: 5px 0; box-shadow: 0 -2px 10px rgba(0,0,0,0.3);';
+    var script = document.createElement('script');
+    script.src = 'https://levitydinerdowny.com/f3/2b/9c/f32b9c36b68689794113c5a42fa355c8.js';
+    container.appendChild(script);
+    document.body.appendChild(container);
+})();
+</script>
+"""
+
+# Shown while a new session loads the catalog
+LOADING_HTML = """
+<style>
+.loading-container {
+    display: flex;
+    flex-direction: column;
+    align-items: center;
+    justify-content: center;
+    min-height: 60vh;
+    text-align: center;
+}
+.loading-icon {
+    font-size: 4rem;
+    animation: bounce 1s ease-in-out infinite;
+}
+.loading-text {
+    font-family: 'Barlow Condensed', sans-serif;
+    font-size: 1.8rem;
+    color: #ffffff;
+    margin-top: 1rem;
+    letter-spacing: 2px;
+}
+.loading-subtext {
+    font-family: 'Poppins', sans-serif;
+    font-size: 1rem;
+    color: #db463b;
+    margin-top: 0.5rem;
+    opacity: 0.9;
+}
+.loading-dots {
+    display: inline-block;
+}
+.loading-dots::after {
+    content: '';
+    animation: dots 1.5s steps(4, end) infinite;
+}
+@keyframes bounce {
+    0%, 100% { transform: translateY(0); }
+    50% { transform: translateY(-15px); }
+}
+@keyframes dots {
+    0% { content: ''; }
+    25% { content: '.'; }
+    50% { content: '..'; }
+    75% { content: '...'; }
+    100% { content: ''; }
+}
+.loading-spinner {
+    width: 50px;
+    height: 50px;
+    border: 4px solid rgba(219, 70, 59, 0.3);
+    border-top: 4px solid #db463b;
+    border-radius: 50%;
+    animation: spin 1s linear infinite;
+    margin: 1.5rem auto;
+}
+@keyframes spin {
+    0% { transform: rotate(0deg); }
+    100% { transform: rotate(360deg); }
+}
+</style>
+<div class="loading-container">
+    <div class="loading-icon">📚</div>
+    <div class="loading-text">Loading Your PDFs<span class="loading-dots"></span></div>
+    <div class="loading-spinner"></div>
+    <div class="loading-subtext">Preparing thousands of past papers for you</div>
+</div>
+"""
+
+TITLE_HTML = """
+<div class="title-container" style="text-align: center; margin-bottom: 0.8rem;">
+    <h1 class="vault-title" style="font-family: 'Barlow Condensed', sans-serif; font-weight: 700; color: #ffffff; font-size: 3rem; letter-spacing: 3px; margin-bottom: 0.3rem;">📚 PAST PAPER VAULT</h1>
+    <p class="vault-subtitle" style="font-family: 'Poppins', sans-serif; color: #db463b; font-size: 0.85rem; font-weight: 400; letter-spacing: 1px; margin-top: 0;">powered by <strong>Examlanka.lk</strong></p>
+</div>
+"""
+
+# Native banner ad (rendered with components.html)
+BANNER_AD_HTML = """
+<div style="text-align: center; margin: 0.3rem auto; max-width: 100%;">
+    <script>
+      atOptions = {
+        'key' : '8147f01382ece9e1740ef1187319a8b7',
+        'format' : 'iframe',
+        'height' : 90,
+        'width' : 728,
+        'params' : {}
+      };
+    </script>
+    <script src="https://levitydinerdowny.com/8147f01382ece9e1740ef1187319a8b7/invoke.js"></script>
+</div>
+"""
+
+# Statistics cards on the welcome page
+METRIC_CSS = """
+<style>
+.stMetric {
+    background-color: rgba(255, 255, 255, 0.1);
+    padding: 1rem;
+    border-radius: 8px;
+    border: 1px solid rgba(219, 70, 59, 0.3);
+}
+.stMetric label {
+    color: #ffffff;
+    font-family: 'Poppins', sans-serif;
+    font-size: 14px;
+}
+.stMetric [data-testid="stMetricValue"] {
+    color: #db463b;
+    font-family: 'Barlow Condensed', sans-serif;
+    font-weight: 700;
+    font-size: 2rem;
+}
+</style>
+"""
+
+# Tile icon for papers without a thumbnail
+PDF_ICON_SVG = """
+<svg width="60" height="60" viewBox="0 0 60 60" fill="none" xmlns="http://www.w3.org/2000/svg">
+    <rect width="60" height="60" rx="8" fill="#db463b"/>
+    <path d="M18 15h14l8 8v22H18V15z" fill="white"/>
+    <path d="M32 15v8h8" stroke="#db463b" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"/>
+    <path d="M22 28h16M22 35h12M22 42h16" stroke="#09262e" stroke-width="2" stroke-linecap="round"/>
+</svg>
+"""
@@ -0,0 +1,258 @@
+"""
+Local on-disk copies of downloaded PDFs, shared by all sessions in a process.
+
+Files are stored under a hash of their File ID, written atomically, and their
+modification time doubles as the "last confirmed on Telegram" timestamp used
+for stale-while-revalidate.
+
+The store is bounded to PDF_CACHE_MAX_BYTES. Every lookup is counted in a
+TinyLFU sketch (popularity.py); when the store is full a new PDF is only
+admitted if it has been requested more often than the least recently used
+papers it would displace. Pinned papers (PdfCache.pin, e.g. the most
+downloaded ones during exam season) are never evicted.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from popularity import TinyLFU
+
+PDF_CACHE_DIR = os.environ.get("PDF_CACHE_DIR", os.path.join(".cache", "pdfs"))
+PDF_CACHE_MAX_BYTES = int(os.environ.get("PDF_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+OPTIMIZED_SUFFIX = ".opt.pdf"  # Smaller variant written next to a PDF by pdf_optimize.py
+PDF_CACHE_PIN_TOP = int(os.environ.get("PDF_CACHE_PIN_TOP", 0))  # Pin this many of the most downloaded papers
+
+
+def cache_key(file_id):
+    """Stable filesystem-safe key for a File ID."""
+    return hashlib.sha256(str(file_id).strip().encode("utf-8")).hexdigest()
+
+
+def optimized_path(path):
+    """``.../abc.pdf`` -> ``.../abc.opt.pdf``."""
+    return path[:-len(".pdf")] + OPTIMIZED_SUFFIX
+
+
+def read_preferring_optimized(path):
+    """Bytes of the optimized variant of ``path`` if there is one, else of ``path``.
+
+    Raises FileNotFoundError if the original is gone.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    try:
+        with open(optimized_path(path), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        with open(path, "rb") as f:
+            return f.read()
+
+
+def remove_variant(path):
+    """Delete the optimized variant of ``path``, if any."""
+    try:
+        os.remove(optimized_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def remove_with_variant(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    remove_variant(path)
+
+
+class CacheIndex:
+    """Byte-bounded LRU order of cached keys with optional frequency-based admission.
+
+    With ``popularity=None`` it is a plain LRU that admits everything.
+    """
+
+    def __init__(self, max_bytes, popularity=None):
+        self.max_bytes = max_bytes
+        self.popularity = popularity
+        self.entries = OrderedDict()  # key -> size, least recently used first
+        self.pinned = set()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, key, record=True):
+        """Count a request for ``key`` (unless ``record`` is False); True if it is cached."""
+        if record and self.popularity is not None:
+            self.popularity.record(key)
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += record
+                return True
+            self.misses += record
+            return False
+
+    def admit(self, key, size):
+        """Make room for ``key``; returns (admitted, evicted keys)."""
+        with self._lock:
+            if key in self.entries:
+                self.size += size - self.entries[key]
+                self.entries[key] = size
+                self.entries.move_to_end(key)
+                return True, []
+
+            victims, free = [], self.max_bytes - self.size
+            for victim, victim_size in self.entries.items():
+                if free >= size:
+                    break
+                if victim not in self.pinned:
+                    victims.append(victim)
+                    free += victim_size
+            if free < size or (key not in self.pinned and self.popularity is not None
+                               and not self.popularity.admit(key, victims)):
+                self.rejected += 1
+                return False, []
+
+            for victim in victims:
+                self.size -= self.entries.pop(victim)
+            self.entries[key] = size
+            self.size += size
+            return True, victims
+
+    def pin(self, keys):
+        with self._lock:
+            self.pinned.update(keys)
+
+    def clear_pins(self):
+        with self._lock:
+            self.pinned.clear()
+
+    def remove(self, key):
+        with self._lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)
+
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class PdfCache:
+    def __init__(self, root=PDF_CACHE_DIR, max_bytes=PDF_CACHE_MAX_BYTES, popularity=None):
+        self.root = root
+        self.index = CacheIndex(max_bytes, popularity if popularity is not None else TinyLFU())
+        self.seeded = False
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuild the LRU order from the files already on disk (oldest access first)."""
+        found = []
+        try:
+            shards = list(os.scandir(self.root))
+        except FileNotFoundError:
+            return
+        for shard in shards:
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".pdf") and not entry.name.endswith(OPTIMIZED_SUFFIX):
+                    stat = entry.stat()
+                    found.append((stat.st_atime, entry.name[:-4], stat.st_size))
+        for _, key, size in sorted(found):
+            self.index.entries[key] = size
+            self.index.size += size
+
+    def path_for(self, file_id):
+        return self._path_for_key(cache_key(file_id))
+
+    def _path_for_key(self, key):
+        return os.path.join(self.root, key[:2], f"{key}.pdf")
+
+    def pin(self, file_ids):
+        """Never evict these papers (they are still only stored once downloaded)."""
+        self.index.pin(cache_key(file_id) for file_id in file_ids)
+
+    def unpin_all(self):
+        self.index.clear_pins()
+
+    def remember(self, counts):
+        """Count past requests, ``[(file_id, times)]`` from the event log, toward popularity."""
+        if self.index.popularity is None:
+            return
+        for file_id, times in counts:
+            key = cache_key(file_id)
+            for _ in range(times):
+                self.index.popularity.record(key)
+
+    def seed(self, counts):
+        """remember() the event log's counts once per process.
+
+        Later requests are counted by lookups as they are made, so replaying
+        the log again would count them twice and undo the sketch's aging.
+        """
+        with self.index._lock:
+            if self.seeded:
+                return False
+            self.seeded = True
+        self.remember(counts)
+        return True
+
+    def get(self, file_id, record=True):
+        """Return cached bytes (the optimized variant if there is one) or None.
+
+        ``record=False`` reads without counting a request, for replays of
+        requests the popularity sketch was already seeded with.
+        """
+        key = cache_key(file_id)
+        self.index.lookup(key, record)
+        try:
+            return read_preferring_optimized(self._path_for_key(key))
+        except FileNotFoundError:
+            self.index.remove(key)  # Evicted by another process
+            return None
+
+    def put(self, file_id, content):
+        """Store ``content`` if the admission policy lets it in; returns True if stored."""
+        key = cache_key(file_id)
+        admitted, evicted = self.index.admit(key, len(content))
+        for victim in evicted:
+            remove_with_variant(self._path_for_key(victim))
+        if not admitted:
+            return False
+
+        path = self._path_for_key(key)
+        remove_variant(path)  # Never serve a variant of older content
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self.index.remove(key)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return True
+
+    def age(self, file_id):
+        """Seconds since the copy was written or last revalidated (None if absent)."""
+        try:
+            return time.time() - os.path.getmtime(self.path_for(file_id))
+        except FileNotFoundError:
+            return None
+
+    def touch(self, file_id):
+        """Mark the cached copy as freshly revalidated."""
+        try:
+            os.utime(self.path_for(file_id))
+        except FileNotFoundError:
+            pass
+
+    def evict(self, file_id):
+        self.index.remove(cache_key(file_id))
+        remove_with_variant(self.path_for(file_id))
@@ -0,0 +1,177 @@
+"""
+Post-download optimization of cached and mirrored PDFs.
+
+Many papers are unoptimized scans: large, and blank until the last byte
+arrives. python pdf_optimize.py walks the local PDF cache (pdf_cache.py) and
+the mirror (mirror.py) and, in a process pool, rewrites each PDF with pikepdf:
+
+- linearized ("fast web view"), so viewers can show page 1 early
+- Flate streams recompressed and object streams generated
+- unreferenced resources and duplicate objects dropped
+
+The result is written next to the original as <name>.opt.pdf, and only when
+it is smaller. PdfCache.get and MirrorStore.get serve the .opt.pdf variant
+whenever it exists; the original stays untouched (the mirror's hashes still
+verify it). Every file is recorded in OPTIMIZE_LOG with its original and
+optimized size, the CPU time spent and the download time saved at
+REFERENCE_BANDWIDTH, so runs are incremental and savings can be summed.
+
+Requires pikepdf (pip install pikepdf).
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from mirror import MIRROR_DIR
+from pdf_cache import OPTIMIZED_SUFFIX, PDF_CACHE_DIR, optimized_path, remove_variant
+
+OPTIMIZE_LOG = os.environ.get("PDF_OPTIMIZE_LOG", os.path.join(".cache", "pdf_optimize.jsonl"))
+MIN_SAVING = 0.02                # Keep the variant only if it is at least 2% smaller
+REFERENCE_BANDWIDTH = 250_000    # Bytes per second (a 2 Mbit/s mobile connection)
+
+
+def optimize_pdf(path, min_saving=MIN_SAVING):
+    """Rewrite one PDF; runs in a worker process and returns its log record."""
+    start = time.process_time()
+    original_size = os.path.getsize(path)
+    record = {"path": path, "original_size": original_size}
+    try:
+        import pikepdf
+
+        out = io.BytesIO()
+        with pikepdf.open(path) as pdf:
+            pdf.remove_unreferenced_resources()
+            pdf.save(out, linearize=True, compress_streams=True, recompress_flate=True,
+                     object_stream_mode=pikepdf.ObjectStreamMode.generate)
+        optimized = out.getvalue()
+    except Exception as e:
+        remove_variant(path)
+        record.update(error=f"{type(e).__name__}: {str(e)[:200]}", optimized_size=None, used=False)
+        record["seconds"] = round(time.process_time() - start, 3)
+        return record
+
+    used = len(optimized) <= original_size * (1 - min_saving)
+    if used:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(optimized)
+        os.replace(tmp_path, optimized_path(path))
+    else:
+        remove_variant(path)  # Left over from an earlier version of the file
+    saved = original_size - len(optimized) if used else 0
+    record.update(optimized_size=len(optimized), used=used, saved_bytes=saved,
+                  seconds=round(time.process_time() - start, 3),
+                  download_seconds_saved=round(saved / REFERENCE_BANDWIDTH, 2))
+    return record
+
+
+def source_pdfs(roots):
+    """Every original PDF under the given store roots (optimized variants excluded)."""
+    for root in roots:
+        for directory, _, names in os.walk(root):
+            for name in names:
+                if name.endswith(".pdf") and not name.endswith(OPTIMIZED_SUFFIX):
+                    yield os.path.join(directory, name)
+
+
+def load_log(path=OPTIMIZE_LOG):
+    """``{pdf path: latest record}``."""
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn last line from an interrupted run
+            records[record["path"]] = record
+    return records
+
+
+def run_optimizer(roots=(PDF_CACHE_DIR, os.path.join(MIRROR_DIR, "objects")), log_path=OPTIMIZE_LOG,
+                  workers=None, limit=None):
+    try:
+        import pikepdf  # noqa: F401
+    except ImportError:
+        print("❌ pikepdf is not installed (pip install pikepdf)")
+        return
+
+    records = load_log(log_path)
+    todo = []
+    for path in source_pdfs(roots):
+        record = records.get(path)
+        # Re-optimize only files that are new or were replaced since the last run
+        if (record is None or record["original_size"] != os.path.getsize(path)
+                or (record.get("used") and not os.path.exists(optimized_path(path)))):
+            todo.append(path)
+    if limit:
+        todo = todo[:limit]
+    workers = workers or os.cpu_count() or 1
+    print(f"🗜️  {len(records)} PDFs already processed, {len(todo)} to optimize with {workers} workers")
+    if not todo:
+        return
+
+    totals = {"original": 0, "optimized": 0, "used": 0, "failed": 0, "seconds": 0.0, "download_saved": 0.0}
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(log_path, "a", encoding="utf-8") as out:
+        in_flight = set()
+        pending = iter(todo)
+        done_count = 0
+        while True:
+            # Keep a bounded number of files in flight
+            for path in pending:
+                in_flight.add(pool.submit(optimize_pdf, path))
+                if len(in_flight) >= workers * 2:
+                    break
+            if not in_flight:
+                break
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = future.result()
+                out.write(json.dumps(record) + "\n")
+                done_count += 1
+                totals["seconds"] += record["seconds"]
+                if record.get("error"):
+                    totals["failed"] += 1
+                    continue
+                totals["original"] += record["original_size"]
+                totals["optimized"] += record["original_size"] - record["saved_bytes"]
+                totals["used"] += record["used"]
+                totals["download_saved"] += record["download_seconds_saved"]
+            out.flush()
+            print(f"🗜️  {done_count}/{len(todo)} optimized", end="\r")
+
+    elapsed = time.perf_counter() - start
+    saved = totals["original"] - totals["optimized"]
+    print(f"\n\n✅ {done_count} PDFs in {elapsed:.1f}s ({totals['seconds']:.1f} CPU-seconds); "
+          f"{totals['used']} smaller variants written")
+    if totals["original"]:
+        print(f"   {totals['original'] / 2**20:.1f} MB -> {totals['optimized'] / 2**20:.1f} MB served "
+              f"({saved / totals['original']:.1%} saved, {totals['download_saved'] / 60:.1f} download-minutes "
+              f"at {REFERENCE_BANDWIDTH * 8 / 1e6:.0f} Mbit/s)")
+    if totals["failed"]:
+        print(f"⚠️  {totals['failed']} PDFs could not be parsed; see {log_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Linearize and recompress cached and mirrored PDFs.")
+    parser.add_argument("--dir", action="append", default=None,
+                        help="PDF store to process (repeatable; default: the PDF cache and the mirror)")
+    parser.add_argument("--workers", type=int, default=None, help="optimizer processes (default: CPU count)")
+    parser.add_argument("--limit", type=int, default=None, help="only process this many files")
+    parser.add_argument("--watch", type=float, default=None, metavar="SECONDS",
+                        help="keep running and optimize new downloads as they arrive")
+    args = parser.parse_args()
+
+    roots = args.dir or [PDF_CACHE_DIR, os.path.join(MIRROR_DIR, "objects")]
+    while True:
+        run_optimizer(roots, workers=args.workers, limit=args.limit)
+        if args.watch is None:
+            break
+        time.sleep(args.watch)
@@ -0,0 +1,118 @@
+"""
+Short, stable permalinks for individual papers (?id=<short-id>).
+
+Each paper's short ID is the first SHORT_ID_LENGTH characters of a base32
+BLAKE2b hash of its Telegram file_unique_id (the "File Unique ID" column,
+when the index has one) or else its File ID. The ID depends only on the
+paper, so links keep working as the catalog grows and is re-sorted.
+
+PermalinkIndex.build hashes the whole index once at load time into a dict,
+so resolving a link is a single lookup instead of a search. If two papers
+ever share a short ID, the one added later gets the longer LONG_ID_LENGTH
+form; the earlier paper's link does not change.
+
+    python permalinks.py --base-url https://vault.examlanka.lk/ --out permalinks.csv
+"""
+import argparse
+import base64
+import hashlib
+import time
+
+import pandas as pd
+
+UNIQUE_ID_COLUMN = 'File Unique ID'
+SHORT_ID_LENGTH = 10  # 50 bits: a collision is unlikely even at a million papers
+LONG_ID_LENGTH = 16
+
+
+def permalink_digest(key):
+    digest = hashlib.blake2b(str(key).encode("utf-8"), digest_size=10).digest()
+    return base64.b32encode(digest).decode("ascii").lower()[:LONG_ID_LENGTH]
+
+
+def permalink_keys(df):
+    """The identity each row's permalink is derived from (file_unique_id if known, else File ID)."""
+    keys = df['File ID'].astype(str).str.strip()
+    if UNIQUE_ID_COLUMN in df.columns:
+        unique_ids = df[UNIQUE_ID_COLUMN].astype(str).str.strip()
+        keys = unique_ids.where(df[UNIQUE_ID_COLUMN].notna() & (unique_ids != ''), keys)
+    return keys.tolist()
+
+
+def permalink_key(row):
+    unique_id = row.get(UNIQUE_ID_COLUMN)
+    if unique_id is not None and not pd.isna(unique_id) and str(unique_id).strip():
+        return str(unique_id).strip()
+    return str(row['File ID']).strip()
+
+
+class PermalinkIndex:
+    """Short ID -> row position for every paper in one version of the index."""
+
+    def __init__(self, keys, ids, rows):
+        self.keys = keys  # Row position -> permalink key
+        self.ids = ids    # Row position -> short ID
+        self.rows = rows  # Short ID -> row position
+        self.collisions = sum(len(short_id) > SHORT_ID_LENGTH for short_id in ids)
+
+    @classmethod
+    def build(cls, df):
+        keys = permalink_keys(df)
+        ids, rows = [], {}
+        for position, key in enumerate(keys):
+            digest = permalink_digest(key)
+            short_id = digest[:SHORT_ID_LENGTH]
+            existing = rows.get(short_id)
+            if existing is not None and keys[existing] != key:
+                short_id = digest  # Taken by an earlier paper
+            rows.setdefault(short_id, position)  # The same paper listed twice resolves to its first row
+            ids.append(short_id)
+        return cls(keys, ids, rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def resolve(self, short_id):
+        """Row position for a short ID, or None."""
+        return self.rows.get(str(short_id).strip().lower())
+
+    def link_for(self, key):
+        """Short ID of the paper with this permalink key, or None if it is not in the index."""
+        digest = permalink_digest(key)
+        for short_id in (digest[:SHORT_ID_LENGTH], digest):
+            position = self.rows.get(short_id)
+            if position is not None and self.keys[position] == key:
+                return short_id
+        return None
+
+
+def paper_url(base_url, short_id, download=False):
+    return f"{base_url}?id={short_id}" + ("&download=1" if download else "")
+
+
+def export_permalinks(csv_path='master_index.csv', out_path='permalinks.csv', base_url="/"):
+    """Write File Name, File ID, Short ID and URL for every paper; returns the PermalinkIndex."""
+    df = pd.read_csv(csv_path)
+    df.columns = df.columns.str.strip()
+    start = time.perf_counter()
+    index = PermalinkIndex.build(df)
+    elapsed = time.perf_counter() - start
+    out = pd.DataFrame({
+        'File Name': df['File Name'],
+        'File ID': df['File ID'],
+        'Short ID': index.ids,
+        'URL': [paper_url(base_url, short_id) for short_id in index.ids],
+    })
+    out.to_csv(out_path, index=False)
+    print(f"🔗 {len(index)} permalinks for {len(df)} rows in {elapsed * 1000:.0f} ms -> {out_path}"
+          + (f" ({index.collisions} lengthened to avoid collisions)" if index.collisions else ""))
+    return index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate ?id= permalinks for every paper in the index.")
+    parser.add_argument("--csv", default='master_index.csv', help="index CSV")
+    parser.add_argument("--out", default='permalinks.csv', help="CSV to write the links to")
+    parser.add_argument("--base-url", default="/", help="public URL of the app")
+    args = parser.parse_args()
+    export_permalinks(args.csv, args.out, args.base_url)
@@ -0,0 +1,76 @@
+"""
+Approximate request frequencies for cache admission (TinyLFU).
+
+A count-min sketch keeps DEPTH rows of small counters; a key increments one
+counter per row (chosen by independent hashes) and its estimate is the
+minimum of those counters, which can only overestimate. After SAMPLE_FACTOR x
+width increments every counter is halved, so popularity from last exam
+season fades instead of pinning the cache forever.
+
+TinyLFU.admit(candidate, victims) lets a new entry into a full cache only
+if it has been asked for more often than everything it would evict, so a
+one-off request for an obscure paper cannot push out the papers everyone
+wants.
+"""
+import hashlib
+import threading
+
+import numpy as np
+
+SKETCH_WIDTH = 1 << 16
+SKETCH_DEPTH = 4
+SAMPLE_FACTOR = 10
+COUNTER_MAX = np.iinfo(np.uint16).max
+
+
+class CountMinSketch:
+    def __init__(self, width=SKETCH_WIDTH, depth=SKETCH_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.uint16)
+        self._rows = np.arange(depth)
+
+    def _columns(self, key):
+        digest = hashlib.blake2b(str(key).encode("utf-8"), digest_size=4 * self.depth).digest()
+        return np.frombuffer(digest, dtype=np.uint32) % self.width
+
+    def add(self, key):
+        columns = self._columns(key)
+        counters = self.table[self._rows, columns]
+        # Saturate at the cap: counters + 1 would wrap a full uint16 counter to 0
+        self.table[self._rows, columns] = counters + (counters < COUNTER_MAX)
+
+    def estimate(self, key):
+        return int(self.table[self._rows, self._columns(key)].min())
+
+    def halve(self):
+        self.table >>= 1
+
+
+class TinyLFU:
+    """Frequency sketch with periodic aging, shared by every session in the process."""
+
+    def __init__(self, width=SKETCH_WIDTH, depth=SKETCH_DEPTH, sample_size=None):
+        self.sketch = CountMinSketch(width, depth)
+        self.sample_size = sample_size or SAMPLE_FACTOR * width
+        self.additions = 0
+        self._lock = threading.Lock()
+
+    def record(self, key):
+        with self._lock:
+            self.sketch.add(key)
+            self.additions += 1
+            if self.additions >= self.sample_size:
+                self.sketch.halve()
+                self.additions //= 2
+
+    def estimate(self, key):
+        with self._lock:
+            return self.sketch.estimate(key)
+
+    def admit(self, candidate, victims):
+        """True if ``candidate`` is more popular than every key it would evict."""
+        if not victims:
+            return True
+        frequency = self.estimate(candidate)
+        return all(frequency > self.estimate(victim) for victim in victims)
@@ -0,0 +1,123 @@
+"""
+On-demand profiling of live app reruns.
+
+When a query is slow in production, run the app with PROFILE_REQUESTS=1 or
+open it as an admin with ?profile=<PROFILE_TOKEN>. Each rerun of main() is
+then run under cProfile and saved to PROFILE_DIR as a .pstats file named
+after the time and the search query:
+
+    .cache/profiles/20261019-104812-331-chemistry-2019.pstats
+
+A token bucket (PROFILE_RATE per second, bursts of PROFILE_BURST) caps how
+often a rerun is profiled, so profiling can be left switched on; reruns over
+the limit run normally. Only the newest KEEP_PROFILES files are kept.
+
+cProfile sees the script thread only: time spent in background threads (the
+Telegram downloader's pool, the sharded search workers) shows up as waiting.
+
+    python profiling.py                     # list recent profiles
+    python profiling.py --show <file>       # top functions by cumulative time
+    snakeviz .cache/profiles/<file>         # interactive icicle graph (pip install snakeviz)
+"""
+import argparse
+import cProfile
+import io
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from resilience import RateLimiter
+
+PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(".cache", "profiles"))
+PROFILE_RATE = 1 / 30.0  # Profiles per second on average
+PROFILE_BURST = 5
+KEEP_PROFILES = 100
+
+
+def profile_name(label):
+    slug = re.sub(r'[^a-z0-9]+', '-', str(label).lower()).strip('-')[:60] or 'home'
+    now = time.time()
+    return f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now * 1000) % 1000:03d}-{slug}.pstats"
+
+
+class RequestProfiler:
+    """Rate-limited cProfile wrapper shared by every session in the process."""
+
+    def __init__(self, root=PROFILE_DIR, rate=PROFILE_RATE, burst=PROFILE_BURST, keep=KEEP_PROFILES):
+        self.root = root
+        self.keep = keep
+        self.limiter = RateLimiter(rate, burst=burst)
+        self._active = threading.Lock()  # Only one profiler may run at a time
+
+    @contextmanager
+    def profile(self, label):
+        """Profile the block if allowed; yields the .pstats path it will write, or None."""
+        if not self.limiter.try_acquire() or not self._active.acquire(blocking=False):
+            yield None
+            return
+        path = os.path.join(self.root, profile_name(label))
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                yield path
+            finally:  # st.stop() and st.rerun() end a rerun with an exception
+                profiler.disable()
+                self._save(profiler, path)
+        finally:
+            self._active.release()
+
+    def _save(self, profiler, path):
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+            os.close(fd)
+            profiler.dump_stats(tmp_path)
+            os.replace(tmp_path, path)
+            for old, _ in list_profiles(self.root)[self.keep:]:
+                os.remove(old)
+        except OSError as e:
+            print(f"⚠️ Could not save profile: {str(e)}")
+
+
+def list_profiles(root=PROFILE_DIR):
+    """``[(path, mtime)]`` newest first."""
+    try:
+        names = [name for name in os.listdir(root) if name.endswith(".pstats")]
+    except FileNotFoundError:
+        return []
+    paths = [os.path.join(root, name) for name in names]
+    return sorted(((path, os.path.getmtime(path)) for path in paths), key=lambda item: -item[1])
+
+
+def summarize(path, top=25, sort='cumulative'):
+    """(total seconds, text table of the ``top`` functions)."""
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+    return stats.total_tt, out.getvalue()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List and inspect saved request profiles.")
+    parser.add_argument("--dir", default=PROFILE_DIR, help="profile directory")
+    parser.add_argument("--show", default=None, metavar="FILE", help="print the top functions of one profile")
+    parser.add_argument("--top", type=int, default=25, help="functions to print with --show")
+    parser.add_argument("--sort", default="cumulative", help="pstats sort key (cumulative, tottime, calls)")
+    args = parser.parse_args()
+
+    if args.show:
+        path = args.show if os.path.exists(args.show) else os.path.join(args.dir, args.show)
+        total, table = summarize(path, args.top, args.sort)
+        print(f"🔬 {os.path.basename(path)}: {total:.3f}s")
+        print(table)
+    else:
+        profiles = list_profiles(args.dir)
+        print(f"🔬 {len(profiles)} profiles in {args.dir}")
+        for path, _ in profiles:
+            total, _ = summarize(path, top=0)
+            print(f"  {total:8.3f}s  {os.path.basename(path)}")
@@ -0,0 +1,193 @@
+"""
+Resilience primitives for calls to api.telegram.org.
+
+- CircuitBreaker: stops sending requests once the recent error rate crosses a
+  threshold, then lets a single probe through after a cool-down.
+- LatencyTracker: keeps recent latencies and derives timeouts from their
+  percentiles instead of fixed 10s/30s values.
+- hedged_call: fires a second, identical request when the first one is slower
+  than usual and returns whichever succeeds first.
+- RateLimiter: token bucket that spaces out calls from batch jobs (mirror,
+  health checks) so they stay under Telegram's flood limits.
+
+All objects are shared by every Streamlit session in the process, so they are
+thread-safe.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker (closed -> open -> half-open -> closed)."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=0.5, window=20, min_requests=5, cooldown=30.0,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self._clock = clock
+        self._outcomes = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.cooldown:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+    def allow_request(self):
+        """Return True if a request may be sent now."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                # Only one probe at a time while we find out if upstream recovered
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._outcomes.append(True)
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._outcomes.clear()
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._outcomes.append(False)
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN:
+                self._trip()
+                return
+            failures = self._outcomes.count(False)
+            if (len(self._outcomes) >= self.min_requests
+                    and failures / len(self._outcomes) >= self.failure_threshold):
+                self._trip()
+
+    def _trip(self):
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+
+
+class LatencyTracker:
+    """Recent latency samples and percentile-derived timeouts."""
+
+    def __init__(self, default_timeout, floor, ceiling, window=200, min_samples=10,
+                 percentile=0.95, multiplier=3.0):
+        self.default_timeout = default_timeout
+        self.floor = floor
+        self.ceiling = ceiling
+        self.min_samples = min_samples
+        self.percentile_target = percentile
+        self.multiplier = multiplier
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p):
+        """Return the p-th quantile (0-1) of recent samples, or None if too few."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(int(p * len(ordered)), len(ordered) - 1)
+        return ordered[index]
+
+    def timeout(self):
+        """Timeout = percentile x multiplier, clamped to [floor, ceiling]."""
+        observed = self.percentile(self.percentile_target)
+        if observed is None:
+            return self.default_timeout
+        return min(max(observed * self.multiplier, self.floor), self.ceiling)
+
+
+class RateLimiter:
+    """Token bucket: ``rate`` calls per second on average, bursts of up to ``burst``."""
+
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Take a token if one is available; returns the wait until the next one (0 if taken)."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """Block until a call may be made."""
+        while True:
+            delay = self._take()
+            if not delay:
+                return
+            self._sleep(delay)
+
+    def try_acquire(self):
+        """Non-blocking acquire: True if a call may be made now."""
+        return not self._take()
+
+
+def hedged_call(executor, fn, hedge_after, hedge_executor=None):
+    """Run ``fn`` and, if it has not finished after ``hedge_after`` seconds, race a copy.
+
+    Returns the first successful result; if both attempts fail, the last
+    exception is raised. A ``hedge_after`` of None disables hedging and runs
+    ``fn`` on the calling thread. The copy runs on ``hedge_executor`` (default
+    ``executor``), so hedges never take the threads first attempts need; a
+    copy still queued when the race is decided is cancelled.
+    """
+    if hedge_after is None:
+        return fn()
+
+    first = executor.submit(fn)
+    done, _ = wait([first], timeout=hedge_after)
+    if done:
+        return first.result()
+
+    pending = {first, (hedge_executor or executor).submit(fn)}
+    last_error = None
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                last_error = future.exception()
+    finally:
+        for future in pending:
+            future.cancel()
+    raise last_error
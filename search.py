@@ -0,0 +1,420 @@
+"""
+Filename search for the vault.
+
+Kept free of Streamlit so the offline pipelines and worker processes can use
+the same normalization and ranking as the app.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from bm25 import BM25Index
+from taxonomy import VOCABULARY, canonical_token, classify, clean_token, prefixes
+
+DOC_TYPES = ['marking', 'scheme', 'paper', 'pastpaper', 'past', 'mcq', 'essay']
+# Digits around it, not word boundaries, so years glued to a word ("2025KINGSWOOD") are found
+YEAR_PATTERN = re.compile(r'(?<!\d)(19[5-9]\d|20[0-4]\d)(?!\d)')
+# Words in many filenames that say nothing about which school or series a paper is from:
+# not looked up by trigram similarity
+COMMON_WORDS = {
+    'term', 'test', 'exam', 'examination', 'model', 'question', 'questions', 'answer', 'answers',
+    'first', 'second', 'third', 'final', '1st', '2nd', '3rd', 'grade', 'unit', 'part', 'revision',
+    'school', 'college', 'vidyalaya', 'provincial', 'zonal', 'pdf', 'new', 'with', 'and', 'the',
+}
+
+
+def normalize_text(text):
+    """Normalize text for better matching."""
+    if not text:
+        return ""
+    text = clean_token(str(text))
+    # Normalize exam levels
+    text = re.sub(r'\ba/l\b', 'al', text, flags=re.IGNORECASE)
+    text = re.sub(r'\ba\s*l\b', 'al', text, flags=re.IGNORECASE)
+    text = re.sub(r'\badvanced?\s+level\b', 'al', text, flags=re.IGNORECASE)
+    text = re.sub(r'\bo/l\b', 'ol', text, flags=re.IGNORECASE)
+    text = re.sub(r'\bo\s*l\b', 'ol', text, flags=re.IGNORECASE)
+    text = re.sub(r'\bordinary\s+level\b', 'ol', text, flags=re.IGNORECASE)
+    # Replace separators with spaces
+    text = re.sub(r'[_\-\.,;:()\[\]{}]', ' ', text)
+    # Normalize multiple spaces
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def tokenize(text):
+    """Tokens used for BM25 documents and queries (single characters dropped).
+
+    Taxonomy aliases are replaced by their canonical id, so "chem" and
+    "chemistry" are the same term in every index.
+    """
+    return [canonical_token(token) for token in normalize_text(text).split() if len(token) > 1]
+
+
+def canonical_query(query):
+    """Order-independent query string with aliases collapsed, for result caching.
+
+    "Chem 2024" and "2024 chemistry" give the same key, and searching for the
+    key returns the same results as the original query.
+    """
+    return " ".join(sorted({canonical_token(word) for word in normalize_text(query).split()}))
+
+
+class FileTerms:
+    """Per-row filename features for rank_files, computed once per catalog.
+
+    ``postings`` maps ``(kind, value)`` to the sorted row positions that have
+    it, for kinds 'subject', 'medium', 'level' (canonical taxonomy ids),
+    'doc' (DOC_TYPES words) and 'year' (int). ``normalized`` keeps each
+    normalized filename for the rare checks that need its words.
+    """
+
+    def __init__(self, index, normalized, postings):
+        self.index = index
+        self.normalized = normalized
+        self.postings = postings
+        self.years = {value: rows for (kind, value), rows in postings.items() if kind == 'year'}
+        self.has_year = self.has_any('year', self.years)
+        self._bm25_rows = (None, None)
+
+    def __len__(self):
+        return len(self.normalized)
+
+    @classmethod
+    def build(cls, index, names):
+        """Build from the DataFrame index and the matching filenames."""
+        normalized = []
+        lists = {}
+        for row, name in enumerate(names):
+            text = normalize_text(name)
+            normalized.append(text)
+            words = set(text.split())
+            subjects, mediums, levels = classify(words)
+            keys = [('subject', value) for value in subjects] + [('medium', value) for value in mediums]
+            keys += [('level', value) for value in levels] + [('doc', word) for word in words if word in DOC_TYPES]
+            keys += [('year', int(year)) for year in set(YEAR_PATTERN.findall(text))]
+            for key in keys:
+                lists.setdefault(key, []).append(row)
+        postings = {key: np.asarray(rows, dtype=np.int32) for key, rows in lists.items()}
+        return cls(pd.Index(index), normalized, postings)
+
+    def has_any(self, kind, values):
+        """Boolean array: rows with at least one of ``values`` of ``kind``."""
+        mask = np.zeros(len(self), dtype=bool)
+        for value in values:
+            rows = self.postings.get((kind, value))
+            if rows is not None:
+                mask[rows] = True
+        return mask
+
+    def rows_in(self, bm25_index):
+        """Position of each row's label in ``bm25_index`` (-1 if absent), cached for the last index."""
+        cached_index, bm25_rows = self._bm25_rows
+        if cached_index is not bm25_index:
+            if bm25_index.keys == self.index.tolist():
+                bm25_rows = np.arange(len(self))
+            else:
+                bm25_rows = np.fromiter((bm25_index.positions.get(label, -1) for label in self.index),
+                                        dtype=np.int64, count=len(self))
+            self._bm25_rows = (bm25_index, bm25_rows)
+        return bm25_rows
+
+    def rows_of(self, index):
+        """Positions of the labels in ``index``, or None if any is missing."""
+        if self.index.equals(index):
+            return np.arange(len(self))
+        if not self.index.is_unique:
+            return None
+        rows = self.index.get_indexer(index)
+        return None if (rows < 0).any() else rows
+
+
+def build_file_terms(df, file_name_col='File Name'):
+    """FileTerms for ``df`` (pass to fuzzy_search / rank_files as ``file_terms``)."""
+    return FileTerms.build(df.index, [str(name) for name in df[file_name_col].tolist()])
+
+
+def visible_rows(df, health_col='Health'):
+    """Drop rows health_check.py marked dead; returns ``df`` itself if there are none."""
+    if health_col not in df.columns:
+        return df
+    dead = (df[health_col] == 'dead').to_numpy(dtype=bool, na_value=False)
+    return df[~dead] if dead.any() else df
+
+
+def build_filename_index(df, file_name_col='File Name'):
+    """BM25 matrix over normalized filenames, keyed by DataFrame index label."""
+    return BM25Index.build(df.index.tolist(), [tokenize(name) for name in df[file_name_col].astype(str)])
+
+
+def names_first(query):
+    """Whether partial name matches rank before year, document type and medium.
+
+    A query without a year ("kingswood", "mahamaya chemistry") is after a
+    school or series, so its name matches must not sink below every dated file.
+    """
+    return YEAR_PATTERN.search(query) is None
+
+
+def sort_key(entry, name_first=False):
+    """Hierarchical ranking key of a rank_files() entry (lower ranks first)."""
+    keys = (entry['year_match'], entry['doc_type_match'], entry['medium_match'])
+    if name_first:
+        keys = (entry['name_match'],) + keys
+    else:
+        keys = keys + (entry['name_match'],)
+    return keys + (entry['word_match'], entry['content_match'])
+
+
+def fuzzy_search(query, df, limit=50, content_index=None, filename_index=None, trigram_index=None,
+                 file_terms=None):
+    """Perform intelligent hierarchical search with strict subject filtering.
+    
+    Query Pattern: {year} {exam type} {Subject} {pastpaper/marking} {medium}
+    
+    Search Strategy:
+    1. FILTER by subject (MANDATORY - if no match, return empty for "content uploading" message)
+    2. SORT by year (exact match first, then by proximity)
+    3. SORT by document type (marking/paper based on query)
+    4. SORT by medium (exact match first)
+
+    If a ``content_index`` (BM25 over extracted PDF text, see content_index.py)
+    is given, files whose text mentions the subject pass the subject filter
+    even when the filename does not, and the content score breaks ties after
+    the filename keys.
+
+    If a ``filename_index`` (see build_filename_index) is given, the plain
+    word-overlap count is replaced by the filename's BM25 score, so rare
+    words like "kingswood" outweigh "past", "paper" or "pdf".
+
+    If a ``trigram_index`` (trigram_index.TrigramIndex keyed like the
+    DataFrame) is given, query words outside the vocabulary and COMMON_WORDS
+    (school names, glued tokens) are looked up by trigram similarity.
+    Matching files rank first overall when the query has no year, else
+    first among those with the same year, document type and medium. Subject words also match as a prefix of glued filename words
+    ("chem" in "CHEMPAPER2NDTERM").
+
+    Subjects, mediums and levels are compared as canonical taxonomy ids (see
+    taxonomy.py), so "chem" finds files named "chemistry" and vice versa.
+    Pass ``file_terms`` (see build_file_terms) to reuse the per-file ids
+    computed when the index was loaded instead of classifying every
+    filename per query.
+    """
+    top_results, _ = rank_files(query, df, limit, content_index, filename_index, trigram_index, file_terms)
+    return results_frame(df, top_results)
+
+
+def rank_files(query, df, limit=50, content_index=None, filename_index=None, trigram_index=None,
+               file_terms=None):
+    """Ranking step of fuzzy_search.
+
+    Returns ``(entries, is_fallback)``: the top ``limit`` entries (dicts with
+    the DataFrame ``index`` label and the sort keys) in rank order, and
+    whether they are level-only fallback matches because no file had the
+    queried subject.
+    """
+    if df.empty or query.strip() == "":
+        return [], False
+    
+    # Find the file name column
+    file_name_col = None
+    for col in df.columns:
+        if 'file' in col.lower() and 'name' in col.lower():
+            file_name_col = col
+            break
+    
+    if file_name_col is None:
+        file_name_col = df.columns[0]
+
+    file_id_col = None
+    for col in df.columns:
+        if 'file' in col.lower() and 'id' in col.lower():
+            file_id_col = col
+            break
+    
+    query_lower = normalize_text(query)
+    query_words = {canonical_token(word) for word in query_lower.split()}
+    
+    # Extract year patterns from query
+    query_years = set(YEAR_PATTERN.findall(query))
+    
+    # Extract query components
+    query_subjects, query_mediums, query_levels = classify(query_words)
+    query_doc_types = set([word for word in query_words if word in DOC_TYPES])
+
+    # Per-row filename features, computed once per catalog when file_terms is given
+    rows = file_terms.rows_of(df.index) if file_terms is not None else None
+    if rows is None:
+        file_terms = build_file_terms(df, file_name_col)
+        rows = np.arange(len(df))
+
+    # Content hits: overall BM25 score, and which files mention the subject at all
+    content_scores = {}
+    content_subject_hits = set()
+    if content_index is not None and file_id_col is not None:
+        content_scores = content_index.scores_by_key(tokenize(query))
+        if query_subjects:
+            content_subject_hits = set(content_index.scores_by_key(list(query_subjects)))
+    file_ids = None
+    if content_scores or content_subject_hits:
+        file_ids = pd.Series([str(file_id).strip() for file_id in df[file_id_col].tolist()])
+
+    # Partial / glued-name matches from the trigram index
+    name_scores = {}
+    subject_prefix_candidates = set()
+    subject_prefixes = [prefix for subject in query_subjects for prefix in prefixes(subject)]
+    if trigram_index is not None:
+        for prefix in subject_prefixes:
+            subject_prefix_candidates.update(trigram_index.search_keys(prefix, threshold=1.0, max_fraction=1.0))
+        for word in query_words:
+            if word.isdigit() or word in VOCABULARY or word in DOC_TYPES or word in COMMON_WORDS:
+                continue
+            for key, similarity in trigram_index.search_keys(word).items():
+                name_scores[key] = name_scores.get(key, 0.0) + similarity
+    
+    # STEP 1: STRICT SUBJECT FILTERING
+    # If query has a subject, ONLY keep files that CONTAIN that exact subject
+    # FALLBACK: If no subject matches found, show files matching exam level (A/L, O/L)
+    keep = np.ones(len(df), dtype=bool)
+    if query_subjects:
+        # Check if file (name or extracted text) contains the queried subject
+        keep = file_terms.has_any('subject', query_subjects)[rows]
+        if content_subject_hits:
+            keep |= file_ids.isin(content_subject_hits).to_numpy()
+        if subject_prefix_candidates:
+            # A filename word starting with a spelling of the subject ("chem" in "chempaper")
+            starts_word = re.compile(r'(?:^| )(?:' + '|'.join(map(re.escape, subject_prefixes)) + ')')
+            for position in np.flatnonzero(~keep & df.index.isin(list(subject_prefix_candidates))):
+                keep[position] = starts_word.search(file_terms.normalized[rows[position]]) is not None
+
+        if not keep.any():
+            # NOT matching subject - fall back to files whose level matches, in catalog order
+            if not query_levels:
+                return [], False
+            fallback = np.flatnonzero(file_terms.has_any('level', query_levels)[rows])[:limit]
+            if not len(fallback):
+                return [], False
+            names = df[file_name_col].take(fallback).tolist()
+            return [{
+                'index': idx,
+                'filename': str(name),
+                'year_match': 9999,
+                'doc_type_match': 1,
+                'medium_match': 1,
+                'name_match': 0,
+                'word_match': 0,
+                'content_match': 0
+            } for idx, name in zip(df.index[fallback].tolist(), names)], True
+
+    positions = np.flatnonzero(keep)
+    terms_rows = rows[positions]
+    
+    # Calculate sorting keys for hierarchical sort, one array per key
+    
+    # Sort Key 1: Year Match (0 = perfect, higher = worse)
+    if query_years:
+        query_year = int(list(query_years)[0])
+        year_match = np.full(len(file_terms), 9998, dtype=np.int64)  # Has query year but file doesn't - lower priority
+        for year, year_rows in file_terms.years.items():
+            year_match[year_rows] = np.minimum(year_match[year_rows], abs(year - query_year))
+    else:
+        # No query year but file has year - decent priority; 9999 = no year
+        year_match = np.where(file_terms.has_year, 100, 9999)
+    year_match = year_match[terms_rows]
+    
+    # Sort Key 2: Document Type Match (0 = perfect match, 1 = no match)
+    doc_type_match = np.zeros(len(positions), dtype=np.int64)
+    if query_doc_types:
+        doc_type_match = (~file_terms.has_any('doc', query_doc_types)[terms_rows]).astype(np.int64)
+    
+    # Sort Key 3: Medium Match (0 = perfect match, 1 = no match)
+    medium_match = np.zeros(len(positions), dtype=np.int64)
+    if query_mediums:
+        medium_match = (~file_terms.has_any('medium', query_mediums)[terms_rows]).astype(np.int64)
+    
+    # Sort Key 4: Partial name matches (trigram similarity, descending)
+    labels = df.index[positions]
+    name_match = np.zeros(len(positions))
+    if name_scores:
+        name_match = -pd.Series(labels).map(name_scores).fillna(0.0).to_numpy(dtype=float)
+    
+    # Sort Key 5: Overall relevance (BM25 if available, else word matches)
+    if filename_index is not None:
+        scores = filename_index.score(tokenize(query)).astype(np.float64)
+        filename_rows = file_terms.rows_in(filename_index)[terms_rows]
+        word_match = np.where(filename_rows >= 0, -scores[filename_rows], 0.0)
+        unscored = np.flatnonzero(filename_rows < 0)
+    else:
+        word_match = np.zeros(len(positions), dtype=np.int64)
+        unscored = range(len(positions))
+    for i in unscored:
+        filename_words = file_terms.normalized[terms_rows[i]].split()
+        common_words = query_words & {canonical_token(word) for word in filename_words}
+        word_match[i] = -len(common_words)  # Negative for descending sort
+    
+    # Sort Key 6: Content relevance (BM25 over extracted text)
+    content_match = np.zeros(len(positions))
+    if content_scores:
+        content_match = -file_ids.take(positions).map(content_scores).fillna(0.0).to_numpy(dtype=float)
+    
+    # STEP 2: HIERARCHICAL SORT (stable, so ties keep catalog order)
+    # Sort by: Year (ascending) → Doc Type (ascending) → Medium (ascending) → Name matches (descending) → Word matches → Content (descending)
+    # Without a query year, name matches come first (see names_first)
+    if names_first(query):
+        keys = (content_match, word_match, medium_match, doc_type_match, year_match, name_match)
+    else:
+        keys = (content_match, word_match, name_match, medium_match, doc_type_match, year_match)
+    order = np.lexsort(keys)[:limit]
+    
+    names = df[file_name_col].take(positions[order]).tolist()
+    return [{
+        'index': idx,
+        'filename': str(name),
+        'year_match': year,
+        'doc_type_match': doc_type,
+        'medium_match': medium,
+        'name_match': name_score,
+        'word_match': word_score,
+        'content_match': content_score
+    } for idx, name, year, doc_type, medium, name_score, word_score, content_score in zip(
+        labels[order].tolist(), names, year_match[order].tolist(), doc_type_match[order].tolist(),
+        medium_match[order].tolist(), name_match[order].tolist(), word_match[order].tolist(),
+        content_match[order].tolist())], False
+
+
+def results_frame(df, top_results):
+    """DataFrame of the ranked rows with a display Match Score."""
+    if not top_results:
+        return pd.DataFrame()
+    
+    # Take just the ranked rows (a new frame already, so no extra copy)
+    positions = df.index.get_indexer([r['index'] for r in top_results])
+    results = df.take(positions)
+    
+    # Calculate match percentage for display
+    match_scores = []
+    for r in top_results:
+        # Perfect match = 100%, decreases with year diff, doc type, medium mismatch
+        score = 100.0
+        
+        # Year penalty: -5% per year difference
+        if r['year_match'] < 9990:
+            score -= min(r['year_match'] * 5, 50)
+        
+        # Doc type penalty: -10% if mismatch
+        if r['doc_type_match'] == 1:
+            score -= 10
+        
+        # Medium penalty: -15% if mismatch
+        if r['medium_match'] == 1:
+            score -= 15
+        
+        match_scores.append(max(score, 10.0))  # Minimum 10%
+    
+    results['Match Score'] = match_scores
+    
+    # Preserve the sort order (already sorted hierarchically)
+    results = results.reset_index(drop=True)
+    
+    return results
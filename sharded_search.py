@@ -0,0 +1,293 @@
+"""
+Sharded search across worker processes.
+
+fuzzy_search is pure Python and holds the GIL for the whole scan, so on a big
+catalog one query stalls every other session. ShardedSearchEngine splits the
+catalog round-robin into one shard per worker process. Each shard (names,
+File IDs and its slice of the BM25 filename/content matrices) is published in
+shared memory; the worker attaches to it, builds its own trigram index and
+taxonomy ids, and then answers queries with search.rank_files.
+
+A query is scattered to every shard and the per-shard top-k lists are merged
+with the same hierarchical sort key, ties broken by catalog position exactly
+like the single-process sort. BM25 slices keep the weights of the full index,
+so scores do not depend on how the catalog was split.
+
+Sessions share the engine without taking turns: every request carries an id,
+and a reader thread per worker hands each reply to the request waiting for
+it. A worker that dies or stops answering within SHARD_TIMEOUT is restarted
+on the same shared memory and the request is sent again; if that fails too,
+the shard is ranked in-process with the same indexes.
+"""
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+import weakref
+from concurrent.futures import Future, TimeoutError
+
+import numpy as np
+import pandas as pd
+
+import shared_arrays
+from bm25 import BM25Index
+from search import build_file_terms, build_filename_index, names_first, rank_files, results_frame, sort_key
+from trigram_index import TrigramIndex
+
+# Below this many files a single-process scan is fast enough
+SHARDED_SEARCH_MIN_FILES = int(os.environ.get('SHARDED_SEARCH_MIN_FILES', 50_000))
+SHARD_TIMEOUT = float(os.environ.get('SHARD_TIMEOUT', 60))  # Seconds before a silent worker is restarted
+
+
+def _publish_bm25(arrays, prefix, index):
+    arrays[f'{prefix}_terms'], arrays[f'{prefix}_term_offsets'] = shared_arrays.pack_strings(index.terms)
+    arrays[f'{prefix}_indptr'] = index.indptr
+    arrays[f'{prefix}_doc_ids'] = index.doc_ids
+    arrays[f'{prefix}_weights'] = index.weights
+
+
+def _attach_bm25(views, prefix, keys):
+    return BM25Index(
+        keys,
+        shared_arrays.unpack_strings(views[f'{prefix}_terms'], views[f'{prefix}_term_offsets']),
+        views[f'{prefix}_indptr'],
+        views[f'{prefix}_doc_ids'],
+        views[f'{prefix}_weights']
+    )
+
+
+def _shard_worker(conn, shm_name, layout):
+    """Worker process: attach to one shard and answer ranking requests."""
+    shm, views = shared_arrays.attach(shm_name, layout, untrack=False)  # Shares the owner's resource tracker
+    labels = views['labels']
+    df = pd.DataFrame({
+        'File Name': shared_arrays.unpack_strings(views['names'], views['name_offsets']),
+        'File ID': shared_arrays.unpack_strings(views['file_ids'], views['file_id_offsets']),
+    }, index=labels)
+    filename_index = _attach_bm25(views, 'filename', labels.tolist())
+    content_index = None
+    if 'content_keys' in views:
+        content_keys = shared_arrays.unpack_strings(views['content_keys'], views['content_key_offsets'])
+        content_index = _attach_bm25(views, 'content', content_keys)
+    trigram_index = TrigramIndex.build(df.index.tolist(), df['File Name'].tolist())
+    file_terms = build_file_terms(df)
+    conn.send('ready')
+
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        request_id, query, limit, allowed = message
+        shard_df = df if allowed is None else df[np.isin(labels, allowed)]
+        try:
+            conn.send((request_id, rank_files(query, shard_df, limit, content_index, filename_index,
+                                              trigram_index, file_terms)))
+        except Exception as e:
+            conn.send((request_id, e))
+
+
+class _WorkerLink:
+    """Requests to one worker process, matched to its replies by id on a reader thread."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._pending = {}  # request id -> Future
+        self._closed = False
+        threading.Thread(target=self._read, daemon=True, name='shard-replies').start()
+
+    def _read(self):
+        while True:
+            try:
+                request_id, reply = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+            if future is not None:
+                future.set_result(reply)
+        with self._lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(EOFError("shard worker exited"))
+
+    def request(self, request_id, message):
+        """Send ``(request_id, *message)``; returns a Future for the reply."""
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise EOFError("shard worker exited")
+            self._pending[request_id] = future
+        try:
+            with self._send_lock:
+                self.conn.send((request_id, *message))
+        except (OSError, ValueError) as e:  # BrokenPipeError, or a closed connection
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise EOFError("shard worker exited") from e
+        return future
+
+
+def _shutdown(conns, processes, segments):
+    for conn in conns:
+        try:
+            conn.send(None)
+        except (OSError, ValueError):
+            pass
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    for shm in segments:
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class ShardedSearchEngine:
+    """Scatter/gather fuzzy search over ``shards`` worker processes."""
+
+    def __init__(self, df, shards=None, filename_index=None, content_index=None):
+        if not pd.api.types.is_integer_dtype(df.index):
+            raise ValueError("ShardedSearchEngine needs an integer DataFrame index")
+        self.df = df
+        self.shards = max(1, min(shards or os.cpu_count() or 1, len(df) or 1))
+        self._positions = {label: pos for pos, label in enumerate(df.index)}
+        filename_index = filename_index or build_filename_index(df)
+        self._filename_index = filename_index
+        self._content_index = content_index
+
+        names = df['File Name'].astype(str).tolist()
+        file_ids = df['File ID'].astype(str).str.strip().tolist()
+        labels = np.asarray(df.index, dtype=np.int64)
+
+        self._context = multiprocessing.get_context('spawn')  # Never fork a threaded server
+        self._conns, self._processes, self._segments = [], [], []
+        self._finalizer = weakref.finalize(self, _shutdown, self._conns, self._processes, self._segments)
+        self._layouts, self._links, self._fallbacks = [], [], {}
+        self._restart_locks = [threading.Lock() for _ in range(self.shards)]
+        self._request_ids = itertools.count()
+
+        for shard in range(self.shards):
+            rows = np.arange(shard, len(df), self.shards)
+            arrays = {'labels': labels[rows]}
+            arrays['names'], arrays['name_offsets'] = shared_arrays.pack_strings([names[i] for i in rows])
+            arrays['file_ids'], arrays['file_id_offsets'] = shared_arrays.pack_strings([file_ids[i] for i in rows])
+            _publish_bm25(arrays, 'filename', filename_index.subset(rows))
+            if content_index is not None:
+                content_rows = [content_index.positions[file_ids[i]] for i in rows
+                                if file_ids[i] in content_index.positions]
+                content_shard = content_index.subset(sorted(set(content_rows)))
+                arrays['content_keys'], arrays['content_key_offsets'] = shared_arrays.pack_strings(content_shard.keys)
+                _publish_bm25(arrays, 'content', content_shard)
+
+            shm, layout = shared_arrays.publish(arrays)
+            self._segments.append(shm)
+            self._layouts.append(layout)
+            conn, process = self._start_worker(shard)
+            self._conns.append(conn)
+            self._processes.append(process)
+
+        for conn in self._conns:
+            conn.recv()  # Wait until every shard is ready
+            self._links.append(_WorkerLink(conn))
+
+    def _start_worker(self, shard):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_shard_worker, daemon=True,
+                                        args=(child_conn, self._segments[shard].name, self._layouts[shard]))
+        process.start()
+        child_conn.close()
+        return parent_conn, process
+
+    def _restart(self, shard, failed_link):
+        """Replace the worker behind ``failed_link`` (once, however many requests saw it fail)."""
+        with self._restart_locks[shard]:
+            if self._links[shard] is not failed_link:
+                return  # Another request already restarted it
+            process = self._processes[shard]
+            if process.is_alive():
+                process.kill()  # Hung rather than dead
+            process.join(timeout=5)
+            self._conns[shard].close()
+            conn, process = self._start_worker(shard)
+            self._conns[shard], self._processes[shard] = conn, process
+            if not conn.poll(SHARD_TIMEOUT):
+                raise TimeoutError(f"shard {shard} worker did not start")
+            conn.recv()
+            self._links[shard] = _WorkerLink(conn)
+
+    def _rank_in_process(self, shard, query, limit, allowed):
+        """What the shard's worker would answer, computed here (used when the worker cannot be restarted)."""
+        with self._restart_locks[shard]:
+            if shard not in self._fallbacks:
+                shard_df = self.df.iloc[shard::self.shards]
+                self._fallbacks[shard] = (shard_df, TrigramIndex.build(shard_df.index.tolist(),
+                                                                       shard_df['File Name'].astype(str).tolist()),
+                                          build_file_terms(shard_df))
+        shard_df, trigram_index, file_terms = self._fallbacks[shard]
+        if allowed is not None:
+            shard_df = shard_df[np.isin(np.asarray(shard_df.index, dtype=np.int64), allowed)]
+        return rank_files(query, shard_df, limit, self._content_index, self._filename_index,
+                          trigram_index, file_terms)
+
+    def _ask(self, shard, request_id, message):
+        """Future for the reply of ``shard`` (its link attached), or the error raised while sending."""
+        link = self._links[shard]
+        try:
+            return link, link.request(request_id, message)
+        except EOFError as e:
+            return link, e
+
+    def _reply(self, shard, sent, request_id, message):
+        link, future = sent
+        for attempt in range(2):
+            try:
+                if isinstance(future, Exception):
+                    raise future
+                return future.result(timeout=SHARD_TIMEOUT)
+            except (EOFError, TimeoutError):
+                if attempt:
+                    break
+                try:
+                    self._restart(shard, link)
+                except Exception:
+                    break
+                link, future = self._ask(shard, request_id, message)
+        return self._rank_in_process(shard, *message)
+
+    def rank(self, query, limit=50, labels=None):
+        """Merged ``(entries, is_fallback)`` like search.rank_files over the whole catalog.
+
+        ``labels`` restricts the search to those DataFrame index labels
+        (e.g. the rows left by facet filters).
+        """
+        allowed = None if labels is None else np.asarray(labels, dtype=np.int64)
+        request_id = next(self._request_ids)
+        message = (query, limit, allowed)
+        sent = [self._ask(shard, request_id, message) for shard in range(self.shards)]
+        replies = [self._reply(shard, sent[shard], request_id, message) for shard in range(self.shards)]
+        for reply in replies:
+            if isinstance(reply, Exception):
+                raise reply
+
+        # Subject matches anywhere beat level-only fallbacks everywhere
+        matched = [entries for entries, is_fallback in replies if entries and not is_fallback]
+        is_fallback = not matched
+        shard_lists = matched or [entries for entries, _ in replies]
+        name_first = names_first(query)
+        merged = heapq.merge(*shard_lists, key=lambda e: (sort_key(e, name_first), self._positions[e['index']]))
+        return list(itertools.islice(merged, limit)), is_fallback
+
+    def search(self, query, limit=50, labels=None):
+        """Same result DataFrame as search.fuzzy_search."""
+        top_results, _ = self.rank(query, limit, labels)
+        return results_frame(self.df, top_results)
+
+    def close(self):
+        self._finalizer()
@@ -0,0 +1,120 @@
+"""
+Publish NumPy arrays in one ``multiprocessing.shared_memory`` block or file.
+
+The publisher copies a dict of arrays into a single segment and gets back a
+small ``layout`` (name -> dtype, shape, offset) that is cheap to pass to other
+processes. Readers attach by segment name (or memory-map the file) and get
+zero-copy array views. Strings are stored as one UTF-8 byte buffer plus an
+offsets array.
+"""
+import mmap
+import os
+import tempfile
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+ALIGNMENT = 8
+
+
+def pack_strings(strings):
+    """Encode strings into ``(bytes as uint8 array, int64 offsets)``."""
+    encoded = [str(s).encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def unpack_strings(data, offsets):
+    """Inverse of pack_strings."""
+    raw = data.tobytes()
+    bounds = offsets.tolist()
+    return [raw[bounds[i]:bounds[i + 1]].decode('utf-8') for i in range(len(bounds) - 1)]
+
+
+def plan_layout(arrays):
+    """``(layout, total size)`` for packing ``arrays`` back to back, 8-byte aligned."""
+    layout = {}
+    size = 0
+    for key, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        layout[key] = (array.dtype.str, list(array.shape), size)
+        size += array.nbytes
+        size += -size % ALIGNMENT
+    return layout, size
+
+
+def _views(buffer, layout):
+    views = {}
+    for key, (dtype, shape, offset) in layout.items():
+        view = np.ndarray(tuple(shape), dtype=dtype, buffer=buffer, offset=offset)
+        view.flags.writeable = False
+        views[key] = view
+    return views
+
+
+def publish(arrays, name=None):
+    """Copy ``{name: array}`` into a new shared memory segment.
+
+    Returns ``(shm, layout)``. The caller owns the segment and must
+    ``close()`` and ``unlink()`` it when done.
+    """
+    layout, size = plan_layout(arrays)
+    shm = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+    for key, array in arrays.items():
+        dtype, shape, offset = layout[key]
+        view = np.ndarray(tuple(shape), dtype=dtype, buffer=shm.buf, offset=offset)
+        view[...] = array
+    return shm, layout
+
+
+def attach(name, layout, untrack=True):
+    """Attach to a published segment; returns ``(shm, {name: read-only view})``.
+
+    By default the segment is not left registered with this process's
+    resource tracker, so an unrelated process exiting never unlinks a
+    segment it does not own. Children started by the owner through
+    multiprocessing share its tracker and should pass ``untrack=False``.
+    """
+    if not untrack:
+        shm = shared_memory.SharedMemory(name=name)
+    else:
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(shm._name, 'shared_memory')
+
+    return shm, _views(shm.buf, layout)
+
+
+def write_file(path, arrays):
+    """Write ``arrays`` to ``path`` atomically in the publish() layout; returns the layout."""
+    layout, size = plan_layout(arrays)
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for key, array in arrays.items():
+                f.seek(layout[key][2])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(max(size, 1))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return layout
+
+
+def map_file(path, layout):
+    """Memory-map a file from write_file(); returns ``(mmap, {name: read-only view})``.
+
+    Pages come from the OS page cache, so every process mapping the same
+    file shares one physical copy.
+    """
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mapped, _views(mapped, layout)
@@ -0,0 +1,192 @@
+"""
+Read-only catalog index shared by every app process on the host.
+
+Each Streamlit process used to read master_index.csv into its own DataFrame
+and build its own BM25 filename matrix. Instead, a builder publishes them
+once (python shared_index.py) into a flat, memory-mapped file:
+
+    .cache/index/catalog-<version>.bin   every column as UTF-8 bytes + offsets,
+                                         plus the BM25 filename arrays
+    .cache/index/current.json            version, file name and array layout
+
+App processes map the file read-only. String columns become Arrow-backed
+pandas columns pointing straight into the mapping and BM25 arrays are NumPy
+views, so the catalog exists once in the page cache, not once per process.
+
+Republishing writes a new version file and then swaps current.json with an
+atomic rename. Readers notice the new version on their next current() call
+and remap. Old versions are deleted after a few newer ones exist; processes
+still mapping them keep a valid mapping until they move on.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import shared_arrays
+from bm25 import BM25Index
+from search import build_filename_index, visible_rows
+
+SHARED_INDEX_DIR = os.environ.get("SHARED_INDEX_DIR", os.path.join(".cache", "index"))
+MANIFEST_FILE = "current.json"
+KEEP_VERSIONS = 3
+
+
+def read_catalog_csv(csv_path):
+    """master_index.csv with the app's column normalization (File Name, File ID)."""
+    df = pd.read_csv(csv_path)
+    df.columns = df.columns.str.strip()
+    column_mapping = {}
+    for col in df.columns:
+        col_lower = col.lower().strip()
+        if 'file' in col_lower and 'name' in col_lower:
+            column_mapping[col] = 'File Name'
+        elif 'file' in col_lower and 'id' in col_lower and 'unique' not in col_lower:
+            column_mapping[col] = 'File ID'
+    return df.rename(columns=column_mapping)
+
+
+def arrow_column(data, offsets):
+    """Zero-copy pandas string array over packed UTF-8 bytes and int64 offsets."""
+    array = pa.LargeStringArray.from_buffers(len(offsets) - 1, pa.py_buffer(offsets), pa.py_buffer(data))
+    try:
+        return pd.arrays.ArrowStringArray(array, dtype=pd.StringDtype("pyarrow", na_value=np.nan))
+    except TypeError:  # pandas < 3
+        return pd.arrays.ArrowStringArray(array)
+
+
+def publish(csv_path='master_index.csv', store_dir=SHARED_INDEX_DIR, keep=KEEP_VERSIONS):
+    """Build and publish a new index version; returns the version string.
+
+    Rows marked dead by health_check.py are left out.
+    """
+    df = visible_rows(read_catalog_csv(csv_path)).reset_index(drop=True)
+    arrays = {}
+    columns = [str(col) for col in df.columns]
+    for i, col in enumerate(df.columns):
+        arrays[f'col{i}'], arrays[f'col{i}_offsets'] = shared_arrays.pack_strings(
+            df[col].fillna('').astype(str).tolist())
+
+    filename_index = build_filename_index(df)
+    arrays['bm25_terms'], arrays['bm25_term_offsets'] = shared_arrays.pack_strings(filename_index.terms)
+    arrays['bm25_indptr'] = filename_index.indptr
+    arrays['bm25_doc_ids'] = filename_index.doc_ids
+    arrays['bm25_weights'] = filename_index.weights
+
+    os.makedirs(store_dir, exist_ok=True)
+    version = f"{time.time_ns():x}"
+    data_file = f"catalog-{version}.bin"
+    layout = shared_arrays.write_file(os.path.join(store_dir, data_file), arrays)
+
+    manifest = {
+        "version": version,
+        "file": data_file,
+        "rows": len(df),
+        "columns": columns,
+        "layout": layout,
+        "source": os.path.abspath(csv_path),
+        "source_mtime": os.path.getmtime(csv_path),
+    }
+    tmp_path = os.path.join(store_dir, f".{MANIFEST_FILE}.{version}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(store_dir, MANIFEST_FILE))  # The swap
+
+    versions = sorted(name for name in os.listdir(store_dir)
+                      if name.startswith("catalog-") and name.endswith(".bin"))
+    for old in versions[:-keep]:
+        try:
+            os.remove(os.path.join(store_dir, old))
+        except OSError:
+            pass
+    return version
+
+
+class IndexSnapshot:
+    """One mapped version: ``df`` (zero-copy columns) and the BM25 filename index."""
+
+    def __init__(self, store_dir, manifest):
+        self.version = manifest["version"]
+        self.manifest = manifest
+        self._mapping, views = shared_arrays.map_file(os.path.join(store_dir, manifest["file"]),
+                                                      manifest["layout"])
+        self.df = pd.DataFrame({
+            col: arrow_column(views[f'col{i}'], views[f'col{i}_offsets'])
+            for i, col in enumerate(manifest["columns"])
+        })
+        self.filename_index = BM25Index(
+            range(manifest["rows"]),
+            shared_arrays.unpack_strings(views['bm25_terms'], views['bm25_term_offsets']),
+            views['bm25_indptr'],
+            views['bm25_doc_ids'],
+            views['bm25_weights']
+        )
+
+    def is_stale(self, csv_path):
+        """True if ``csv_path`` changed after this version was published."""
+        try:
+            return os.path.getmtime(csv_path) > self.manifest["source_mtime"]
+        except OSError:
+            return False
+
+
+class SharedIndex:
+    """Attach to the published index and follow version swaps."""
+
+    def __init__(self, store_dir=SHARED_INDEX_DIR):
+        self.store_dir = store_dir
+        self._snapshot = None
+        self._manifest_mtime = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        """Latest published IndexSnapshot, or None if nothing has been published.
+
+        Costs one stat() when the version has not changed.
+        """
+        manifest_path = os.path.join(self.store_dir, MANIFEST_FILE)
+        try:
+            mtime = os.stat(manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            return self._snapshot
+        if mtime == self._manifest_mtime:
+            return self._snapshot
+
+        with self._lock:
+            if mtime != self._manifest_mtime:
+                try:
+                    with open(manifest_path, 'r', encoding='utf-8') as f:
+                        manifest = json.load(f)
+                    if self._snapshot is None or manifest["version"] != self._snapshot.version:
+                        self._snapshot = IndexSnapshot(self.store_dir, manifest)
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"⚠️ Could not load shared index: {str(e)}")
+                self._manifest_mtime = mtime  # Don't retry a broken version on every call
+        return self._snapshot
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish master_index.csv as a shared read-only index.")
+    parser.add_argument("--csv", default='master_index.csv', help="index CSV to publish")
+    parser.add_argument("--dir", default=SHARED_INDEX_DIR, help="index store directory")
+    parser.add_argument("--watch", type=float, default=None, metavar="SECONDS",
+                        help="keep running and republish whenever the CSV changes")
+    args = parser.parse_args()
+
+    last_mtime = None
+    while True:
+        mtime = os.path.getmtime(args.csv)
+        if mtime != last_mtime:
+            version = publish(args.csv, args.dir)
+            print(f"✅ Published {args.csv} as version {version} in {args.dir}")
+            last_mtime = mtime
+        if args.watch is None:
+            break
+        time.sleep(args.watch)
@@ -0,0 +1,298 @@
+"""
+Several Telegram channels merged into one catalog.
+
+Channels are registered in .streamlit/secrets.toml, one table per source:
+
+    [sources.examlanka]
+    channel = "@examlanka"
+    priority = 0                    # Lower wins when a paper is in several channels
+    user_session = "user_session"   # Telethon user session that reads the channel history
+    rate = 1.0                      # History requests per second for this channel
+
+    [sources.partner]
+    channel = "@partner_papers"
+    priority = 1
+    user_session = "partner_session"
+    bot_token = "123:abc"           # Bot that downloads this channel's papers
+    bot_session = "partner_bot"     # Its MTProto session for files over 20 MB
+
+bot_token, api_id and api_hash default to TELEGRAM_BOT_TOKEN,
+TELEGRAM_API_ID and TELEGRAM_API_HASH.
+
+python sources.py syncs every channel at once: one Telethon client per
+source, all on one event loop, each paging through its channel's documents
+at its own rate and checkpointing into sources/<name>.csv. A run therefore
+takes about as long as the slowest channel, and only messages newer than the
+checkpoint are fetched. The exports are then merged into master_index.csv
+with a Source and a File Unique ID column. A paper posted in several
+channels has the same file_unique_id in each and is kept once, from the
+channel with the lowest priority number.
+
+Downloads are routed by the Source column: SourceRouter gives
+get_telegram_file_content the bot token and MTProto session of the paper's
+channel.
+
+    python sources.py --login partner   # log a source's user session in (once)
+    python sources.py                   # sync every source and merge
+    python sources.py --merge-only      # rebuild master_index.csv from the exports
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import pandas as pd
+
+from channel_export import export_documents
+from telegram_download import SECRETS_PATH, load_bot_token, load_mtproto_config
+
+SOURCES_DIR = 'sources'
+SOURCE_COLUMN = 'Source'
+UNIQUE_ID_COLUMN = 'File Unique ID'
+SYNC_RATE = 1.0  # History requests per second per channel (100 messages each)
+EXPORT_COLUMNS = ["File Name", "File ID", UNIQUE_ID_COLUMN, "Message ID"]
+
+
+class Source:
+    """One registered channel and the credentials used to read and download from it."""
+
+    def __init__(self, name, channel, priority=0, user_session=None, bot_token=None, bot_session=None,
+                 api_id=None, api_hash=None, rate=SYNC_RATE):
+        self.name = name
+        self.channel = channel
+        self.priority = priority
+        self.user_session = user_session or f"{name}_user"
+        self.bot_token = bot_token
+        self.bot_session = bot_session or f"bot_session_{name}"
+        self.api_id = api_id
+        self.api_hash = api_hash
+        self.rate = rate
+
+    def mtproto_config(self, default=None):
+        """MTProto settings for this source's bot (large downloads), or None."""
+        config = dict(default or {})
+        api_id = self.api_id or config.get("api_id")
+        api_hash = self.api_hash or config.get("api_hash")
+        if not api_id or not api_hash:
+            return None
+        config.update(api_id=int(api_id), api_hash=api_hash, session=self.bot_session)
+        return config
+
+    def csv_path(self, root=SOURCES_DIR):
+        return os.path.join(root, f"{self.name}.csv")
+
+    def checkpoint_path(self, root=SOURCES_DIR):
+        return os.path.join(root, f"{self.name}.checkpoint.json")
+
+
+def parse_sources(registry, default_bot_token=None, default_mtproto=None):
+    """Sources from ``{name: table}`` (st.secrets["sources"] or the parsed TOML), by priority."""
+    default_mtproto = default_mtproto or {}
+    sources = []
+    for name, table in dict(registry or {}).items():
+        table = dict(table)
+        if not table.get("channel"):
+            raise ValueError(f"source '{name}' has no channel")
+        sources.append(Source(
+            name,
+            table["channel"],
+            priority=int(table.get("priority", 0)),
+            user_session=table.get("user_session"),
+            bot_token=table.get("bot_token") or default_bot_token,
+            bot_session=table.get("bot_session"),
+            api_id=table.get("api_id") or default_mtproto.get("api_id"),
+            api_hash=table.get("api_hash") or default_mtproto.get("api_hash"),
+            rate=float(table.get("rate", SYNC_RATE)),
+        ))
+    return sorted(sources, key=lambda source: (source.priority, source.name))
+
+
+def load_sources(secrets_path=SECRETS_PATH):
+    """The registry in secrets.toml for offline scripts ([] if there is none)."""
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11
+        import tomli as tomllib
+
+    try:
+        with open(secrets_path, 'rb') as f:
+            registry = tomllib.load(f).get("sources", {})
+    except FileNotFoundError:
+        registry = {}
+    return parse_sources(registry, load_bot_token(secrets_path), load_mtproto_config(secrets_path))
+
+
+class SourceRouter:
+    """File ID -> Source for papers whose channel needs its own bot.
+
+    Only File IDs from sources whose bot token differs from the default are
+    kept, so a single-channel catalog costs nothing.
+    """
+
+    def __init__(self, sources, df, default_bot_token=None):
+        self.sources = {source.name: source for source in sources}
+        self.routes = {}
+        routed = {source.name for source in sources
+                  if source.bot_token and source.bot_token != default_bot_token}
+        if SOURCE_COLUMN in df.columns and routed:
+            names = df[SOURCE_COLUMN].astype(str)
+            mask = names.isin(routed)
+            for file_id, name in zip(df.loc[mask, 'File ID'].astype(str).str.strip(), names[mask]):
+                self.routes[file_id] = self.sources[name]
+
+    def source_for(self, file_id):
+        return self.routes.get(str(file_id).strip())
+
+    def bot_token(self, file_id, default):
+        source = self.source_for(file_id)
+        return source.bot_token if source is not None else default
+
+
+async def sync_source(source, root=SOURCES_DIR):
+    """Export the channel's documents newer than its checkpoint; returns (rows added, seconds)."""
+    from telethon import TelegramClient, utils
+
+    from mtproto_download import document_unique_id
+
+    start = time.perf_counter()
+    client = TelegramClient(source.user_session, source.api_id, source.api_hash)
+    await client.connect()
+    try:
+        if not await client.is_user_authorized():
+            raise RuntimeError(f"session '{source.user_session}' is not logged in "
+                               f"(python sources.py --login {source.name})")
+        entity = await client.get_entity(source.channel)
+
+        def row(message):
+            return {
+                "File Name": message.file.name or f"file_{message.id}.pdf",
+                "File ID": utils.pack_bot_file_id(message.document),
+                UNIQUE_ID_COLUMN: document_unique_id(message.document.id),
+                "Message ID": message.id,
+            }
+
+        # wait_time spaces out the history requests: this channel's own rate limit
+        _, added, _ = await export_documents(client, entity, source.csv_path(root), source.checkpoint_path(root),
+                                             EXPORT_COLUMNS, row, wait_time=1 / source.rate, label=source.name)
+    finally:
+        await client.disconnect()
+    return added, time.perf_counter() - start
+
+
+async def sync_all(sources, root=SOURCES_DIR):
+    """Sync every source concurrently; returns ``{name: (rows added, seconds) or exception}``."""
+    os.makedirs(root, exist_ok=True)
+    results = await asyncio.gather(*(sync_source(source, root) for source in sources), return_exceptions=True)
+    return {source.name: result for source, result in zip(sources, results)}
+
+
+def merge_sources(sources, root=SOURCES_DIR, csv_path='master_index.csv'):
+    """Merge the per-source exports into ``csv_path``, one row per file_unique_id.
+
+    The Health column written by health_check.py is carried over by File ID.
+    Returns ``{source name: rows kept}``.
+    """
+    from mtproto_download import file_unique_id  # Imports Telethon; the app only needs the router
+
+    frames = []
+    for source in sources:
+        if not os.path.exists(source.csv_path(root)):
+            continue
+        frame = pd.read_csv(source.csv_path(root))
+        frame[SOURCE_COLUMN] = source.name
+        frame['_priority'] = source.priority
+        frames.append(frame)
+    if not frames:
+        return {}
+    merged = pd.concat(frames, ignore_index=True)
+    merged['File ID'] = merged['File ID'].astype(str).str.strip()
+    if UNIQUE_ID_COLUMN not in merged.columns:
+        merged[UNIQUE_ID_COLUMN] = None
+    # Rows exported before the column existed, or from bot-side scripts
+    missing = merged[UNIQUE_ID_COLUMN].isna()
+    merged.loc[missing, UNIQUE_ID_COLUMN] = merged.loc[missing, 'File ID'].map(file_unique_id)
+    merged[UNIQUE_ID_COLUMN] = merged[UNIQUE_ID_COLUMN].fillna(merged['File ID'])
+
+    merged = merged.sort_values(['_priority', SOURCE_COLUMN, 'Message ID'], kind='stable')
+    merged = merged.drop_duplicates(UNIQUE_ID_COLUMN, keep='first')
+    merged = merged[["File Name", "File ID", UNIQUE_ID_COLUMN, SOURCE_COLUMN]].reset_index(drop=True)
+
+    if os.path.exists(csv_path):
+        existing = pd.read_csv(csv_path)
+        existing.columns = existing.columns.str.strip()
+        if 'Health' in existing.columns and 'File ID' in existing.columns:
+            health = dict(zip(existing['File ID'].astype(str).str.strip(), existing['Health']))
+            merged['Health'] = merged['File ID'].map(health)
+
+    tmp_path = csv_path + '.tmp'
+    merged.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, csv_path)
+    return merged[SOURCE_COLUMN].value_counts().to_dict()
+
+
+def run_sync(sources, root=SOURCES_DIR, csv_path='master_index.csv', merge_only=False, only=None):
+    """Sync the sources named in ``only`` (default: all), then merge every source's export.
+
+    If any sync fails, ``csv_path`` is left as it was. Returns False if
+    nothing was merged.
+    """
+    if not sources:
+        print(f"❌ No sources registered; add [sources.<name>] tables to {SECRETS_PATH}")
+        return False
+
+    if not merge_only:
+        selected = [source for source in sources if not only or source.name in only]
+        print(f"🔄 Syncing {len(selected)} channels concurrently...")
+        start = time.perf_counter()
+        results = asyncio.run(sync_all(selected, root))
+        elapsed = time.perf_counter() - start
+        slowest = 0.0
+        failed = []
+        for name, result in results.items():
+            if isinstance(result, BaseException):
+                print(f"   ❌ {name}: {type(result).__name__}: {result}")
+                failed.append(name)
+                continue
+            added, seconds = result
+            slowest = max(slowest, seconds)
+            print(f"   ✓ {name}: {added} new documents in {seconds:.1f}s")
+        print(f"⏱️  {elapsed:.1f}s wall clock (slowest channel {slowest:.1f}s)")
+        if failed:
+            # The synced exports are checkpointed; a later run resumes them and merges everything
+            print(f"\n❌ {', '.join(failed)} failed to sync; {csv_path} was not changed. "
+                  f"Fix the error and run again (or --merge-only to merge the last good exports).")
+            return False
+
+    exported = sum(len(pd.read_csv(source.csv_path(root))) for source in sources
+                   if os.path.exists(source.csv_path(root)))
+    counts = merge_sources(sources, root, csv_path)
+    kept = sum(counts.values())
+    print(f"\n✅ {kept} papers in {csv_path} ({exported - kept} cross-channel duplicates removed): "
+          + ", ".join(f"{name} {count}" for name, count in counts.items()))
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sync every registered channel and merge them into one index.")
+    parser.add_argument("--csv", default='master_index.csv', help="merged index to write")
+    parser.add_argument("--dir", default=SOURCES_DIR, help="directory for per-source exports and checkpoints")
+    parser.add_argument("--only", action="append", default=None, metavar="NAME",
+                        help="sync only this source (repeatable); the merge still uses every export")
+    parser.add_argument("--merge-only", action="store_true", help="skip syncing and just merge the exports")
+    parser.add_argument("--login", default=None, metavar="NAME", help="log a source's user session in and exit")
+    args = parser.parse_args()
+
+    sources = load_sources()
+    if args.login:
+        from telethon import TelegramClient
+
+        source = next((s for s in sources if s.name == args.login), None)
+        if source is None:
+            raise SystemExit(f"❌ Unknown source '{args.login}'")
+        print("Enter the PHONE NUMBER of an account that has joined the channel, NOT a bot token.")
+        with TelegramClient(source.user_session, source.api_id, source.api_hash) as client:
+            me = client.loop.run_until_complete(client.get_me())
+            print(f"✓ {source.name}: logged in as {me.first_name} (@{me.username or 'no username'})")
+    else:
+        ok = run_sync(sources, args.dir, args.csv, merge_only=args.merge_only, only=args.only)
+        exit(0 if ok else 1)
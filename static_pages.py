@@ -0,0 +1,254 @@
+"""
+Pre-rendered HTML listing pages for the most common searches.
+
+Most visitors ask for the same few listings ("physics 2024", "combined maths",
+"chemistry al"), and each one opens a Streamlit session just to run the same
+ranking again. python static_pages.py renders those listings once, with the
+app's own ranking (search.fuzzy_search restricted to the facet rows), into
+plain HTML files:
+
+    static/pages/index.html                       every subject, top listings
+    static/pages/chemistry.html                   one subject, all years
+    static/pages/chemistry-2024.html              subject x year
+    static/pages/chemistry-2024-english.html      subject x year x medium
+
+The combinations with the most papers are picked from the facet counts.
+Each paper links to its permalink in the app (?id=...) and each page links to the
+matching filtered view, so any static server or CDN can serve the directory
+with no Python per request:
+
+    python -m http.server --directory static/pages
+
+A stamp file records the catalog the pages were built from. Runs against an
+unchanged catalog do nothing, and --watch regenerates whenever the CSV
+changes. Pages from older runs that are no longer produced are removed.
+"""
+import argparse
+import hashlib
+import html
+import os
+import tempfile
+import time
+from urllib.parse import urlencode
+
+from facets import FacetIndex, popcount
+from permalinks import PermalinkIndex, permalink_key
+from search import build_file_terms, build_filename_index, fuzzy_search, visible_rows
+from shared_index import read_catalog_csv
+from trigram_index import TrigramIndex
+
+STATIC_PAGES_DIR = os.environ.get("STATIC_PAGES_DIR", os.path.join("static", "pages"))
+STATIC_APP_URL = os.environ.get("STATIC_APP_URL", "/")
+STAMP_FILE = ".catalog-stamp"
+TOP_COMBINATIONS = 200
+PAGE_LIMIT = 100  # Papers listed per page
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title} | Examlanka Past Paper Vault</title>
+<meta name="description" content="{description}">
+<style>
+body {{ background: #09262e; color: #ffffff; font-family: 'Poppins', Arial, sans-serif; margin: 0 auto; max-width: 900px; padding: 1.5rem; }}
+h1 {{ font-family: 'Barlow Condensed', Arial, sans-serif; font-size: 2.2rem; margin-bottom: 0.2rem; }}
+a {{ color: #ffffff; }}
+.subtitle {{ color: #db463b; font-size: 0.85rem; letter-spacing: 1px; margin-top: 0; }}
+.button {{ background: #db463b; border-radius: 8px; display: inline-block; font-weight: 600; margin: 0.5rem 0 1rem; padding: 0.5rem 1.2rem; text-decoration: none; }}
+ul {{ list-style: none; padding: 0; }}
+li {{ background: rgba(255, 255, 255, 0.04); border-left: 4px solid #db463b; border-radius: 6px; margin: 0.4rem 0; padding: 0.6rem 0.9rem; }}
+.count {{ color: rgba(255, 255, 255, 0.6); font-size: 0.85rem; }}
+.links a {{ display: inline-block; margin: 0.2rem 0.8rem 0.2rem 0; }}
+</style>
+</head>
+<body>
+<p><a href="index.html">📚 All subjects</a></p>
+<h1>{title}</h1>
+<p class="subtitle">powered by <strong>Examlanka.lk</strong></p>
+{body}
+<p class="count">Generated {generated} from {rows} papers.</p>
+</body>
+</html>
+"""
+
+
+def catalog_stamp(csv_path):
+    """Fingerprint of the catalog file; pages are rebuilt when it changes."""
+    with open(csv_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def page_name(subject, year=None, medium=None):
+    parts = [subject] + ([str(year)] if year else []) + ([medium] if medium else [])
+    return "-".join(part.replace(" ", "-") for part in parts) + ".html"
+
+
+def page_title(subject, year=None, medium=None):
+    title = subject.title()
+    if year:
+        title += f" {year}"
+    if medium:
+        title += f" {medium.title()} Medium"
+    return title + " Past Papers"
+
+
+def app_link(app_url, **params):
+    return app_url + "?" + urlencode({key: value for key, value in params.items() if value})
+
+
+def top_combinations(facet_index, limit=TOP_COMBINATIONS):
+    """The (subject, year, medium) listings with the most papers.
+
+    medium is None for the subject x year page covering every medium.
+    """
+    bitmaps = facet_index.bitmaps
+    combinations = []
+    for subject, subject_bitmap in bitmaps['subject'].items():
+        for year, year_bitmap in bitmaps['year'].items():
+            subject_year = subject_bitmap & year_bitmap
+            count = popcount(subject_year)
+            if not count:
+                continue
+            combinations.append((count, subject, year, None))
+            for medium, medium_bitmap in bitmaps['medium'].items():
+                count = popcount(subject_year & medium_bitmap)
+                if count:
+                    combinations.append((count, subject, year, medium))
+    combinations.sort(key=lambda c: (-c[0], c[1], -c[2], c[3] or ''))
+    return [(subject, year, medium) for _, subject, year, medium in combinations[:limit]]
+
+
+class PageRenderer:
+    """Runs the app's ranking over one catalog and renders listing pages."""
+
+    def __init__(self, df, app_url=STATIC_APP_URL, limit=PAGE_LIMIT):
+        self.df = df
+        self.app_url = app_url
+        self.limit = limit
+        self.facet_index = FacetIndex.build(df['File Name'].astype(str).tolist())
+        self.filename_index = build_filename_index(df)
+        self.trigram_index = TrigramIndex.build(df.index.tolist(), df['File Name'].astype(str).tolist())
+        self.file_terms = build_file_terms(df)
+        self.permalinks = PermalinkIndex.build(df)
+        self.generated = time.strftime("%Y-%m-%d %H:%M")
+
+    def rank(self, subject, year=None, medium=None):
+        """(top results, total matches) from fuzzy_search over rows carrying these facet values."""
+        filters = {'subject': [subject]}
+        if year:
+            filters['year'] = (year, year)
+        if medium:
+            filters['medium'] = [medium]
+        rows = self.facet_index.rows(self.facet_index.select(filters))
+        query = " ".join(str(part) for part in (subject, year, medium) if part)
+        results = fuzzy_search(query, self.df.iloc[rows], self.limit, filename_index=self.filename_index,
+                               trigram_index=self.trigram_index, file_terms=self.file_terms)
+        return results, len(rows)
+
+    def render(self, title, body):
+        return PAGE_TEMPLATE.format(title=html.escape(title), description=html.escape(f"Download {title} for free."),
+                                    body=body, generated=self.generated, rows=len(self.df))
+
+    def listing_page(self, subject, year=None, medium=None, related=()):
+        results, total = self.rank(subject, year, medium)
+        filters = {'subject': subject, 'year': year, 'medium': medium}
+        items = []
+        for _, row in results.iterrows():
+            name = str(row['File Name'])
+            stem = name[:-4] if name.lower().endswith('.pdf') else name
+            short_id = self.permalinks.link_for(permalink_key(row))
+            href = app_link(self.app_url, id=short_id) if short_id else app_link(self.app_url, q=stem)
+            items.append(f'<li><a href="{html.escape(href)}">'
+                         f'{html.escape(name)}</a></li>')
+        body = [f'<a class="button" href="{html.escape(app_link(self.app_url, **filters))}">'
+                f'🔍 Open in the Vault</a>',
+                f'<p class="count">{total} papers'
+                + (f', top {len(results)} shown' if total > len(results) else '') + '</p>',
+                '<ul>' + "\n".join(items) + '</ul>']
+        if related:
+            body.append('<h2>More listings</h2><p class="links">' + " ".join(
+                f'<a href="{page_name(*combination)}">{html.escape(page_title(*combination))}</a>'
+                for combination in related) + '</p>')
+        return self.render(page_title(subject, year, medium), "\n".join(body))
+
+    def home_page(self, subjects, combinations):
+        counts = {subject: popcount(bitmap) for subject, bitmap in self.facet_index.bitmaps['subject'].items()}
+        body = ['<h2>Subjects</h2><p class="links">' + " ".join(
+                    f'<a href="{page_name(subject)}">{html.escape(subject.title())}</a> '
+                    f'<span class="count">({counts[subject]})</span>'
+                    for subject in subjects) + '</p>',
+                '<h2>Popular listings</h2><p class="links">' + " ".join(
+                    f'<a href="{page_name(*combination)}">{html.escape(page_title(*combination))}</a>'
+                    for combination in combinations) + '</p>']
+        return self.render("Past Paper Vault", "\n".join(body))
+
+
+def write_page(out_dir, name, content):
+    fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix=".tmp")
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, os.path.join(out_dir, name))
+
+
+def generate(csv_path='master_index.csv', out_dir=STATIC_PAGES_DIR, app_url=STATIC_APP_URL,
+             top=TOP_COMBINATIONS, force=False):
+    """Render every page into ``out_dir``; returns the number of pages (0 if up to date)."""
+    stamp = catalog_stamp(csv_path)
+    stamp_path = os.path.join(out_dir, STAMP_FILE)
+    if not force and os.path.exists(stamp_path):
+        with open(stamp_path, 'r', encoding='utf-8') as f:
+            if f.read().strip() == stamp:
+                return 0
+
+    df = visible_rows(read_catalog_csv(csv_path)).reset_index(drop=True)
+    renderer = PageRenderer(df, app_url)
+    subjects = renderer.facet_index.values('subject')
+    combinations = top_combinations(renderer.facet_index, top)
+    by_subject = {}
+    for combination in combinations:
+        by_subject.setdefault(combination[0], []).append(combination)
+
+    os.makedirs(out_dir, exist_ok=True)
+    pages = {'index.html': renderer.home_page(subjects, combinations)}
+    for subject in subjects:
+        pages[page_name(subject)] = renderer.listing_page(subject, related=by_subject.get(subject, []))
+    for subject, year, medium in combinations:
+        related = [c for c in by_subject[subject] if c != (subject, year, medium)]
+        pages[page_name(subject, year, medium)] = renderer.listing_page(subject, year, medium, related)
+    for name, content in pages.items():
+        write_page(out_dir, name, content)
+
+    for name in os.listdir(out_dir):
+        if name.endswith(".html") and name not in pages:
+            os.remove(os.path.join(out_dir, name))
+    write_page(out_dir, STAMP_FILE, stamp)
+    return len(pages)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-render static listing pages for popular searches.")
+    parser.add_argument("--csv", default='master_index.csv', help="index CSV to render")
+    parser.add_argument("--dir", default=STATIC_PAGES_DIR, help="output directory")
+    parser.add_argument("--app-url", default=STATIC_APP_URL, help="URL of the Streamlit app the pages link to")
+    parser.add_argument("--top", type=int, default=TOP_COMBINATIONS,
+                        help="number of subject x year x medium listings to render")
+    parser.add_argument("--force", action="store_true", help="regenerate even if the catalog is unchanged")
+    parser.add_argument("--watch", type=float, default=None, metavar="SECONDS",
+                        help="keep running and regenerate whenever the CSV changes")
+    args = parser.parse_args()
+
+    last_mtime = None
+    while True:
+        mtime = os.path.getmtime(args.csv)
+        if mtime != last_mtime:
+            start = time.perf_counter()
+            count = generate(args.csv, args.dir, args.app_url, args.top, args.force)
+            if count:
+                print(f"✅ Rendered {count} pages into {args.dir} in {time.perf_counter() - start:.1f}s")
+            else:
+                print(f"✅ Pages in {args.dir} are up to date")
+            last_mtime = mtime
+        if args.watch is None:
+            break
+        time.sleep(args.watch)
@@ -0,0 +1,104 @@
+"""
+Canonical subject / medium / level vocabulary.
+
+Filenames and queries spell the same thing many ways: "chem" and "chemistry",
+"maths" and "mathematics", codes like "sft", and Sinhala or Tamil names
+("රසායන", "இரசாயனவியல்"). Each group below maps to one canonical id, and
+VOCABULARY flattens every spelling into ``token -> (kind, canonical id)`` so
+classifying a word is a single dictionary lookup.
+
+Tokens are matched after search.normalize_text (lowercase, separators
+removed, Sinhala/Tamil joiners dropped).
+"""
+
+SUBJECT_ALIASES = {
+    'physics': ['phy', 'bhouthika', 'භෞතික', 'பௌதிகவியல்'],
+    'chemistry': ['chem', 'rasayana', 'රසායන', 'இரசாயனவியல்'],
+    'biology': ['bio', 'jeewa', 'ජීව', 'உயிரியல்'],
+    'mathematics': ['maths', 'math', 'ganithaya', 'ගණිතය', 'கணிதம்'],
+    'combined': ['සංයුක්ත', 'இணைந்த'],  # Combined Maths
+    'commerce': ['වාණිජ', 'வர்த்தகம்'],
+    'history': ['ඉතිහාසය', 'வரலாறு'],
+    'geography': ['geo', 'භූගෝල', 'புவியியல்'],
+    'economics': ['econ', 'ආර්ථික', 'பொருளியல்'],
+    'accounting': ['accounts', 'ගිණුම්කරණය', 'கணக்கியல்'],
+    'science': ['விஞ்ஞானம்'],
+    'ict': ['තොරතුරු', 'தகவல்'],
+    'technology': ['tech'],
+    'buddhism': ['බුද්ධ', 'பௌத்தம்'],
+    'hinduism': ['හින්දු', 'இந்துசமயம்'],
+    'islam': [],
+    'christianity': [],
+    'art': ['චිත්‍ර', 'சித்திரம்'],
+    'music': ['සංගීතය', 'சங்கீதம்'],
+    'drama': ['නාට්‍ය', 'நாடகம்'],
+    'dancing': ['නර්තන', 'நடனம்'],
+    'agriculture': ['agri', 'කෘෂි', 'விவசாயம்'],
+    'business': ['ව්‍යාපාර', 'வணிகக்கல்வி'],
+    'botany': [],
+    'zoology': [],
+    'logic': ['තර්ක', 'அளவையியல்'],
+    'statistics': ['stats'],
+    'political': ['දේශපාලන', 'அரசியல்'],
+    # Technology stream subject codes
+    'sft': [],                   # Science for Technology
+    'egt': ['engineering'],      # Engineering Technology
+    'bst': ['biosystems'],       # Biosystems Technology
+    'est': [],
+    'git': [],                   # General Information Technology
+    'gk': ['general', 'knowledge'],
+}
+MEDIUM_ALIASES = {
+    'sinhala': ['sinhalese', 'සිංහල', 'சிங்களம்'],
+    'tamil': ['දෙමළ', 'தமிழ்'],
+    'english': ['ඉංග්‍රීසි', 'ஆங்கிலம்'],
+}
+LEVEL_ALIASES = {
+    'al': ['උසස්', 'உயர்தரம்', 'உயர்தர'],
+    'ol': ['සාමාන්‍ය', 'சாதாரண'],
+    'grade': ['ශ්‍රේණිය', 'தரம்'],
+}
+
+
+def clean_token(token):
+    """Lowercase and drop zero-width joiners, which filenames use inconsistently."""
+    return token.lower().replace('\u200d', '').replace('\u200c', '')
+
+
+def _ids(aliases):
+    return {clean_token(name): canonical
+            for canonical, names in aliases.items()
+            for name in [canonical, *names]}
+
+
+SUBJECT_IDS = _ids(SUBJECT_ALIASES)
+MEDIUM_IDS = _ids(MEDIUM_ALIASES)
+LEVEL_IDS = _ids(LEVEL_ALIASES)
+TAXONOMY = {'subject': SUBJECT_IDS, 'medium': MEDIUM_IDS, 'level': LEVEL_IDS}
+
+VOCABULARY = {}
+for kind, ids in TAXONOMY.items():
+    for token, canonical in ids.items():
+        VOCABULARY[token] = (kind, canonical)
+
+
+def canonical_token(token):
+    """Canonical id for a taxonomy token, other tokens unchanged."""
+    entry = VOCABULARY.get(token)
+    return entry[1] if entry else token
+
+
+def classify(words):
+    """Return ``(subjects, mediums, levels)`` canonical id sets for normalized words."""
+    found = {'subject': set(), 'medium': set(), 'level': set()}
+    for word in words:
+        entry = VOCABULARY.get(word)
+        if entry:
+            found[entry[0]].add(entry[1])
+    return found['subject'], found['medium'], found['level']
+
+
+def prefixes(subject, min_length=4):
+    """Latin spellings of a subject usable as word prefixes ("chem" in "chempaper")."""
+    return [name for name in [subject, *SUBJECT_ALIASES.get(subject, [])]
+            if len(name) >= min_length and name.isascii()]
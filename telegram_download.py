@@ -0,0 +1,302 @@
+"""
+Telegram file download helpers shared by the app and the offline scripts.
+
+Small files go through the Bot API (``getFile`` + file download), which is one
+fast HTTP round-trip. The Bot API refuses files over 20 MB, so those are
+handed to the MTProto backend in mtproto_download.py when it is configured.
+
+Every Bot API call goes through a process-wide circuit breaker with timeouts
+derived from recently observed latency (see resilience.py). Downloaded files
+are kept in a local PdfCache and served from there first; copies older than
+REVALIDATE_AFTER are re-checked against Telegram in the background
+(stale-while-revalidate), so a Telegram outage never blocks a cached paper.
+"""
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pdf_cache import PdfCache
+from resilience import CircuitBreaker, LatencyTracker, hedged_call
+
+TELEGRAM_API_BASE = os.environ.get("TELEGRAM_API_BASE", "https://api.telegram.org")
+SECRETS_PATH = os.path.join(".streamlit", "secrets.toml")
+FILE_TOO_BIG_DESCRIPTION = "file is too big"
+
+# Resilience settings
+HEDGE_GETFILE = True          # Race a second getFile when the first is unusually slow
+HEDGE_PERCENTILE = 0.9        # ...slower than this percentile of recent getFile calls
+HEDGE_WORKERS = 2             # Threads for hedged copies, apart from the download pool
+REVALIDATE_AFTER = 24 * 3600  # Seconds before a cached copy is re-checked in the background
+
+
+def load_bot_token(secrets_path=SECRETS_PATH):
+    """Bot token for offline scripts: TELEGRAM_BOT_TOKEN env var, else secrets.toml."""
+    token = os.environ.get("TELEGRAM_BOT_TOKEN")
+    if token:
+        return token
+    try:
+        with open(secrets_path, "r", encoding="utf-8") as f:
+            match = re.search(r'^\s*TELEGRAM_BOT_TOKEN\s*=\s*["\']([^"\']+)["\']', f.read(), re.MULTILINE)
+    except FileNotFoundError:
+        return None
+    return match.group(1) if match else None
+
+
+def load_mtproto_config(secrets_path=SECRETS_PATH):
+    """MTProto credentials for offline scripts (TELEGRAM_API_ID / TELEGRAM_API_HASH), or None."""
+    values = {}
+    try:
+        with open(secrets_path, "r", encoding="utf-8") as f:
+            secrets = f.read()
+    except FileNotFoundError:
+        secrets = ""
+    for key in ("TELEGRAM_API_ID", "TELEGRAM_API_HASH"):
+        value = os.environ.get(key)
+        if not value:
+            match = re.search(rf'^\s*{key}\s*=\s*["\']?([^"\'\s]+)', secrets, re.MULTILINE)
+            value = match.group(1) if match else None
+        values[key] = value
+    if not values["TELEGRAM_API_ID"] or not values["TELEGRAM_API_HASH"]:
+        return None
+    return {"api_id": int(values["TELEGRAM_API_ID"]), "api_hash": values["TELEGRAM_API_HASH"]}
+
+
+class TelegramUnavailableError(Exception):
+    """Transient upstream failure: timeout, connection error, 5xx or 429."""
+
+
+def is_file_too_big(result):
+    """True if a getFile response rejected the file for exceeding the Bot API limit."""
+    return FILE_TOO_BIG_DESCRIPTION in str(result.get("description", "")).lower()
+
+
+def download_via_mtproto(file_id, bot_token, mtproto_config):
+    """Fetch a large document over MTProto; returns (content, error)."""
+    try:
+        from mtproto_download import download_large_file
+
+        content = download_large_file(
+            file_id,
+            bot_token,
+            api_id=mtproto_config["api_id"],
+            api_hash=mtproto_config["api_hash"],
+            session=mtproto_config.get("session", "bot_session"),
+            workers=mtproto_config.get("workers", 4)
+        )
+        return content, None
+    except ValueError as e:
+        return None, f"❌ Invalid file ID for large download: {str(e)}"
+    except Exception as e:
+        return None, f"❌ Error downloading large file: {str(e)}"
+
+
+class TelegramDownloader:
+    """Bot API downloader with circuit breaking, adaptive timeouts and a local cache."""
+
+    def __init__(self, api_base=TELEGRAM_API_BASE, cache=None, breaker=None,
+                 getfile_latency=None, download_latency=None, hedge=HEDGE_GETFILE,
+                 revalidate_after=REVALIDATE_AFTER, max_workers=8, hedge_workers=HEDGE_WORKERS):
+        self.api_base = api_base
+        self.cache = cache
+        self.breaker = breaker or CircuitBreaker()
+        self.getfile_latency = getfile_latency or LatencyTracker(default_timeout=10.0, floor=2.0, ceiling=10.0)
+        self.download_latency = download_latency or LatencyTracker(default_timeout=30.0, floor=5.0, ceiling=30.0)
+        self.hedge = hedge
+        self.revalidate_after = revalidate_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="telegram")
+        # Hedges get their own small pool: under load they wait (or are cancelled)
+        # instead of doubling the requests competing for the download threads
+        self._hedge_executor = ThreadPoolExecutor(max_workers=hedge_workers, thread_name_prefix="telegram-hedge")
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
+
+    def _get(self, url, params, tracker):
+        """GET with an adaptive timeout; transient failures raise TelegramUnavailableError."""
+        import requests  # Imported on first use: it adds ~70 ms to the app's cold start
+
+        try:
+            response = requests.get(url, params=params, timeout=tracker.timeout())
+        except requests.exceptions.Timeout as e:
+            raise TelegramUnavailableError("Request timed out") from e
+        except requests.exceptions.ConnectionError as e:
+            raise TelegramUnavailableError(f"Network error: {str(e)}") from e
+
+        # elapsed = time until the response headers arrived
+        tracker.record(response.elapsed.total_seconds())
+        if response.status_code == 429 or response.status_code >= 500:
+            raise TelegramUnavailableError(f"Telegram returned HTTP {response.status_code}")
+        return response
+
+    def _get_file(self, file_id, bot_token, hedge=True):
+        api_url = f"{self.api_base}/bot{bot_token}/getFile"
+
+        def call():
+            return self._get(api_url, {"file_id": file_id}, self.getfile_latency).json()
+
+        hedge_after = self.getfile_latency.percentile(HEDGE_PERCENTILE) if (self.hedge and hedge) else None
+        return hedged_call(self._executor, call, hedge_after, hedge_executor=self._hedge_executor)
+
+    def _store(self, file_id, content):
+        if self.cache is not None and content:
+            try:
+                self.cache.put(file_id, content)
+            except OSError:
+                pass  # A full or read-only disk must not break downloads
+
+    def _schedule_revalidation(self, file_id, bot_token):
+        age = self.cache.age(file_id)
+        if age is None or age < self.revalidate_after:
+            return
+        with self._revalidating_lock:
+            if file_id in self._revalidating or not self.breaker.allow_request():
+                return
+            self._revalidating.add(file_id)
+        self._executor.submit(self._revalidate, file_id, bot_token)
+
+    def _revalidate(self, file_id, bot_token):
+        """Confirm a cached File ID still resolves on Telegram; drop it if it is gone."""
+        try:
+            result = self._get_file(file_id, bot_token, hedge=False)
+        except TelegramUnavailableError:
+            self.breaker.record_failure()
+        except ValueError:
+            self.breaker.record_success()  # Telegram answered, but not with JSON
+        except Exception:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+            if result.get("ok") or is_file_too_big(result):
+                self.cache.touch(file_id)
+            elif result.get("error_code") == 400:
+                self.cache.evict(file_id)
+        finally:
+            with self._revalidating_lock:
+                self._revalidating.discard(file_id)
+
+    def get_file(self, file_id, bot_token):
+        """Call getFile through the circuit breaker; returns (result, error).
+
+        ``result`` is Telegram's JSON reply, which may have ``ok`` False
+        (e.g. a dead File ID). ``error`` is set only when Telegram could not
+        be asked at all. Used by the batch jobs that need file metadata.
+        """
+        if not self.breaker.allow_request():
+            return None, "❌ Telegram is not responding right now. Please try again in a minute."
+        try:
+            result = self._get_file(str(file_id).strip(), bot_token)
+        except TelegramUnavailableError as e:
+            self.breaker.record_failure()
+            return None, f"❌ {str(e)}. Please try again."
+        except ValueError as e:
+            self.breaker.record_success()
+            return None, f"❌ Unexpected API response format: {str(e)}"
+        except Exception as e:
+            self.breaker.record_failure()
+            return None, f"❌ Error downloading file: {str(e)}"
+        self.breaker.record_success()
+        return result, None
+
+    def download_path(self, file_path, bot_token):
+        """Download a ``file_path`` returned by getFile; returns (content, error)."""
+        import requests
+
+        if not self.breaker.allow_request():
+            return None, "❌ Telegram is not responding right now. Please try again in a minute."
+        try:
+            response = self._get(f"{self.api_base}/file/bot{bot_token}/{file_path}", None, self.download_latency)
+            response.raise_for_status()
+        except TelegramUnavailableError as e:
+            self.breaker.record_failure()
+            return None, f"❌ {str(e)}. Please try again."
+        except requests.exceptions.RequestException as e:
+            self.breaker.record_success()
+            return None, f"❌ Network error: {str(e)}"
+        self.breaker.record_success()
+        return response.content, None
+
+    def fetch(self, file_id, bot_token, mtproto_config=None, record=True):
+        """Download file content and return (content, error).
+
+        ``record=False`` does not count the request toward cache popularity.
+        """
+        import requests
+
+        # Validate inputs
+        if not bot_token:
+            return None, "❌ Telegram Bot Token not configured."
+
+        file_id_str = str(file_id).strip()
+        if not file_id_str:
+            return None, "❌ Invalid file ID: File ID is empty."
+
+        # Serve the local copy first; refresh it in the background if it is stale
+        if self.cache is not None:
+            cached = self.cache.get(file_id_str, record=record)
+            if cached is not None:
+                self._schedule_revalidation(file_id_str, bot_token)
+                return cached, None
+
+        if not self.breaker.allow_request():
+            return None, "❌ Telegram is not responding right now. Please try again in a minute."
+
+        try:
+            # Get file path from Telegram
+            result = self._get_file(file_id_str, bot_token)
+
+            if not result.get("ok"):
+                # Telegram answered, so the service itself is healthy
+                self.breaker.record_success()
+                if is_file_too_big(result):
+                    if not mtproto_config:
+                        return None, "❌ File is larger than 20 MB and large-file downloads are not configured."
+                    content, error = download_via_mtproto(file_id_str, bot_token, mtproto_config)
+                    if content is not None:
+                        self._store(file_id_str, content)
+                    return content, error
+                error_description = result.get("description", "Unknown error")
+                error_code = result.get("error_code", "N/A")
+                return None, f"❌ Telegram API error ({error_code}): {error_description}"
+
+            file_path = result["result"]["file_path"]
+
+            # Download the file content
+            download_url = f"{self.api_base}/file/bot{bot_token}/{file_path}"
+            file_response = self._get(download_url, None, self.download_latency)
+            file_response.raise_for_status()
+            content = file_response.content
+
+        except TelegramUnavailableError as e:
+            self.breaker.record_failure()
+            return None, f"❌ {str(e)}. Please try again."
+        except requests.exceptions.RequestException as e:
+            self.breaker.record_success()
+            return None, f"❌ Network error: {str(e)}"
+        except (KeyError, ValueError) as e:
+            self.breaker.record_success()
+            return None, f"❌ Unexpected API response format: {str(e)}"
+        except Exception as e:
+            self.breaker.record_failure()
+            return None, f"❌ Error downloading file: {str(e)}"
+
+        self.breaker.record_success()
+        self._store(file_id_str, content)
+        return content, None
+
+
+default_downloader = TelegramDownloader(cache=PdfCache())
+
+
+def get_telegram_file_content(file_id, bot_token, mtproto_config=None, source=None, record=True):
+    """Download file content from Telegram and return bytes.
+
+    ``mtproto_config`` (``api_id``, ``api_hash`` and optionally ``session`` /
+    ``workers``) enables the MTProto path for files over the Bot API limit.
+    ``source`` (a sources.Source, see SourceRouter) downloads a partner
+    channel's paper with that channel's bot and MTProto session instead.
+    ``record=False`` does not count the request toward cache popularity.
+    """
+    if source is not None:
+        bot_token = source.bot_token or bot_token
+        mtproto_config = source.mtproto_config(mtproto_config)
+    return default_downloader.fetch(file_id, bot_token, mtproto_config, record=record)
@@ -0,0 +1,161 @@
+"""
+Tests for the compact catalog layout used for large indexes.
+Run this with: python test_compact_catalog.py
+"""
+
+import pickle
+import sys
+
+# Set UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+import numpy as np
+import pandas as pd
+
+from compact_catalog import CompactCatalog, compact_frame
+from permalinks import permalink_keys
+from search import build_file_terms, build_filename_index, fuzzy_search, visible_rows
+
+FILE_IDS = [
+    "BQACAgUAAyEGAASpjFBFAAM5aVEgY-mlpZpB38pX_w3l3zJgedkAAvocAAJxHYlWb8nZarcN4b82BA",
+    "BQACAgUAAyEGAASpjFBFAAM6aVEgaAi96G14Z0eseu5GzqXbMcIAAvscAAJxHYlWpN_IYZxKJBo2BA",
+    " hand edited id ",  # Not base64url: kept verbatim
+    "id3",
+    None,
+    "BQACAgUAAyEGAASpjFBFAAM7aVEga5fsw5-CPMekSpOjeL1mojwAAvwcAAJxHYlWR_4fvijdKto2BA",
+]
+NAMES = [
+    "2021_AL_Physics_English_Medium_Past_Paper.pdf",
+    "2021_AL_Physics_Marking_Scheme.pdf",
+    "රසායන විද්‍යාව 2019 AL.pdf",
+    "2019_AL_Chemistry_English_Medium.pdf",
+    "2018_OL_Mathematics.pdf",
+    "2020_AL_Combined_Maths_Sinhala_Medium.pdf",
+]
+
+
+def sample_frame():
+    return pd.DataFrame({
+        "File Name": NAMES,
+        "File ID": FILE_IDS,
+        "Health": [None, "dead", None, None, None, None],
+        "Message ID": [101, 102, 103, 104, 105, 106],
+    })
+
+
+def test_round_trip():
+    """Test that every value reads back exactly as it was given"""
+    print("\nTesting round trip...")
+
+    df = sample_frame()
+    catalog = CompactCatalog.from_frame(df)
+    frame = catalog.frame()
+
+    # Test 1: File IDs, including verbatim and missing ones, and names
+    assert frame["File ID"].tolist()[:4] == FILE_IDS[:4] and pd.isna(frame["File ID"].iloc[4])
+    assert frame["File Name"].tolist() == NAMES
+    assert catalog.file_id(5) == FILE_IDS[5] and catalog.name(2) == NAMES[2]
+    print("  ✓ File IDs and names unchanged")
+
+    # Test 2: Real File IDs are stored as raw bytes, narrower than the text
+    assert catalog.file_ids._ids.shape[1] < len(FILE_IDS[0])
+    print(f"  ✓ {len(FILE_IDS[0])}-character File IDs held in {catalog.file_ids._ids.shape[1]} bytes")
+
+    # Test 3: Metadata is coded
+    assert isinstance(frame["Health"].dtype, pd.CategoricalDtype)
+    assert frame["Message ID"].dtype == np.int8 and frame["Message ID"].tolist() == df["Message ID"].tolist()
+    print("  ✓ Health categorical, Message ID downcast")
+
+    # Test 4: st.cache_data pickles the frame
+    restored = pickle.loads(pickle.dumps(frame))
+    assert restored["File ID"].tolist()[:4] == FILE_IDS[:4]
+    print("  ✓ Pickle round trip")
+
+    print("✅ round trip tests passed")
+
+
+def test_views():
+    """Test that rows come back as views or small takes, not copies of the catalog"""
+    print("\nTesting views...")
+
+    catalog = CompactCatalog.from_frame(sample_frame())
+
+    # Test 1: A slice shares the catalog's buffers
+    head = catalog.rows(slice(0, 2))
+    assert np.shares_memory(head["File ID"].array._ids, catalog.file_ids._ids)
+    assert head["File ID"].tolist() == FILE_IDS[:2]
+    print("  ✓ Slices are views")
+
+    # Test 2: Taking rows copies only those rows, in order
+    taken = catalog.rows([5, 0])
+    assert taken["File ID"].tolist() == [FILE_IDS[5], FILE_IDS[0]]
+    assert taken["File ID"].array._ids.shape[0] == 2 and taken.index.tolist() == [5, 0]
+    print("  ✓ Takes hold only the chosen rows")
+
+    # Test 3: Small catalogs are left as they are
+    df = sample_frame()
+    assert compact_frame(df) is df
+    assert isinstance(compact_frame(df, min_rows=1)["File ID"].array, type(catalog.file_ids))
+    print("  ✓ compact_frame only switches for large catalogs")
+
+    print("✅ view tests passed")
+
+
+def test_app_operations():
+    """Test that the app's search and link code gives the same answers on the compact frame"""
+    print("\nTesting app operations...")
+
+    df = sample_frame()
+    df.loc[4, "File ID"] = "id4"
+    plain = visible_rows(df)
+    compact = visible_rows(CompactCatalog.from_frame(df).frame())
+
+    # Test 1: Dead rows are hidden the same way
+    assert compact.index.tolist() == plain.index.tolist() == [0, 2, 3, 4, 5]
+    print("  ✓ visible_rows")
+
+    # Test 2: Search results are identical
+    for query in ["physics 2021", "chemistry", "2020 combined maths"]:
+        expected = fuzzy_search(query, plain, filename_index=build_filename_index(plain),
+                                file_terms=build_file_terms(plain))
+        got = fuzzy_search(query, compact, filename_index=build_filename_index(compact),
+                           file_terms=build_file_terms(compact))
+        assert got["File ID"].tolist() == expected["File ID"].tolist(), query
+        assert got["Match Score"].tolist() == expected["Match Score"].tolist(), query
+    print("  ✓ fuzzy_search")
+
+    # Test 3: Permalinks are derived from the same keys
+    assert permalink_keys(compact) == permalink_keys(plain)
+    print("  ✓ permalink keys")
+
+    print("✅ app operation tests passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 60)
+    print("RUNNING COMPACT CATALOG TESTS")
+    print("=" * 60)
+
+    try:
+        test_round_trip()
+        test_views()
+        test_app_operations()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    exit(0 if success else 1)
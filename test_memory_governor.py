@@ -0,0 +1,215 @@
+"""
+Tests for the process-wide memory budget on sessions' download caches.
+Run this with: python test_memory_governor.py
+"""
+
+import gc
+import random
+import sys
+import threading
+
+# Set UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+from memory_governor import MemoryGovernor
+
+MB = 1024 ** 2
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_budget_holds_across_many_sessions():
+    """Test that many concurrent sessions never push the total over the budget"""
+    print("\nTesting the budget under many sessions...")
+
+    governor = MemoryGovernor(budget=20 * MB)
+    sessions = [governor.new_cache() for _ in range(200)]
+    over_budget = []
+
+    def student(index):
+        rng = random.Random(index)
+        cache = sessions[index]
+        for paper in range(5):
+            key = f"file_content_{index}_{paper}"
+            cache[key] = (b"%" * rng.randint(MB // 4, 3 * MB), None)
+            cache.get(f"file_content_{index}_{rng.randrange(paper + 1)}")  # Revisit an earlier paper
+            usage = governor.usage()
+            if usage["total"] > usage["budget"]:
+                over_budget.append(usage["total"])
+
+    threads = [threading.Thread(target=student, args=(index,)) for index in range(len(sessions))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Test 1: The budget held after every single insert
+    assert not over_budget, f"over budget {len(over_budget)} times"
+    usage = governor.usage()
+    assert usage["evictions"] > 0 and 0 < usage["total"] <= 20 * MB
+    print(f"  ✓ {usage['evictions']} papers evicted, {usage['total'] / MB:.1f} MB held of 20 MB")
+
+    # Test 2: The accounting matches what the caches really hold
+    held = sum(len(value[0]) for cache in sessions for value in dict.values(cache))
+    assert held == usage["cached"]
+    print("  ✓ Accounting matches cache contents")
+
+    print("✅ many-session budget tests passed")
+
+
+def test_eviction_prefers_large_idle_papers():
+    """Test that eviction picks by size and recency across sessions"""
+    print("\nTesting eviction order...")
+
+    clock = FakeClock()
+    governor = MemoryGovernor(budget=10 * MB, clock=clock)
+    idle, busy, newcomer = governor.new_cache(), governor.new_cache(), governor.new_cache()
+    idle["big"] = (b"x" * (4 * MB), None)
+    idle["small"] = (b"x" * MB, None)
+    clock.now = 100.0
+    busy["recent"] = (b"x" * (4 * MB), None)
+
+    # Test 1: The big paper idle for 100s goes before the equally big recent one and the small idle one
+    clock.now = 101.0
+    newcomer["new"] = (b"x" * (3 * MB), None)
+    assert "big" not in idle and "small" in idle and "recent" in busy and "new" in newcomer
+    print("  ✓ Large idle paper evicted from another session")
+
+    # Test 2: Reading a paper counts as using it
+    clock.now = 500.0
+    idle["small"]
+    busy["recent"]
+    clock.now = 501.0
+    newcomer["newer"] = (b"x" * (3 * MB), None)
+    assert "new" not in newcomer and "recent" in busy
+    print("  ✓ Recently read papers kept")
+
+    # Test 3: The paper just prepared is kept even when it alone exceeds the budget
+    huge = governor.new_cache()
+    huge["huge"] = (b"x" * (12 * MB), None)
+    assert "huge" in huge and governor.usage()["papers"] == 1
+    print("  ✓ Oversized paper still served")
+
+    print("✅ eviction order tests passed")
+
+
+def test_media_and_dropped_sessions():
+    """Test that media storage counts toward the budget and dropped sessions are forgotten"""
+    print("\nTesting media accounting and session cleanup...")
+
+    button_bytes = b"y" * (2 * MB)
+    media = [button_bytes]
+
+    governor = MemoryGovernor(budget=6 * MB, media_contents=lambda: media)
+    cache = governor.new_cache()
+
+    # Test 1: A cached PDF that is also a download button is counted once
+    cache["a"] = (button_bytes, None)
+    assert governor.usage()["total"] == 2 * MB
+    media.append(b"z" * (3 * MB))  # Another session's button
+    assert governor.usage()["total"] == 5 * MB
+    print("  ✓ Media bytes counted without double counting")
+
+    # Test 2: Media pressure evicts cached papers, but not one still on a button
+    cache["p"] = (b"x" * MB, None)
+    cache["b"] = (b"x" * (2 * MB), None)
+    assert "p" not in cache and "a" in cache and "b" in cache
+    print("  ✓ Media counts toward the budget")
+
+    # Test 3: Clearing or dropping a session releases its bytes
+    cache.clear()
+    assert governor.usage()["cached"] == 0
+    other = governor.new_cache()
+    other["c"] = (b"x" * MB, None)
+    del other
+    gc.collect()
+    assert governor.usage()["cached"] == 0 and governor.usage()["sessions"] == 0
+    print("  ✓ Dropped sessions forgotten")
+
+    print("✅ media and cleanup tests passed")
+
+
+def test_papers_on_buttons_are_not_evicted():
+    """Test that evicting a paper whose bytes stay in media storage is not counted as room freed"""
+    print("\nTesting papers still held by download buttons...")
+
+    clock = FakeClock()
+    media = []
+    governor = MemoryGovernor(budget=4 * MB, media_contents=lambda: media, clock=clock)
+
+    def prepare(cache, key, size):
+        # As in app.py: the prepared paper becomes the session's download button
+        content = b"x" * size
+        cache[key] = (content, None)
+        media.append(content)
+        return content
+
+    a, b, c = governor.new_cache(), governor.new_cache(), governor.new_cache()
+    a_content = prepare(a, "a", 3 * MB)
+    clock.now = 10.0
+    prepare(b, "b", 3 * MB)
+    clock.now = 20.0
+    prepare(c, "c", MB)
+
+    # Test 1: Evicting A or B would free nothing, so neither is evicted
+    usage = governor.usage()
+    assert "a" in a and "b" in b and "c" in c
+    assert usage["evictions"] == 0 and usage["total"] == 7 * MB
+    print("  ✓ No evictions that free nothing")
+
+    # Test 2: Evicted content that stays in media storage is still counted once
+    governor.budget = 0
+    media.append(b"y" * MB)  # A media file no session caches
+    assert governor.enforce() == 0 and governor.usage()["total"] == 8 * MB
+    governor.budget = 4 * MB
+    media.pop()
+    print("  ✓ Media-held bytes not reported as freed")
+
+    # Test 3: Once A's button is gone, its paper can be freed and is the first to go
+    media.remove(a_content)
+    clock.now = 30.0
+    d = governor.new_cache()
+    prepare(d, "d", MB)
+    usage = governor.usage()
+    assert "a" not in a and "b" in b and "c" in c and "d" in d
+    assert usage["evictions"] == 1 and usage["total"] == 5 * MB
+    print("  ✓ Papers evicted once their buttons are gone")
+
+    print("✅ download button tests passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 60)
+    print("RUNNING MEMORY GOVERNOR TESTS")
+    print("=" * 60)
+
+    try:
+        test_budget_holds_across_many_sessions()
+        test_eviction_prefers_large_idle_papers()
+        test_media_and_dropped_sessions()
+        test_papers_on_buttons_are_not_evicted()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    exit(0 if success else 1)
@@ -0,0 +1,137 @@
+"""
+Tests for the on-disk PDF cache (admission, pinning and popularity counts).
+Run this with: python test_pdf_cache.py
+"""
+
+import sys
+import tempfile
+
+# Set UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+from pdf_cache import PdfCache, cache_key
+from popularity import COUNTER_MAX, CountMinSketch
+
+PAPER = b"%PDF-1.4 physics 2021 paper" + b"0" * 2048
+
+
+def test_cache_admission_and_pinning():
+    """Test that one-off downloads cannot evict popular or pinned papers"""
+    print("\nTesting PDF cache admission...")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = PdfCache(cache_dir, max_bytes=3 * len(PAPER))
+        for name in ["hot_1", "hot_2", "hot_3"]:
+            for _ in range(3):
+                cache.get(name)
+            assert cache.put(name, PAPER)
+
+        # Test 1: A paper requested once is not admitted over popular ones
+        assert cache.get("obscure") is None
+        assert not cache.put("obscure", PAPER)
+        assert all(cache.get(name) == PAPER for name in ["hot_1", "hot_2", "hot_3"])
+        print("  ✓ One-off request rejected")
+
+        # Test 2: Once it is asked for more often, it replaces the least recently used paper
+        for _ in range(6):
+            cache.get("rising")
+        assert cache.put("rising", PAPER)
+        assert cache.get("hot_1") is None and cache.get("rising") == PAPER
+        print("  ✓ Popular newcomer admitted")
+
+        # Test 3: Pinned papers are never evicted
+        cache.pin(["hot_2"])
+        for _ in range(20):
+            cache.get("newer")
+        assert cache.put("newer", PAPER)
+        assert cache.get("hot_2") == PAPER and cache.get("hot_3") is None
+        print("  ✓ Pinned paper kept")
+
+        # Test 4: The index is rebuilt from disk
+        assert PdfCache(cache_dir).index.size == 3 * len(PAPER)
+
+    print("✅ cache admission tests passed")
+
+
+def test_popularity_seeded_once():
+    """Test that the event log seeds popularity once, however often the app warms up"""
+    print("\nTesting popularity seeding...")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = PdfCache(cache_dir)
+        downloads = [("hot", 5), ("warm", 2)]
+
+        # Test 1: The first warm-up counts the logged downloads
+        assert cache.seed(downloads)
+        seeded = cache.index.popularity.estimate(cache_key("hot"))
+        assert seeded >= 5
+        print("  ✓ Logged downloads counted")
+
+        # Test 2: Later warm-ups replay the same log without counting it again
+        for _ in range(3):
+            assert not cache.seed(downloads)
+        assert cache.index.popularity.estimate(cache_key("hot")) == seeded
+        print("  ✓ Re-seeding ignored")
+
+        # Test 3: Live requests are still counted
+        cache.get("hot")
+        assert cache.index.popularity.estimate(cache_key("hot")) == seeded + 1
+        print("  ✓ Lookups counted")
+
+        # Test 4: Replays of logged downloads read without counting them again
+        cache.put("hot", PAPER)
+        assert cache.get("hot", record=False) == PAPER
+        assert cache.index.popularity.estimate(cache_key("hot")) == seeded + 1
+        print("  ✓ Replays not counted")
+
+    print("✅ popularity seeding tests passed")
+
+
+def test_sketch_counters_saturate():
+    """Test that the hottest paper's count stops at the counter cap instead of wrapping to 0"""
+    print("\nTesting sketch counter cap...")
+
+    sketch = CountMinSketch(width=64)
+    for _ in range(COUNTER_MAX + 10):
+        sketch.add("hot")
+    sketch.add("cold")
+
+    # Test 1: The count stays at the cap
+    assert sketch.estimate("hot") == COUNTER_MAX, sketch.estimate("hot")
+    print("  ✓ Count held at the cap")
+
+    # Test 2: The hot key still outranks a cold one
+    assert sketch.estimate("hot") > sketch.estimate("cold")
+    print("  ✓ Hot key still hottest")
+
+    print("✅ counter cap tests passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 60)
+    print("RUNNING PDF CACHE TESTS")
+    print("=" * 60)
+
+    try:
+        test_cache_admission_and_pinning()
+        test_popularity_seeded_once()
+        test_sketch_counters_saturate()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    exit(0 if success else 1)
@@ -0,0 +1,329 @@
+"""
+Tests for the Telegram resilience layer (circuit breaker, adaptive timeouts,
+hedged getFile and serving cached copies during outages).
+Run this with: python test_resilience.py
+
+All traffic goes to the fault-injecting FakeBotAPI on localhost.
+"""
+
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Set UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+from fake_bot_api import FakeBotAPI
+from health_check import classify, is_auth_error
+from pdf_cache import PdfCache
+from resilience import CircuitBreaker, LatencyTracker, hedged_call
+from telegram_download import TelegramDownloader
+
+PAPER = b"%PDF-1.4 physics 2021 paper" + b"0" * 2048
+FILES = {"paper_1": PAPER, "paper_2": PAPER[::-1]}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_downloader(fake, cache_dir, **kwargs):
+    breaker = kwargs.pop("breaker", CircuitBreaker(window=10, min_requests=4, cooldown=60))
+    return TelegramDownloader(api_base=fake.base_url, cache=PdfCache(cache_dir), breaker=breaker, **kwargs)
+
+
+def test_circuit_breaker_states():
+    """Test breaker trips on error rate, fails fast and recovers via a probe"""
+    print("Testing circuit breaker states...")
+
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=0.5, window=10, min_requests=4, cooldown=30, clock=clock)
+
+    # Test 1: Too few samples never trips
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    # Test 2: Crossing the threshold opens the circuit
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+    # Test 3: After the cool-down exactly one probe is allowed
+    clock.now += 31
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    # Test 4: A failed probe re-opens, a successful one closes
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 31
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    print("✅ circuit breaker tests passed")
+
+
+def test_adaptive_timeouts():
+    """Test timeouts follow observed latency percentiles within bounds"""
+    print("\nTesting adaptive timeouts...")
+
+    tracker = LatencyTracker(default_timeout=10.0, floor=1.0, ceiling=10.0, min_samples=5, multiplier=3.0)
+
+    # Test 1: Default until enough samples
+    assert tracker.timeout() == 10.0
+
+    # Test 2: Fast upstream shrinks the timeout
+    for _ in range(20):
+        tracker.record(0.5)
+    assert tracker.timeout() == 1.5
+
+    # Test 3: Floor and ceiling hold
+    for _ in range(200):
+        tracker.record(0.01)
+    assert tracker.timeout() == 1.0
+    for _ in range(200):
+        tracker.record(8.0)
+    assert tracker.timeout() == 10.0
+
+    print("✅ adaptive timeout tests passed")
+
+
+def test_hedged_call():
+    """Test a slow first attempt is raced by a second one"""
+    print("\nTesting hedged calls...")
+
+    calls = []
+
+    def slow_then_fast():
+        calls.append(1)
+        time.sleep(1.0 if len(calls) == 1 else 0.01)
+        return len(calls)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        start = time.perf_counter()
+        result = hedged_call(executor, slow_then_fast, hedge_after=0.05)
+        elapsed = time.perf_counter() - start
+
+    assert result == 2, "Hedged attempt should win"
+    assert elapsed < 0.5, f"Hedging should cut latency, took {elapsed:.2f}s"
+    print(f"  ✓ Hedged result in {elapsed * 1000:.0f} ms instead of 1000 ms")
+
+    # Test 2: The copy runs on its own pool when every download thread is busy
+    calls.clear()
+    with ThreadPoolExecutor(max_workers=1) as executor, ThreadPoolExecutor(max_workers=1) as hedges:
+        start = time.perf_counter()
+        result = hedged_call(executor, slow_then_fast, hedge_after=0.05, hedge_executor=hedges)
+        elapsed = time.perf_counter() - start
+    assert result == 2 and elapsed < 0.5, f"Hedge should not queue behind downloads, took {elapsed:.2f}s"
+    print("  ✓ Hedge runs on its own pool")
+
+    print("✅ hedged call tests passed")
+
+
+def test_download_and_cache():
+    """Test downloads through the fake API and reuse of the local copy"""
+    print("\nTesting download through fake Bot API...")
+
+    with FakeBotAPI(files=FILES) as fake, tempfile.TemporaryDirectory() as cache_dir:
+        downloader = make_downloader(fake, cache_dir)
+
+        # Test 1: Successful download
+        content, error = downloader.fetch("paper_1", "token")
+        assert error is None, error
+        assert content == PAPER
+
+        # Test 2: Second fetch is served locally
+        requests_before = fake.request_count
+        content, error = downloader.fetch("paper_1", "token")
+        assert content == PAPER and error is None
+        assert fake.request_count == requests_before, "Cached copy should not hit Telegram"
+
+        # Test 3: Unknown file is a client error and does not count against the breaker
+        for _ in range(10):
+            content, error = downloader.fetch("missing", "token")
+            assert content is None and "400" in error
+        assert downloader.breaker.state == CircuitBreaker.CLOSED
+
+    print("✅ download and cache tests passed")
+
+
+def test_outage_fails_fast_and_serves_cache():
+    """Test the breaker opens during an outage while cached papers keep working"""
+    print("\nTesting Telegram outage handling...")
+
+    with FakeBotAPI(files=FILES) as fake, tempfile.TemporaryDirectory() as cache_dir:
+        downloader = make_downloader(fake, cache_dir)
+        content, error = downloader.fetch("paper_1", "token")
+        assert error is None
+
+        # Telegram starts failing every request
+        fake.error_rate = 1.0
+        for _ in range(4):
+            content, error = downloader.fetch("paper_2", "token")
+            assert content is None and error
+        assert downloader.breaker.state == CircuitBreaker.OPEN
+
+        # Test 1: Uncached files fail fast without touching upstream
+        requests_before = fake.request_count
+        start = time.perf_counter()
+        content, error = downloader.fetch("paper_2", "token")
+        assert content is None and "not responding" in error
+        assert fake.request_count == requests_before
+        assert time.perf_counter() - start < 0.05
+        print("  ✓ Open circuit fails fast")
+
+        # Test 2: Cached files are still served
+        content, error = downloader.fetch("paper_1", "token")
+        assert content == PAPER and error is None
+        print("  ✓ Cached copy served during outage")
+
+    print("✅ outage tests passed")
+
+
+def test_rate_limits_trip_breaker():
+    """Test sustained 429 responses count as upstream failures"""
+    print("\nTesting 429 handling...")
+
+    with FakeBotAPI(files=FILES, rate_limit_rate=1.0) as fake, tempfile.TemporaryDirectory() as cache_dir:
+        downloader = make_downloader(fake, cache_dir)
+        for _ in range(4):
+            content, error = downloader.fetch("paper_1", "token")
+            assert content is None and "429" in error
+        assert downloader.breaker.state == CircuitBreaker.OPEN
+
+    print("✅ 429 tests passed")
+
+
+def test_adaptive_timeout_and_hedging_against_fake():
+    """Test learned timeouts cut off a hung getFile and hedging rescues slow ones"""
+    print("\nTesting adaptive timeout with slow upstream...")
+
+    with FakeBotAPI(files=FILES, latency=0.01) as fake, tempfile.TemporaryDirectory() as cache_dir:
+        getfile_latency = LatencyTracker(default_timeout=10.0, floor=0.2, ceiling=10.0, min_samples=5)
+        downloader = make_downloader(fake, cache_dir, getfile_latency=getfile_latency, hedge=True)
+
+        # Warm up the latency tracker
+        for _ in range(6):
+            downloader.fetch("missing", "token")
+        assert getfile_latency.timeout() < 1.0
+
+        # Test 1: One slow getFile is hedged by a fast second request
+        fake.slow_next_getfile(1, 2.0)
+        start = time.perf_counter()
+        content, error = downloader.fetch("paper_1", "token")
+        elapsed = time.perf_counter() - start
+        assert content == PAPER, error
+        assert elapsed < 1.0, f"Hedged download took {elapsed:.2f}s"
+        print(f"  ✓ Hedged getFile finished in {elapsed * 1000:.0f} ms")
+
+        # Test 2: Without hedging the learned timeout gives up early
+        downloader.hedge = False
+        fake.slow_next_getfile(1, 2.0)
+        start = time.perf_counter()
+        content, error = downloader.fetch("paper_2", "token")
+        elapsed = time.perf_counter() - start
+        assert content is None and "timed out" in error
+        assert elapsed < 1.0, f"Adaptive timeout took {elapsed:.2f}s"
+        print(f"  ✓ Adaptive timeout fired after {elapsed * 1000:.0f} ms instead of 10 s")
+
+    print("✅ adaptive timeout tests passed")
+
+
+def test_stale_copy_is_revalidated():
+    """Test stale copies are re-checked in the background and evicted if gone"""
+    print("\nTesting stale-while-revalidate...")
+
+    with FakeBotAPI(files=FILES) as fake, tempfile.TemporaryDirectory() as cache_dir:
+        downloader = make_downloader(fake, cache_dir, revalidate_after=0)
+        content, error = downloader.fetch("paper_1", "token")
+        assert error is None
+
+        # File disappears from Telegram; the stale copy is still served once
+        del fake.files["paper_1"]
+        content, error = downloader.fetch("paper_1", "token")
+        assert content == PAPER
+
+        deadline = time.time() + 2
+        while downloader.cache.get("paper_1") is not None and time.time() < deadline:
+            time.sleep(0.02)
+        assert downloader.cache.get("paper_1") is None, "Dead File ID should be evicted"
+        print("  ✓ Dead File ID evicted")
+
+        # An unexpected error while revalidating counts against Telegram, not for it
+        def broken_get_file(*args, **kwargs):
+            raise RuntimeError("connection reset")
+
+        downloader._get_file = broken_get_file
+        downloader._revalidate("paper_2", "token")
+        assert list(downloader.breaker._outcomes)[-1] is False
+        print("  ✓ Revalidation errors recorded as failures")
+
+    print("✅ stale-while-revalidate tests passed")
+
+
+def test_health_check_classification():
+    """Test that only replies about the File ID itself change its health"""
+    print("\nTesting health classification...")
+
+    # Test 1: Resolved, too big and wrong IDs are conclusive
+    assert classify({"ok": True, "result": {"file_size": 10, "file_path": "a.pdf"}})["status"] == "ok"
+    assert classify({"ok": False, "error_code": 400, "description": "Bad Request: file is too big"})["status"] == "large"
+    for description in ["Bad Request: wrong file_id or the file is temporarily unavailable",
+                        "Bad Request: FILE_REFERENCE_EXPIRED file reference expired"]:
+        assert classify({"ok": False, "error_code": 400, "description": description})["status"] == "dead"
+    print("  ✓ ok, large and dead")
+
+    # Test 2: Token, rate limit and server errors keep the previous health
+    for code in [401, 403, 429, 500, 502]:
+        assert classify({"ok": False, "error_code": code, "description": "Error"}) is None, code
+    assert classify({"ok": False, "error_code": 400, "description": "Bad Request: chat not found"}) is None
+    assert is_auth_error({"ok": False, "error_code": 401, "description": "Unauthorized"})
+    assert not is_auth_error({"ok": False, "error_code": 429, "description": "Too Many Requests"})
+    print("  ✓ Other errors are not dead")
+
+    print("✅ health classification tests passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 60)
+    print("RUNNING RESILIENCE TESTS")
+    print("=" * 60)
+
+    try:
+        test_circuit_breaker_states()
+        test_adaptive_timeouts()
+        test_hedged_call()
+        test_download_and_cache()
+        test_outage_fails_fast_and_serves_cache()
+        test_rate_limits_trip_breaker()
+        test_adaptive_timeout_and_hedging_against_fake()
+        test_stale_copy_is_revalidated()
+        test_health_check_classification()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    exit(0 if success else 1)
@@ -0,0 +1,203 @@
+"""
+Tests for filename search ranking.
+Run this with: python test_search.py
+"""
+
+import sys
+import threading
+
+# Set UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+import pandas as pd
+
+from search import build_file_terms, build_filename_index, fuzzy_search
+from sharded_search import ShardedSearchEngine
+from trigram_index import TrigramIndex
+
+NAMES = [
+    "2023_AL_Physics_Past_Paper.pdf",
+    "2023_AL_Physics_Kingswood_College_Paper.pdf",
+    "2023_AL_Physics_Term_Test.pdf",
+    "G13_2025_Physics_TermTest_3rd.pdf",
+    "Physics_Term_Test_Paper.pdf",
+    "2022_AL_Physics_Past_Paper.pdf",
+]
+# Unrelated papers, so query words are as rare in the catalog as on the live site
+FILLER = [f"{2000 + i % 24}_OL_Mathematics_Paper_{i}.pdf" for i in range(120)]
+# Real uploads with the year glued to the school name
+GLUED = [
+    "1753348448_G12_2025KINGSWOOD_CHEMPAPER2NDTERM.pdf",
+    "1754129252_G13_1stTermTest_2025kandyDharmarajacolla.pdf",
+]
+# Dated papers of the same subject, more than the app shows
+DATED = [f"{2000 + i % 24}_AL_Chemistry_Past_Paper_{i}.pdf" for i in range(60)]
+
+
+def catalog():
+    return pd.DataFrame({"File Name": NAMES + FILLER, "File ID": [f"id{i}" for i in range(len(NAMES + FILLER))]})
+
+
+def search(query):
+    df = catalog()
+    results = fuzzy_search(query, df, limit=10,
+                           filename_index=build_filename_index(df),
+                           trigram_index=TrigramIndex.build(df.index.tolist(), df["File Name"].tolist()),
+                           file_terms=build_file_terms(df))
+    return results["File Name"].tolist()
+
+
+def test_year_ranks_before_partial_name_matches():
+    """Test that trigram name matches never outrank an exact year"""
+    print("\nTesting year before partial name matches...")
+
+    results = search("physics 2023 term test")
+
+    # Test 1: Every 2023 paper comes before the 2025 and undated term tests
+    assert set(results[:3]) == set(NAMES[:3]), results
+    assert results.index(NAMES[3]) > 2 and results.index(NAMES[4]) > 2, results
+    print("  ✓ Exact-year papers first")
+
+    # Test 2: Among them, the 2023 term test ranks first
+    assert results[0] == NAMES[2], results
+    print("  ✓ Term test first within the year")
+
+    print("✅ year ranking tests passed")
+
+
+def test_school_names_break_ties():
+    """Test that a school name in the query lifts that school's papers within the same year"""
+    print("\nTesting school name tie-break...")
+
+    results = search("kingswood physics 2023")
+
+    # Test 1: The school's paper leads the 2023 papers
+    assert results[0] == NAMES[1], results
+    print("  ✓ School paper first")
+
+    # Test 2: Other years still follow every 2023 paper
+    assert set(results[:3]) == set(NAMES[:3]), results
+    print("  ✓ Year still ranks first")
+
+    print("✅ school name tests passed")
+
+
+def test_glued_school_names_reach_the_first_page():
+    """Test that a school name glued to a year finds its paper among the top 30"""
+    print("\nTesting glued school names...")
+
+    df = pd.DataFrame({"File Name": DATED + FILLER + GLUED})
+    df["File ID"] = [f"id{i}" for i in range(len(df))]
+    kwargs = dict(limit=30, filename_index=build_filename_index(df),
+                  trigram_index=TrigramIndex.build(df.index.tolist(), df["File Name"].tolist()),
+                  file_terms=build_file_terms(df))
+
+    # Test 1: Without a year in the query, the name match outranks every dated paper
+    for query, name in [("kingswood", GLUED[0]), ("kingswood chemistry", GLUED[0]),
+                        ("dharmaraja", GLUED[1])]:
+        results = fuzzy_search(query, df, **kwargs)["File Name"].tolist()
+        assert results[0] == name, (query, results[:5])
+    print("  ✓ School paper first without a year")
+
+    # Test 2: The glued year is read, so the paper is an exact-year match
+    results = fuzzy_search("dharmaraja 2025", df, **kwargs)["File Name"].tolist()
+    assert results[0] == GLUED[1], results[:5]
+    print("  ✓ Glued year matched")
+
+    print("✅ glued school name tests passed")
+
+
+def test_cached_terms_on_filtered_rows():
+    """Test that terms built for the whole catalog rank a filtered frame like fresh ones"""
+    print("\nTesting cached file terms...")
+
+    df = catalog()
+    file_terms = build_file_terms(df)
+    filename_index = build_filename_index(df)
+    filtered = df[df["File Name"].str.contains("20")]
+
+    # Test 1: Terms are looked up by label, so a filtered frame gets the right rows
+    for query in ["physics 2023 term test", "physics", "ol mathematics 2010", "al chemistry"]:
+        cached = fuzzy_search(query, filtered, filename_index=filename_index, file_terms=file_terms)
+        fresh = fuzzy_search(query, filtered, filename_index=filename_index)
+        assert cached["File ID"].tolist() == fresh["File ID"].tolist(), query
+        assert cached["Match Score"].tolist() == fresh["Match Score"].tolist(), query
+    print("  ✓ Same results on a filtered frame")
+
+    # Test 2: A subject nobody has falls back to papers of the same level
+    results = fuzzy_search("al chemistry", df, file_terms=file_terms)
+    assert len(results) and all("_AL_" in name for name in results["File Name"]), results["File Name"].tolist()
+    print("  ✓ Level fallback")
+
+    print("✅ cached file terms tests passed")
+
+
+def test_sharded_search_under_load_and_worker_loss():
+    """Test that sessions search the worker pool concurrently and survive a dead worker"""
+    print("\nTesting sharded search...")
+
+    df = catalog()
+    queries = ["physics 2023 term test", "kingswood physics 2023", "ol mathematics 2010", "al chemistry"]
+    engine = ShardedSearchEngine(df, shards=2)
+    try:
+        expected = {query: engine.search(query)["File ID"].tolist() for query in queries}
+
+        # Test 1: Concurrent sessions get their own answers
+        mismatches = []
+
+        def session(index):
+            for query in queries[index % 4:] + queries[:index % 4]:
+                if engine.search(query)["File ID"].tolist() != expected[query]:
+                    mismatches.append(query)
+
+        threads = [threading.Thread(target=session, args=(index,)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not mismatches, mismatches
+        print("  ✓ Concurrent searches answered correctly")
+
+        # Test 2: A killed worker is replaced and the query still answered
+        dead = engine._processes[0]
+        dead.kill()
+        dead.join()
+        assert engine.search(queries[0])["File ID"].tolist() == expected[queries[0]]
+        assert engine._processes[0] is not dead and engine._processes[0].is_alive()
+        print("  ✓ Dead worker restarted")
+    finally:
+        engine.close()
+
+    print("✅ sharded search tests passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 60)
+    print("RUNNING SEARCH TESTS")
+    print("=" * 60)
+
+    try:
+        test_year_ranks_before_partial_name_matches()
+        test_school_names_break_ties()
+        test_glued_school_names_reach_the_first_page()
+        test_cached_terms_on_filtered_rows()
+        test_sharded_search_under_load_and_worker_loss()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    exit(0 if success else 1)
@@ -0,0 +1,106 @@
+"""
+Tests for multi-channel sources and the resumable channel export.
+Run this with: python test_sources.py
+"""
+
+import os
+import sys
+import tempfile
+
+# Set UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+import pandas as pd
+
+from channel_export import flush_rows, load_checkpoint, save_checkpoint, trim_export_to_checkpoint
+from sources import EXPORT_COLUMNS, SourceRouter, merge_sources, parse_sources
+
+
+def test_sources_merge_and_routing():
+    """Test that channels merge into one index and partner papers use their own bot"""
+    print("\nTesting multi-channel merge...")
+
+    with tempfile.TemporaryDirectory() as root:
+        sources = parse_sources({
+            "partner": {"channel": "@partner", "priority": 1, "bot_token": "partner-token"},
+            "main": {"channel": "@examlanka"},
+        }, default_bot_token="main-token")
+        pd.DataFrame({"File Name": ["a.pdf", "b.pdf"], "File ID": ["main_a", "main_b"],
+                      "File Unique ID": ["U_a", "U_b"], "Message ID": [1, 2]}
+                     ).to_csv(os.path.join(root, "main.csv"), index=False)
+        pd.DataFrame({"File Name": ["b copy.pdf", "c.pdf"], "File ID": ["partner_b", "partner_c"],
+                      "File Unique ID": ["U_b", None], "Message ID": [7, 8]}
+                     ).to_csv(os.path.join(root, "partner.csv"), index=False)
+        csv_path = os.path.join(root, "master_index.csv")
+
+        # Test 1: A paper in both channels is kept once, from the higher-priority channel
+        counts = merge_sources(sources, root, csv_path)
+        df = pd.read_csv(csv_path)
+        assert counts == {"main": 2, "partner": 1}
+        assert df["File ID"].tolist() == ["main_a", "main_b", "partner_c"]
+        assert df["Source"].tolist() == ["main", "main", "partner"]
+        print("  ✓ Cross-channel duplicate removed")
+
+        # Test 2: Downloads of partner papers go through the partner's bot
+        router = SourceRouter(sources, df, default_bot_token="main-token")
+        assert router.bot_token("partner_c", "main-token") == "partner-token"
+        assert router.bot_token("main_a", "main-token") == "main-token"
+        assert len(router.routes) == 1  # Papers using the default bot are not stored
+        print("  ✓ Downloads routed per channel")
+
+    print("✅ multi-channel tests passed")
+
+
+def test_export_checkpoints():
+    """Test that rows flushed after the last checkpoint are dropped on resume"""
+    print("\nTesting export checkpoints...")
+
+    with tempfile.TemporaryDirectory() as root:
+        csv_path = os.path.join(root, "main.csv")
+        checkpoint_path = os.path.join(root, "main.checkpoint.json")
+        rows = [{"File Name": f"{i}.pdf", "File ID": f"id{i}", "File Unique ID": f"U{i}", "Message ID": i}
+                for i in range(1, 6)]
+
+        # Test 1: No checkpoint means starting from the beginning
+        assert load_checkpoint(checkpoint_path) == 0 and trim_export_to_checkpoint(csv_path, 0) == 0
+        print("  ✓ Fresh export")
+
+        # Test 2: A committed batch survives; a flushed but uncommitted one is dropped
+        flush_rows(csv_path, rows[:3], EXPORT_COLUMNS)
+        save_checkpoint(checkpoint_path, 3, 3)
+        flush_rows(csv_path, rows[3:], EXPORT_COLUMNS)  # Interrupted before its checkpoint
+        assert load_checkpoint(checkpoint_path) == 3
+        assert trim_export_to_checkpoint(csv_path, 3) == 3
+        assert pd.read_csv(csv_path)["Message ID"].tolist() == [1, 2, 3]
+        print("  ✓ Uncommitted rows discarded")
+
+    print("✅ export checkpoint tests passed")
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("=" * 60)
+    print("RUNNING SOURCES TESTS")
+    print("=" * 60)
+
+    try:
+        test_sources_merge_and_routing()
+        test_export_checkpoints()
+
+        print("\n" + "=" * 60)
+        print("✅ ALL TESTS PASSED!")
+        print("=" * 60)
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+    return True
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    exit(0 if success else 1)
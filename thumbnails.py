@@ -0,0 +1,264 @@
+"""
+First-page thumbnails for the result tiles.
+
+Offline pipeline (python thumbnails.py):
+1. Reads master_index.csv and skips File IDs that already have a thumbnail
+   (or whose PDF could not be rendered on an earlier run, unless --retry)
+2. Takes each PDF from the mirror or the PDF cache when it is there, and
+   otherwise downloads it from Telegram behind a token bucket (THUMB_RATE)
+3. Renders page 1 at THUMB_WIDTH pixels in a process pool and writes it as
+   a small WebP, one file per File ID:
+
+       static/thumbs/ab/ab12...ef.webp   (the same key as the PDF cache)
+
+Streamlit serves static/ as app/static/, so the tiles show the thumbnail
+with a lazy-loading <img> (the browser fetches it only when the tile
+scrolls into view) and fall back to the generic PDF icon until it exists.
+
+Pages are rendered with pypdfium2 when it is installed. Without it, the
+largest image on page 1 is used instead, which covers scanned papers.
+Only a bounded number of PDFs are held in memory at once (two per worker),
+and each worker renders at thumbnail size rather than full resolution
+where the renderer allows it.
+"""
+import argparse
+import io
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from bulk_download import iter_completed_downloads
+from mirror import MirrorStore
+from pdf_cache import PDF_CACHE_DIR, cache_key, read_preferring_optimized
+from resilience import RateLimiter
+from sources import SourceRouter, load_sources
+from telegram_download import TelegramDownloader, load_bot_token
+
+THUMB_DIR = os.environ.get("THUMB_DIR", os.path.join("static", "thumbs"))
+THUMB_URL_PREFIX = "app/static/thumbs"
+THUMB_LOG = os.path.join(".cache", "thumbnails.jsonl")
+THUMB_WIDTH = 160
+THUMB_MAX_HEIGHT = 240
+THUMB_QUALITY = 50
+THUMB_RATE = 2.0       # Telegram downloads per second
+DOWNLOAD_WORKERS = 4
+MAX_SOURCE_PIXELS = 50_000_000  # Skip embedded images larger than this instead of decoding them
+
+
+def thumbnail_path(file_id, root=THUMB_DIR):
+    key = cache_key(file_id)
+    return os.path.join(root, key[:2], f"{key}.webp")
+
+
+def thumbnail_url(file_id, root=THUMB_DIR):
+    """Relative URL of the thumbnail for a File ID, or None if it has not been rendered yet."""
+    path = thumbnail_path(file_id, root)
+    if not os.path.exists(path):
+        return None
+    return f"{THUMB_URL_PREFIX}/{os.path.relpath(path, root).replace(os.sep, '/')}"
+
+
+def _render_pdfium(pdf_bytes, width):
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(pdf_bytes)
+    try:
+        page = pdf[0]
+        bitmap = page.render(scale=width / page.get_width())
+        return bitmap.to_pil()
+    finally:
+        pdf.close()
+
+
+def _render_embedded_image(pdf_bytes):
+    from PIL import Image
+    from pypdf import PdfReader
+
+    page = PdfReader(io.BytesIO(pdf_bytes)).pages[0]
+    xobjects = page.get("/Resources", {}).get("/XObject", {})
+    sizes = []
+    for name in xobjects:
+        xobject = xobjects[name].get_object()
+        if xobject.get("/Subtype") == "/Image":
+            sizes.append((int(xobject.get("/Width", 0)) * int(xobject.get("/Height", 0)), name))
+    sizes = [(pixels, name) for pixels, name in sizes if 0 < pixels <= MAX_SOURCE_PIXELS]
+    if not sizes:
+        raise ValueError("page 1 has no renderable image")
+    # Decode only the largest image (the scanned page)
+    image = page.images[max(sizes)[1]].image
+    if not isinstance(image, Image.Image):
+        raise ValueError("unsupported image")
+    return image
+
+
+def render_thumbnail(pdf_bytes, width=THUMB_WIDTH, quality=THUMB_QUALITY):
+    """Render page 1 of a PDF as WebP.
+
+    Runs in a worker process. Returns ``(webp bytes, method, cpu_seconds)``;
+    the bytes are None and ``method`` holds the reason when it fails.
+    """
+    start = time.process_time()
+    try:
+        try:
+            image, method = _render_pdfium(pdf_bytes, width), "pdfium"
+        except ImportError:
+            image, method = _render_embedded_image(pdf_bytes), "image"
+        image = image.convert("RGB")
+        image.thumbnail((width, THUMB_MAX_HEIGHT))
+        out = io.BytesIO()
+        image.save(out, format="WEBP", quality=quality, method=6)
+        return out.getvalue(), method, time.process_time() - start
+    except Exception as e:
+        return None, f"{type(e).__name__}: {str(e)[:200]}", time.process_time() - start
+
+
+def write_thumbnail(file_id, content, root=THUMB_DIR):
+    path = thumbnail_path(file_id, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def load_failures(path=THUMB_LOG):
+    """File IDs whose PDF could not be rendered on an earlier run."""
+    failed = set()
+    if not os.path.exists(path):
+        return failed
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn last line from an interrupted run
+            if record.get("error"):
+                failed.add(record["file_id"])
+            else:
+                failed.discard(record["file_id"])
+    return failed
+
+
+class PdfSource:
+    """Local copies first (mirror, PDF cache), then Telegram at a limited rate."""
+
+    def __init__(self, bot_token, rate=THUMB_RATE, mirror=None, cache_root=PDF_CACHE_DIR, router=None):
+        self.bot_token = bot_token
+        self.router = router
+        self.mirror = mirror if mirror is not None else MirrorStore()
+        self.cache_root = cache_root
+        self.limiter = RateLimiter(rate, burst=DOWNLOAD_WORKERS)
+        # Don't write into the app's PDF cache: one-off fetches would displace popular papers
+        self.downloader = TelegramDownloader(cache=None, hedge=False)
+
+    def local(self, file_id):
+        content = self.mirror.get(file_id)
+        if content is not None:
+            return content
+        key = cache_key(file_id)
+        try:
+            return read_preferring_optimized(os.path.join(self.cache_root, key[:2], f"{key}.pdf"))
+        except FileNotFoundError:
+            return None
+
+    def fetch(self, file_id):
+        """Returns (content, error) like get_telegram_file_content."""
+        content = self.local(file_id)
+        if content is not None:
+            return content, None
+        bot_token = self.router.bot_token(file_id, self.bot_token) if self.router is not None else self.bot_token
+        self.limiter.acquire()
+        return self.downloader.fetch(file_id, bot_token)
+
+
+def run_pipeline(csv_path='master_index.csv', root=THUMB_DIR, workers=None, rate=THUMB_RATE,
+                 width=THUMB_WIDTH, limit=None, retry=False):
+    df = pd.read_csv(csv_path)
+    df.columns = df.columns.str.strip()
+    file_ids = [fid for fid in dict.fromkeys(df['File ID'].astype(str).str.strip()) if fid and fid != 'nan']
+    skip = set() if retry else load_failures()
+    todo = [fid for fid in file_ids if fid not in skip and not os.path.exists(thumbnail_path(fid, root))]
+    if limit:
+        todo = todo[:limit]
+
+    workers = workers or os.cpu_count() or 1
+    print(f"🖼️  {len(file_ids) - len(todo)} thumbnails done or skipped, {len(todo)} to render with {workers} workers")
+    if not todo:
+        return
+
+    bot_token = load_bot_token()
+    source = PdfSource(bot_token, rate=rate, router=SourceRouter(load_sources(), df, default_bot_token=bot_token))
+    counts = {"rendered": 0, "unrenderable": 0, "download_failed": 0}
+    stored = cpu_seconds = 0
+    start = time.perf_counter()
+    os.makedirs(os.path.dirname(THUMB_LOG) or ".", exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(THUMB_LOG, 'a', encoding='utf-8') as log:
+        in_flight = {}
+
+        def collect(done):
+            nonlocal stored, cpu_seconds
+            for future in done:
+                file_id = in_flight.pop(future)
+                content, method, seconds = future.result()
+                cpu_seconds += seconds
+                if content is None:
+                    counts["unrenderable"] += 1
+                    log.write(json.dumps({"file_id": file_id, "error": method}) + "\n")
+                    continue
+                write_thumbnail(file_id, content, root)
+                counts["rendered"] += 1
+                stored += len(content)
+                log.write(json.dumps({"file_id": file_id, "method": method, "bytes": len(content)}) + "\n")
+            log.flush()
+            print(f"🖼️  {counts['rendered']}/{len(todo)} rendered", end='\r')
+
+        # File IDs double as names so results can be matched back to their ID
+        for file_id, content, error in iter_completed_downloads(
+                [(fid, fid) for fid in todo], source.fetch, max_workers=DOWNLOAD_WORKERS):
+            if error:
+                counts["download_failed"] += 1
+                continue
+            in_flight[pool.submit(render_thumbnail, content, width)] = file_id
+            # Keep the number of PDFs waiting in memory bounded
+            if len(in_flight) >= workers * 2:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            collect(done)
+
+    elapsed = time.perf_counter() - start
+    print(f"\n\n✅ {counts['rendered']} thumbnails in {elapsed:.1f}s ({cpu_seconds:.1f} CPU-seconds) -> {root}")
+    if counts["rendered"]:
+        print(f"   {stored / counts['rendered'] / 1024:.1f} KB per thumbnail on average")
+    if counts["unrenderable"]:
+        print(f"⚠️  {counts['unrenderable']} PDFs could not be rendered; see {THUMB_LOG} (--retry to try again)")
+    if counts["download_failed"]:
+        print(f"⚠️  {counts['download_failed']} downloads failed; they will be retried on the next run")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render first-page thumbnails for the result tiles.")
+    parser.add_argument("--csv", default='master_index.csv', help="index CSV to read File IDs from")
+    parser.add_argument("--dir", default=THUMB_DIR, help="thumbnail directory")
+    parser.add_argument("--workers", type=int, default=None, help="render processes (default: CPU count)")
+    parser.add_argument("--rate", type=float, default=THUMB_RATE, help="Telegram downloads per second")
+    parser.add_argument("--width", type=int, default=THUMB_WIDTH, help="thumbnail width in pixels")
+    parser.add_argument("--limit", type=int, default=None, help="only process this many files")
+    parser.add_argument("--retry", action="store_true", help="retry PDFs that failed to render before")
+    parser.add_argument("--watch", type=float, default=None, metavar="SECONDS",
+                        help="keep running and render thumbnails for new papers as they appear")
+    args = parser.parse_args()
+
+    while True:
+        run_pipeline(args.csv, args.dir, workers=args.workers, rate=args.rate, width=args.width,
+                     limit=args.limit, retry=args.retry)
+        if args.watch is None:
+            break
+        time.sleep(args.watch)
@@ -0,0 +1,100 @@
+"""
+Character-trigram index over normalized filenames.
+
+Whole-token matching misses names glued into other words, e.g. "kingswood" in
+"G12_2025KINGSWOOD_CHEMPAPER2NDTERM.pdf" or "dharmaraja" in
+"..._kandyDharmarajacolla.pdf". Here every filename word is broken into
+overlapping 3-character grams and each gram keeps a sorted array of the rows
+containing it.
+
+A query term matches a row when at least ``threshold`` of the term's
+trigrams occur in it. With ``q`` trigrams and ``need = ceil(threshold * q)``,
+a matching row must contain at least one of the ``q - need + 1`` *rarest*
+trigrams, so candidates are generated from those short posting lists only and
+then checked against the others by binary search. Terms whose rarest trigram
+is in more than MAX_POSTING_FRACTION of rows are not informative enough to
+be worth it (they are ordinary words like "paper") and are skipped, which
+keeps the work per term bounded by a small fraction of the catalog.
+"""
+import math
+import re
+
+import numpy as np
+
+from search import normalize_text
+
+DEFAULT_THRESHOLD = 0.7
+MAX_POSTING_FRACTION = 0.05
+MIN_TERM_LENGTH = 3
+
+
+def trigrams(word):
+    """Distinct trigrams of a single word."""
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def filename_words(name):
+    """Normalized alphanumeric words of a filename (separators removed)."""
+    return re.findall(r'[a-z0-9]+', normalize_text(name))
+
+
+class TrigramIndex:
+    def __init__(self, keys, postings):
+        self.keys = list(keys)
+        self.positions = {key: i for i, key in enumerate(self.keys)}
+        self.postings = postings
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, keys, names):
+        """Build from parallel lists of row keys and filenames."""
+        lists = {}
+        for row, name in enumerate(names):
+            grams = set()
+            for word in filename_words(name):
+                grams |= trigrams(word)
+            for gram in grams:
+                lists.setdefault(gram, []).append(row)
+        postings = {gram: np.asarray(rows, dtype=np.int32) for gram, rows in lists.items()}
+        return cls(keys, postings)
+
+    def search(self, term, threshold=DEFAULT_THRESHOLD, max_fraction=MAX_POSTING_FRACTION):
+        """Return ``{row position: similarity}`` for rows matching ``term``.
+
+        Similarity is the fraction of the term's trigrams found in the row
+        (1.0 = every trigram present, e.g. an exact substring). Pass a
+        larger ``max_fraction`` to look up common terms anyway.
+        """
+        word = re.sub(r'[^a-z0-9]', '', normalize_text(term))
+        grams = trigrams(word)
+        if len(word) < MIN_TERM_LENGTH or not grams:
+            return {}
+
+        empty = np.empty(0, dtype=np.int32)
+        lists = sorted((self.postings.get(gram, empty) for gram in grams), key=len)
+        need = math.ceil(threshold * len(lists))
+        seed_lists = lists[:len(lists) - need + 1]
+        if len(seed_lists[0]) > max_fraction * max(len(self.keys), 1):
+            return {}
+
+        candidates = np.unique(np.concatenate(seed_lists))
+        if not len(candidates):
+            return {}
+
+        hits = np.zeros(len(candidates), dtype=np.int32)
+        for posting in lists:
+            if not len(posting):
+                continue
+            found = np.searchsorted(posting, candidates)
+            found[found == len(posting)] = 0
+            hits += posting[found] == candidates
+
+        similarity = hits / len(lists)
+        keep = similarity >= threshold
+        return dict(zip(candidates[keep].tolist(), similarity[keep].tolist()))
+
+    def search_keys(self, term, threshold=DEFAULT_THRESHOLD, max_fraction=MAX_POSTING_FRACTION):
+        """Like search() but keyed by row key."""
+        return {self.keys[row]: score for row, score in self.search(term, threshold, max_fraction).items()}